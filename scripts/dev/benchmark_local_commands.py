@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Benchmark the local commands run by the nested shells and by executing the
+# shell directly
+#
+# Usage:
+# python scripts/dev/benchmark_local_commands.py [-n <number of runs>]
+#     [-b <temporary files backend>]
+
+import argparse
+import time
+
+from training_noodles.commands_runner import CommandsRunner
+from training_noodles.temp_files_helper import create_temp_files_backend
+
+
+def benchmark(runner, num_runs, pipe_outputs):
+    # Run the commands once to warm up
+    runner.run_commands('echo warm-up', pipe_outputs=pipe_outputs)
+
+    # Run the commands several times
+    start_time = time.time()
+
+    for _ in range(num_runs):
+        runner.run_commands('echo hello', envs={'NAME': 'exp1'},
+                            pipe_outputs=pipe_outputs)
+
+    # Return the average time in milliseconds
+    return (time.time() - start_time) / num_runs * 1000
+
+
+def main():
+    # Parse the arguments
+    parser = argparse.ArgumentParser(
+        description='Benchmark the local commands')
+    parser.add_argument('-n', '--num-runs', type=int, default=200,
+                        help='Number of runs of each case')
+    parser.add_argument('-b', '--backend', default='disk',
+                        choices=['disk', 'shm'],
+                        help='Backend of the temporary files')
+    args = parser.parse_args()
+
+    # Print the header
+    print('{:<16} {:<8} {:>12}'.format('Path', 'Outputs', 'Average (ms)'))
+
+    # Benchmark each path and outputs
+    for direct in [False, True]:
+        runner = CommandsRunner(
+            direct_local_exec=direct,
+            temp_files_backend=create_temp_files_backend(args.backend))
+
+        for pipe_outputs in [False, True]:
+            average = benchmark(runner, args.num_runs, pipe_outputs)
+
+            print('{:<16} {:<8} {:>12.3f}'.format(
+                'direct exec' if direct else 'nested shells',
+                'pipes' if pipe_outputs else 'files', average))
+
+        runner.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -162,6 +162,7 @@ setup(
     extras_require={  # Optional
         'dev': ['check-manifest'],
         'test': ['coverage'],
+        'fast': ['numpy'],
     },
 
     # If there are data files included in your packages that need to be
@@ -0,0 +1,126 @@
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+
+# Testing targets
+from training_noodles.cli import CLI
+
+
+class TestPumpResults(unittest.TestCase):
+    def setUp(self):
+        # Create a CLI
+        self.cli = CLI()
+
+        # Initialize the outputs
+        self.outputs = {'stdout': b'', 'stderr': b''}
+
+    def test_input(self):
+        # Run the shell which reads the commands from STDIN
+        p_obj = self.cli.run_command(
+            'bash -s', stdin=subprocess.PIPE, extra_envs={}, wait=False)
+
+        # Write a large input to the command
+        input = b'echo out; echo err >&2\n' + b'#' * 200000 + b'\nexit 3\n'
+
+        return_code, killed = self.cli.pump_results(
+            p_obj, self._on_output, input=input, timeout=10)
+
+        # Check the results
+        self.assertEqual(
+            self.outputs, {'stdout': b'out\n', 'stderr': b'err\n'})
+        self.assertEqual(return_code, 3)
+        self.assertIsNone(killed)
+
+    def test_background_process(self):
+        # Run the command which leaves a process holding the pipes
+        p_obj = self.cli.run_command(
+            'echo begin; sleep 3 &', stdin=subprocess.PIPE, extra_envs={},
+            wait=False)
+
+        # Save the start time
+        start_time = time.time()
+
+        # The background process shouldn't block the wait
+        return_code, killed = self.cli.pump_results(
+            p_obj, self._on_output)
+
+        # Check the results
+        self.assertEqual(self.outputs['stdout'], b'begin\n')
+        self.assertEqual(return_code, 0)
+        self.assertLess(time.time() - start_time, 2)
+
+    def test_timeout(self):
+        # Run the command which spawns a background process
+        p_obj = self.cli.run_command(
+            'echo begin; sleep 30 & sleep 30', stdin=subprocess.PIPE,
+            extra_envs={}, wait=False)
+
+        # Save the start time
+        start_time = time.time()
+
+        # Wait for the results
+        return_code, killed = self.cli.pump_results(
+            p_obj, self._on_output, timeout=0.3)
+
+        # Check the results
+        self.assertEqual(self.outputs['stdout'], b'begin\n')
+        self.assertNotEqual(return_code, 0)
+        self.assertEqual(killed, 'timeout')
+        self.assertLess(time.time() - start_time, 10)
+
+    def test_cancel(self):
+        # Create the cancel event
+        cancel_event = threading.Event()
+
+        # Run the command
+        p_obj = self.cli.run_command(
+            'sleep 30', stdin=subprocess.PIPE, extra_envs={}, wait=False)
+
+        # Cancel the command later
+        timer = threading.Timer(0.2, cancel_event.set)
+        timer.start()
+
+        # Wait for the results
+        _, killed = self.cli.pump_results(
+            p_obj, self._on_output, cancel_event=cancel_event)
+
+        # Check the reason
+        self.assertEqual(killed, 'cancel')
+
+    def test_exec_command(self):
+        # Execute the shell directly with the extra environment variables
+        p_obj = self.cli.exec_command(
+            ['bash', '-s'], stdin=subprocess.PIPE, extra_envs={'NAME': 1})
+
+        # Feed the commands
+        return_code, killed = self.cli.pump_results(
+            p_obj, self._on_output, input=b'echo $NAME; exit 4\n')
+
+        # Check the results
+        self.assertEqual(self.outputs['stdout'], b'1\n')
+        self.assertEqual(return_code, 4)
+        self.assertIsNone(killed)
+
+    def test_output_file(self):
+        with tempfile.TemporaryFile() as fp:
+            # Execute the shell with STDOUT redirected to the file
+            p_obj = self.cli.exec_command(
+                ['bash', '-s'], stdin=subprocess.PIPE, stdout=fp)
+
+            # Feed the commands
+            return_code, _ = self.cli.pump_results(
+                p_obj, self._on_output, input=b'echo out; echo err >&2\n')
+
+            # Check the outputs
+            fp.seek(0)
+            self.assertEqual(fp.read(), b'out\n')
+
+        # Check only STDERR is read from the pipe
+        self.assertEqual(
+            self.outputs, {'stdout': b'', 'stderr': b'err\n'})
+        self.assertEqual(return_code, 0)
+
+    def _on_output(self, stream, chunk):
+        self.outputs[stream] += chunk
@@ -0,0 +1,246 @@
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from training_noodles.output_buffer import OutputHandle
+
+# Testing targets
+from training_noodles.commands_runner import CommandsRunner
+
+# Stand-in of the SSH command, the commands are run on the local machine with
+# the destination in "FAKE_SSH_DESTINATION", and the connection is dropped
+# once without running the commands when the drop file exists
+FAKE_SSH = textwrap.dedent('''\
+    #!{python}
+    import os
+    import subprocess
+    import sys
+
+    # Log the arguments
+    with open({log_path!r}, 'a') as fp:
+        fp.write(' '.join(sys.argv[1:]) + '\\n')
+
+    # Drop the connection once
+    if os.path.exists({drop_path!r}):
+        os.remove({drop_path!r})
+        sys.stderr.write('Connection closed by remote host\\n')
+        sys.exit(255)
+
+    # Skip the options and run the command after the destination
+    args = iter(sys.argv[1:])
+    rest = []
+
+    for arg in args:
+        if arg in ['-o', '-i', '-p']:
+            next(args)
+        elif not arg.startswith('-'):
+            rest.append(arg)
+
+    sys.exit(subprocess.call(
+        ' '.join(rest[1:]), shell=True,
+        env=dict(os.environ, FAKE_SSH_DESTINATION=rest[0])))
+''')
+
+
+def write_fake_ssh(dir_path):
+    """ Write the stand-in SSH command to the directory.
+
+    Returns:
+        (ssh_path, log_path, drop_path) where "log_path" is the log of the
+        arguments and "drop_path" is the file to drop the next connection.
+    """
+    # Set the paths
+    ssh_path = os.path.join(dir_path, 'ssh')
+    log_path = os.path.join(dir_path, 'ssh.log')
+    drop_path = os.path.join(dir_path, 'drop')
+
+    # Write the stand-in SSH command
+    with open(ssh_path, 'w') as fp:
+        fp.write(FAKE_SSH.format(
+            python=sys.executable, log_path=log_path, drop_path=drop_path))
+
+    os.chmod(ssh_path, stat.S_IRWXU)
+
+    # Return the paths
+    return ssh_path, log_path, drop_path
+
+
+class TestEvaluateExpressionsOnLocal(unittest.TestCase):
+    def setUp(self):
+        # Create a runner of local commands
+        self.runner = CommandsRunner()
+
+    def tearDown(self):
+        self.runner.close()
+
+    def test_values(self):
+        # Evaluate the expressions at once
+        _, _, sections = self.runner.evaluate_expressions_on_local(
+            ['$A-$(echo 1)', '$(printf "a  b")', '$(echo none)$UNSET'],
+            envs={'A': 'abc'})
+
+        # Check the values
+        self.assertEqual([s[0]['stdout'] for s in sections],
+                         ['abc-1', 'a b', 'none'])
+
+    def test_errors(self):
+        # Evaluate the expressions where the first one fails
+        _, _, sections = self.runner.evaluate_expressions_on_local(
+            ['$(echo err >&2; exit 3)', '$(echo ok)'])
+
+        # Check the errors are separated
+        self.assertEqual(sections[0][0]['stderr'], 'err\n')
+        self.assertEqual(sections[1][0]['stdout'], 'ok')
+        self.assertEqual(sections[1][0]['stderr'], '')
+        self.assertEqual(sections[1][0]['return_code'], 0)
+
+        # Check the debugging info only contains the expression
+        self.assertIn('$(echo ok)', sections[1][1]['inner_commands'])
+        self.assertNotIn('exit 3', sections[1][1]['inner_commands'])
+
+
+class TestDirectLocalExec(unittest.TestCase):
+    def setUp(self):
+        # Create a runner which executes the local shell directly
+        self.runner = CommandsRunner(direct_local_exec=True)
+
+        # Create a directory for the user files
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'exp.log')
+
+    def tearDown(self):
+        self.runner.close()
+        self.temp_dir.cleanup()
+
+    def test_outputs(self):
+        # Run the commands with the outputs in the temporary files and pipes
+        for pipe_outputs in [False, True]:
+            all_results, debug_infos = self.runner.run_commands(
+                ['echo $NAME', 'echo err >&2', 'exit 2'], envs={'NAME': 'a'},
+                pipe_outputs=pipe_outputs)
+
+            # Check the results
+            self.assertEqual(all_results[0]['stdout'], 'a\n')
+            self.assertEqual(all_results[0]['stderr'], 'err\n')
+            self.assertEqual(all_results[0]['return_code'], 2)
+            self.assertEqual(debug_infos[0]['outer_command'].split()[:2],
+                             ['bash', '-s'])
+
+    def test_user_files(self):
+        # Write the outputs of two command groups to the user file, the
+        # second group appends to the file
+        user_files = {'stdout': self.path}
+
+        self.runner.run_commands(['echo 1', 'local:echo 2'],
+                                 user_files=user_files)
+
+        with open(self.path) as fp:
+            self.assertEqual(fp.read(), '1\n2\n')
+
+    def test_missing_directory(self):
+        # Write the outputs to a file in a missing directory
+        path = os.path.join(self.temp_dir.name, 'missing', 'exp.log')
+
+        all_results, _ = self.runner.run_commands(
+            'echo 1', user_files={'stdout': path})
+
+        # Check the error is reported as the outer error
+        self.assertEqual(all_results[0]['return_code'], 1)
+        self.assertIn('No such file or directory',
+                      all_results[0]['outer_stderr'])
+
+    def test_missing_shell(self):
+        # Execute a shell which doesn't exist
+        runner = CommandsRunner(shell_stdin='nonexistent-shell -s',
+                                direct_local_exec=True)
+        self.addCleanup(runner.close)
+
+        # Check the error is reported as the outer error in both paths
+        for pipe_outputs in [False, True]:
+            all_results, _ = runner.run_commands(
+                'echo 1', pipe_outputs=pipe_outputs)
+
+            self.assertEqual(all_results[0]['return_code'], 1)
+            self.assertIn('nonexistent-shell',
+                          all_results[0]['outer_stderr'])
+
+    def test_user_file_handles(self):
+        # Write the old contents to the user file
+        with open(self.path, 'w') as fp:
+            fp.write('old\n')
+
+        # Append the outputs to the user file
+        all_results, _ = self.runner.run_commands(
+            'echo new', user_files={'stdout': self.path})
+
+        # Check only the appended outputs are in the results
+        stdout = all_results[0]['stdout']
+
+        self.assertIsInstance(stdout, OutputHandle)
+        self.assertEqual(str(stdout), 'new\n')
+
+
+class TestRunCommandsBatch(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the stand-in SSH command
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.ssh_path, _, self.drop_path = write_fake_ssh(self.temp_dir.name)
+
+        # Create a runner of remote commands through the stand-in SSH command
+        self.runner = CommandsRunner(ssh_command=self.ssh_path)
+
+        # Set the remote server
+        self.server_spec = {'hostname': 'host', 'username': 'user'}
+
+    def tearDown(self):
+        self.runner.close()
+        self.temp_dir.cleanup()
+
+    def test_mixed_sections(self):
+        # Run the lists of commands where the second one fails
+        results, _, sections = self.runner.run_commands_batch(
+            ['echo 1', ['echo err >&2', 'exit 3'], 'echo $NAME'],
+            server_spec=self.server_spec, envs={'NAME': 'abc'})
+
+        # Check the whole batch succeeds
+        self.assertEqual(results['return_code'], 0)
+
+        # Check the outputs and return code of each section
+        self.assertEqual(
+            [(s[0]['stdout'], s[0]['stderr'], s[0]['return_code'])
+             for s in sections],
+            [('1\n', '', 0), ('', 'err\n', 3), ('abc\n', '', 0)])
+
+        # Check the debugging info only contains the commands of the section
+        self.assertIn('exit 3', sections[1][1]['inner_commands'])
+        self.assertNotIn('exit 3', sections[2][1]['inner_commands'])
+
+    def test_killed_shell(self):
+        # Kill the remote shell in the second list of commands
+        results, _, sections = self.runner.run_commands_batch(
+            ['echo 1', 'kill -9 $$', 'echo 2'], server_spec=self.server_spec)
+
+        # Check the whole batch fails
+        self.assertNotEqual(results['return_code'], 0)
+
+        # Check only the outputs of the first section are found
+        self.assertEqual(sections[0][0]['stdout'], '1\n')
+        self.assertEqual(sections[1:], [None, None])
+
+    def test_dropped_connection(self):
+        # Drop the connection before running the commands
+        open(self.drop_path, 'w').close()
+
+        results, _, sections = self.runner.run_commands_batch(
+            ['echo 1', 'echo 2'], server_spec=self.server_spec)
+
+        # Check the error of the whole batch
+        self.assertEqual(results['return_code'], 255)
+        self.assertIn('Connection closed', results['stderr'])
+
+        # Check no outputs of the sections are found
+        self.assertEqual(sections, [None, None])
@@ -0,0 +1,181 @@
+import tempfile
+import unittest
+
+from training_noodles.output_buffer import OutputHandle
+
+# Testing targets
+from training_noodles.compiled_spec import (
+    CompiledSpec, ErrorHandler, compile_requirement_expression)
+
+
+class TestCompileRequirementExpression(unittest.TestCase):
+    def test_number(self):
+        self.expr = '<=0.5'
+        self.expected = ('<=', 0.5)
+
+    def test_string(self):
+        self.expr = ' ==Yes'
+        self.expected = ('==', 'Yes')
+
+    def tearDown(self):
+        # Compile the expression
+        predicate = compile_requirement_expression(self.expr)
+
+        # Check the expected results
+        self.assertEqual(
+            (predicate.operator, predicate.value), self.expected)
+
+
+class TestCompileRequirementExpressionExceptions(unittest.TestCase):
+    def test_unknown_operator(self):
+        self.expr = '=0.5'
+
+    def test_not_string(self):
+        self.expr = 0.5
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            compile_requirement_expression(self.expr)
+
+
+class TestGetRequirementPredicate(unittest.TestCase):
+    def test_compile_once(self):
+        # Create an empty compiled spec
+        compiled_spec = CompiledSpec()
+
+        # Get the predicate twice
+        predicate = compiled_spec.get_requirement_predicate('>1')
+
+        # Check whether the predicate is reused
+        self.assertIs(compiled_spec.get_requirement_predicate('>1'), predicate)
+
+
+class TestGetMetricAggregation(unittest.TestCase):
+    def test_compile_once(self):
+        # Create an empty compiled spec
+        compiled_spec = CompiledSpec()
+
+        # Get the aggregation of two requirement IDs
+        req_id, aggregation = compiled_spec.get_metric_aggregation(
+            'ttl:30:gpu@percentile(90)')
+        _, other = compiled_spec.get_metric_aggregation('mem@percentile(90)')
+
+        # Check the requirement ID and whether the aggregation is reused
+        self.assertEqual(req_id, 'ttl:30:gpu')
+        self.assertEqual((aggregation.name, aggregation.argument),
+                         ('percentile', 90.0))
+        self.assertIs(other, aggregation)
+
+    def test_without_aggregation(self):
+        self.assertEqual(CompiledSpec().get_metric_aggregation('gpu'),
+                         ('gpu', None))
+
+
+class TestErrorHandlerMatch(unittest.TestCase):
+    def setUp(self):
+        # Initialize the error handler spec
+        self.spec = {
+            'return_code': 1,
+            'stderr_pattern': 'fatal: .+\\s+',
+        }
+
+        # Initialize the results
+        self.return_code = 1
+        self.stderr = 'fatal: error\n'
+
+    def test_full(self):
+        self.expected = True
+
+    def test_full_not_matched(self):
+        self.stderr = 'warning\nfatal: error\n'
+        self.expected = False
+
+    def test_return_code_not_matched(self):
+        self.return_code = 2
+        self.expected = False
+
+    def test_return_code_pattern(self):
+        self.spec['return_code'] = '\\d+'
+        self.return_code = 2
+        self.expected = True
+
+    def test_head(self):
+        self.spec['stderr_scope'] = 'head'
+        self.spec['stderr_pattern'] = 'fatal: '
+        self.stderr = 'fatal: error\n' + 'x' * 10000
+        self.expected = True
+
+    def test_head_beyond_limit(self):
+        self.spec['stderr_scope'] = 'head'
+        self.spec['stderr_limit'] = 10
+        self.stderr = 'x' * 100 + 'fatal: error\n'
+        self.expected = False
+
+    def test_tail(self):
+        self.spec['stderr_scope'] = 'tail'
+        self.spec['stderr_limit'] = 20
+        self.stderr = 'x' * 10000 + 'fatal: error\n'
+        self.expected = True
+
+    def test_tail_not_at_end(self):
+        self.spec['stderr_scope'] = 'tail'
+        self.stderr = 'fatal: error\nwarning'
+        self.expected = False
+
+    def test_handle_head(self):
+        self.spec['stderr_scope'] = 'head'
+        self.spec['stderr_limit'] = 10
+        self.spec['stderr_pattern'] = 'fatal: '
+        self.stderr = self._create_handle(b'fatal: error\n' + b'x' * 10000)
+        self.expected = True
+
+    def test_handle_tail(self):
+        self.spec['stderr_scope'] = 'tail'
+        self.spec['stderr_limit'] = 20
+        self.stderr = self._create_handle(b'x' * 10000 + b'fatal: error\n')
+        self.expected = True
+
+    def test_handle_full(self):
+        self.stderr = self._create_handle(b'fatal: error\n')
+        self.expected = True
+
+    def tearDown(self):
+        # Compile the error handler
+        error_handler = ErrorHandler(self.spec)
+
+        # Check the expected result
+        self.assertEqual(
+            error_handler.match(self.return_code, self.stderr), self.expected)
+
+    def _create_handle(self, data):
+        # Write the data to a temporary file
+        fp = tempfile.NamedTemporaryFile()
+        fp.write(data)
+        fp.flush()
+
+        # Delete the file after the test
+        self.addCleanup(fp.close)
+
+        # Create the handle of the data
+        return OutputHandle(fp.name, 0, len(data))
+
+
+class TestErrorHandlerExceptions(unittest.TestCase):
+    def test_unknown_action(self):
+        self.spec = {'action': 'ignore'}
+
+    def test_unknown_scope(self):
+        self.spec = {'stderr_scope': 'middle'}
+
+    def test_invalid_limit(self):
+        self.spec = {'stderr_limit': -1}
+
+    def test_invalid_return_code_pattern(self):
+        self.spec = {'return_code': '['}
+
+    def test_invalid_retry_policy(self):
+        self.spec = {'action': 'retry', 'retry_policy': {'jitter': 'some'}}
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            ErrorHandler(self.spec)
@@ -0,0 +1,98 @@
+import unittest
+
+# Testing targets
+from training_noodles.dependency_graph import DependencyGraph
+
+
+class TestReady(unittest.TestCase):
+    def setUp(self):
+        # Initialize the names of experiments outside the graph
+        self.satisfied_names = []
+
+        # Initialize whether to raise error for unknown dependencies
+        self.strict = True
+
+        # Initialize the experiments to deploy
+        self.deploy_order = []
+
+    def test_no_dependencies(self):
+        self.names = ['A', 'B', 'C']
+        self.dependencies = [[], [], []]
+        self.expected_ready = {0, 1, 2}
+        self.expected_newly_ready = []
+
+    def test_chain(self):
+        self.names = ['A', 'B', 'C']
+        self.dependencies = [[], ['A'], ['B']]
+        self.deploy_order = [0, 1]
+        self.expected_ready = {2}
+        self.expected_newly_ready = [[1], [2]]
+
+    def test_diamond(self):
+        self.names = ['A', 'B', 'C', 'D']
+        self.dependencies = [[], ['A'], ['A'], ['B', 'C']]
+        self.deploy_order = [0, 2]
+        self.expected_ready = {1}
+        self.expected_newly_ready = [[1, 2], []]
+
+    def test_duplicated_names(self):
+        self.names = ['A', 'A', 'B']
+        self.dependencies = [[], [], ['A']]
+        self.deploy_order = [0, 1]
+        self.expected_ready = {2}
+        self.expected_newly_ready = [[], [2]]
+
+    def test_satisfied_names(self):
+        self.names = ['A', 'B']
+        self.dependencies = [['Installation'], ['A', 'Installation']]
+        self.satisfied_names = ['Installation']
+        self.expected_ready = {0}
+        self.expected_newly_ready = []
+
+    def test_not_strict(self):
+        self.names = ['A', 'B']
+        self.dependencies = [['Filtered'], ['A']]
+        self.strict = False
+        self.expected_ready = {0}
+        self.expected_newly_ready = []
+
+    def test_deploy_twice(self):
+        self.names = ['A', 'B']
+        self.dependencies = [[], ['A']]
+        self.deploy_order = [0, 0]
+        self.expected_ready = {1}
+        self.expected_newly_ready = [[1], []]
+
+    def tearDown(self):
+        # Build the dependency graph
+        graph = DependencyGraph(
+            self.names, self.dependencies,
+            satisfied_names=self.satisfied_names, strict=self.strict)
+
+        # Deploy the experiments
+        newly_ready = [sorted(graph.mark_deployed(i))
+                       for i in self.deploy_order]
+
+        # Check the expected newly ready experiments
+        self.assertEqual(newly_ready, self.expected_newly_ready)
+
+        # Check the expected ready experiments
+        self.assertEqual(graph.get_ready(), self.expected_ready)
+
+
+class TestDependencyGraphExceptions(unittest.TestCase):
+    def test_unknown_dependency(self):
+        self.names = ['A', 'B']
+        self.dependencies = [[], ['C']]
+
+    def test_self_dependency(self):
+        self.names = ['A', 'B']
+        self.dependencies = [['A'], []]
+
+    def test_cycle(self):
+        self.names = ['A', 'B', 'C']
+        self.dependencies = [['C'], ['A'], ['B']]
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            DependencyGraph(self.names, self.dependencies)
@@ -0,0 +1,116 @@
+import os
+import stat
+import tempfile
+import unittest
+
+import oyaml as yaml
+
+from training_noodles.commands_runner import CommandsRunner
+from training_noodles.metric_aggregation import parse_metric_values
+from training_noodles.spec import default_spec_path
+
+# Testing targets
+from training_noodles.gpu_allocator import GPUAllocator
+
+
+class TestGPUAllocator(unittest.TestCase):
+    def setUp(self):
+        # Create an allocator which holds the GPUs for 60 seconds
+        self.allocator = GPUAllocator(max_usage=0.1, hold_time=60)
+
+        # Save the usages of 4 GPUs on server #1
+        self.allocator.update_usages(0, [0.05, 0.9, 0.0, 0.1])
+
+    def test_free_gpus(self):
+        # The least used GPUs come first
+        self.assertEqual(self.allocator.find_free_gpus(0, now=0), [2, 0, 3])
+
+        # The servers without usages have no free GPUs
+        self.assertEqual(self.allocator.find_free_gpus(1, now=0), [])
+
+    def test_allocate(self):
+        # Allocate the least used GPUs
+        self.assertEqual(self.allocator.allocate('a', 0, 2, now=0), [0, 2])
+
+        # The allocated GPUs are held even if they still look free
+        self.allocator.update_usages(0, [0.05, 0.9, 0.0, 0.1])
+
+        self.assertEqual(self.allocator.find_free_gpus(0, now=30), [3])
+
+        # Check there are not enough free GPUs
+        with self.assertRaises(ValueError):
+            self.allocator.allocate('b', 0, 2, now=30)
+
+    def test_hold_time(self):
+        self.allocator.allocate('a', 0, 1, now=0)
+
+        # The GPU is free again after the hold time
+        self.assertEqual(self.allocator.find_free_gpus(0, now=61), [2, 0, 3])
+
+    def test_hold_until_end(self):
+        allocator = GPUAllocator(hold_time=None)
+        allocator.update_usages(0, 0.0)
+        allocator.allocate('a', 0, 1, now=0)
+
+        self.assertEqual(allocator.find_free_gpus(0, now=1e9), [])
+
+    def test_release(self):
+        self.allocator.allocate('a', 0, 1, now=0)
+        self.allocator.allocate('b', 0, 1, now=0)
+
+        # Release the GPU of "a" only
+        self.allocator.release('a')
+
+        self.assertEqual(self.allocator.find_free_gpus(0, now=1), [2, 3])
+
+    def test_invalid_usages(self):
+        # The probe has failed
+        self.allocator.update_usages(0, None)
+
+        self.assertEqual(self.allocator.find_free_gpus(0, now=0), [])
+
+
+class TestFakeNvidiaSMI(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the fake "nvidia-smi"
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Write the fake "nvidia-smi" which prints the memory of 4 GPUs
+        path = os.path.join(self.temp_dir.name, 'nvidia-smi')
+
+        with open(path, 'w') as fp:
+            fp.write('#!/bin/sh\n' +
+                     'printf "15000, 16000\\n100, 16000\\n' +
+                     '8000, 16000\\n0, 16000\\n"\n')
+
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+        # Read the default requirements
+        with open(default_spec_path) as fp:
+            self.requirements = yaml.safe_load(fp)['requirements']
+
+        # Create a runner of local commands
+        self.runner = CommandsRunner()
+
+    def tearDown(self):
+        self.runner.close()
+        self.temp_dir.cleanup()
+
+    def test_allocate(self):
+        # Run the default requirement with the fake "nvidia-smi"
+        all_results, _ = self.runner.run_commands(
+            'local:' + self.requirements['cuda_memory_usage'],
+            envs={'PATH': '{}:{}'.format(
+                self.temp_dir.name, os.environ['PATH'])},
+            pipe_outputs=True)
+
+        # Check one usage per GPU
+        usages = parse_metric_values(all_results[0]['stdout'])
+
+        self.assertEqual(usages, [0.9375, 0.00625, 0.5, 0.0])
+
+        # Allocate the free GPUs
+        allocator = GPUAllocator(max_usage=0.1)
+        allocator.update_usages(0, usages)
+
+        self.assertEqual(allocator.allocate('a', 0, 2), [1, 3])
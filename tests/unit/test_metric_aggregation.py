@@ -0,0 +1,136 @@
+import unittest
+
+# Testing targets
+from training_noodles.metric_aggregation import (
+    aggregate_metric, compile_metric_aggregation, parse_metric_values)
+
+
+class TestParseMetricValues(unittest.TestCase):
+    def test_single(self):
+        self.results = '0.5\n'
+        self.expected = [0.5]
+
+    def test_vector(self):
+        self.results = '0.25\n\n 1 \n0.75'
+        self.expected = [0.25, 1.0, 0.75]
+
+    def test_not_number(self):
+        self.results = '0.5\nYes\n'
+        self.expected = None
+
+    def test_empty(self):
+        self.results = '\n'
+        self.expected = None
+
+    def tearDown(self):
+        self.assertEqual(parse_metric_values(self.results), self.expected)
+
+
+class TestMetricAggregation(unittest.TestCase):
+    def setUp(self):
+        # Set the values (e.g., memory usage of each GPU)
+        self.values = [0.9, 0.05, 0.5, 0.0]
+
+    def test_min(self):
+        self.expr = 'min'
+        self.expected = 0.0
+
+    def test_max(self):
+        self.expr = 'max'
+        self.expected = 0.9
+
+    def test_mean(self):
+        self.expr = 'mean'
+        self.expected = 0.3625
+
+    def test_sum(self):
+        self.expr = 'sum'
+        self.expected = 1.45
+
+    def test_count(self):
+        self.expr = 'count'
+        self.expected = 4
+
+    def test_count_below(self):
+        self.expr = 'count_below(0.1)'
+        self.expected = 2
+
+    def test_count_above(self):
+        self.expr = ' count_above(0.5) '
+        self.expected = 1
+
+    def test_percentile(self):
+        self.expr = 'percentile(50)'
+        self.expected = 0.275
+
+    def test_percentile_bounds(self):
+        self.expr = 'percentile(100)'
+        self.expected = 0.9
+
+    def tearDown(self):
+        # Compile and run the aggregation
+        aggregation = compile_metric_aggregation(self.expr)
+
+        # Check the result
+        self.assertAlmostEqual(aggregation(self.values), self.expected)
+
+
+class TestMetricAggregationExceptions(unittest.TestCase):
+    def test_unknown(self):
+        self.expr = 'median'
+
+    def test_missing_argument(self):
+        self.expr = 'count_below'
+
+    def test_extra_argument(self):
+        self.expr = 'min(1)'
+
+    def test_invalid_argument(self):
+        self.expr = 'percentile(high)'
+
+    def test_invalid_percentile(self):
+        self.expr = 'percentile(101)'
+
+    def test_invalid_syntax(self):
+        self.expr = 'percentile(90'
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            compile_metric_aggregation(self.expr)
+
+
+class TestAggregateMetric(unittest.TestCase):
+    def setUp(self):
+        self.aggregation = None
+
+    def test_vector_mean(self):
+        self.metric = [0.2, 0.4]
+        self.expected = 0.3
+
+    def test_scalar(self):
+        self.metric = 0.2
+        self.expected = 0.2
+
+    def test_scalar_aggregation(self):
+        self.metric = 0.05
+        self.aggregation = compile_metric_aggregation('count_below(0.1)')
+        self.expected = 1
+
+    def test_not_numeric(self):
+        self.metric = 'Yes'
+        self.aggregation = compile_metric_aggregation('min')
+        self.expected = 'Yes'
+
+    def test_empty(self):
+        self.metric = []
+        self.aggregation = compile_metric_aggregation('max')
+        self.expected = None
+
+    def tearDown(self):
+        result = aggregate_metric(self.metric, self.aggregation)
+
+        # Check the result
+        if isinstance(self.expected, float):
+            self.assertAlmostEqual(result, self.expected)
+        else:
+            self.assertEqual(result, self.expected)
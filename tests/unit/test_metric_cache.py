@@ -0,0 +1,56 @@
+import unittest
+
+# Testing targets
+from training_noodles.metric_cache import MetricCache
+
+
+class TestGet(unittest.TestCase):
+    def setUp(self):
+        # Create a new metric cache
+        self.cache = MetricCache()
+
+        # Save a metric checked at time 100
+        self.cache.set(0, 'cpu_usage', 'cmd', 0.5, now=100.0)
+
+        # Initialize the lookup
+        self.server_idx = 0
+        self.req_id = 'cpu_usage'
+        self.rendered = 'cmd'
+        self.max_age = 10
+
+    def test_fresh(self):
+        self.now = 105.0
+        self.expected = (True, 0.5)
+
+    def test_expired(self):
+        self.now = 111.0
+        self.expected = (False, None)
+
+    def test_other_server(self):
+        self.server_idx = 1
+        self.now = 105.0
+        self.expected = (False, None)
+
+    def test_other_rendered_commands(self):
+        self.rendered = 'other cmd'
+        self.now = 105.0
+        self.expected = (False, None)
+
+    def test_invalidated_server(self):
+        self.cache.invalidate_server(0)
+        self.now = 105.0
+        self.expected = (False, None)
+
+    def test_cleared(self):
+        self.cache.clear()
+        self.now = 105.0
+        self.expected = (False, None)
+
+    def tearDown(self):
+        # Get the metric
+        results = self.cache.get(
+            self.server_idx, self.req_id, self.rendered, self.max_age,
+            now=self.now)
+
+        # Check the expected results
+        self.assertEqual(results, self.expected)
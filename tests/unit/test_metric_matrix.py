@@ -0,0 +1,132 @@
+import unittest
+
+# Testing targets
+from training_noodles.metric_matrix import (
+    MetricMatrix, RequirementPredicate, np)
+
+
+class TestRequirementPredicate(unittest.TestCase):
+    def test_less_equal(self):
+        self.predicate = RequirementPredicate('<=', 0.5)
+        self.metric = 0.5
+        self.expected = True
+
+    def test_greater(self):
+        self.predicate = RequirementPredicate('>', 0.5)
+        self.metric = 0.5
+        self.expected = False
+
+    def test_equal_string(self):
+        self.predicate = RequirementPredicate('==', 'Yes')
+        self.metric = 'Yes'
+        self.expected = True
+
+    def test_not_equal_string(self):
+        self.predicate = RequirementPredicate('!=', 'Yes')
+        self.metric = 0.5
+        self.expected = True
+
+    def tearDown(self):
+        # Check the expected result
+        self.assertEqual(self.predicate(self.metric), self.expected)
+
+
+class TestRequirementPredicateExceptions(unittest.TestCase):
+    def test_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            RequirementPredicate('=~', 0.5)
+
+    def test_incomparable_values(self):
+        with self.assertRaises(TypeError):
+            RequirementPredicate('<', 0.5)('Yes')
+
+
+class TestFindSatisfiedServers(unittest.TestCase):
+    def setUp(self):
+        # Create the metrics of 4 servers
+        self.metrics = MetricMatrix({
+            'cpu_usage': [0.1, 0.9, 0.2, 0.3],
+            'memory_usage': [0.5, 0.1, 'unknown', 0.9],
+            'has_file': ['Yes', 'Yes', 'No', 'Yes'],
+        })
+
+        # Initialize the candidate servers
+        self.server_idxs = [0, 1, 2, 3]
+
+    def test_numeric(self):
+        self.predicates = [
+            ('cpu_usage', RequirementPredicate('<=', 0.5)),
+            ('memory_usage', RequirementPredicate('<', 0.8)),
+        ]
+        # Replace the metric which is not comparable to 0.8
+        self.metrics['memory_usage'][2] = 0.3
+        self.expected = [0, 2]
+
+    def test_non_numeric(self):
+        self.predicates = [
+            ('has_file', RequirementPredicate('==', 'Yes')),
+        ]
+        self.expected = [0, 1, 3]
+
+    def test_mixed(self):
+        self.predicates = [
+            ('has_file', RequirementPredicate('==', 'Yes')),
+            ('memory_usage', RequirementPredicate('!=', 0.1)),
+        ]
+        self.expected = [0, 3]
+
+    def test_non_numeric_metric_equals(self):
+        self.predicates = [
+            ('memory_usage', RequirementPredicate('==', 'unknown')),
+        ]
+        self.expected = [2]
+
+    def test_candidates(self):
+        self.server_idxs = [3, 1]
+        self.predicates = [
+            ('cpu_usage', RequirementPredicate('>=', 0.3)),
+        ]
+        self.expected = [1, 3]
+
+    def test_replaced_metrics(self):
+        self.predicates = [
+            ('cpu_usage', RequirementPredicate('<', 0.5)),
+        ]
+        # Build the column before replacing the metrics
+        if np is not None:
+            self.metrics.get_column('cpu_usage')
+        self.metrics['cpu_usage'] = [0.9, 0.1, 0.9, 0.9]
+        self.expected = [1]
+
+    def tearDown(self):
+        # Find the satisfied servers one by one
+        results = self.metrics.find_satisfied_servers(
+            self.server_idxs, self.predicates, vectorize=False)
+
+        # Check the expected results
+        self.assertEqual(results, self.expected)
+
+        # Check whether the boolean masks give the same results
+        if np is not None:
+            results = self.metrics.find_satisfied_servers(
+                self.server_idxs, self.predicates, vectorize=True)
+
+            self.assertEqual(results, self.expected)
+
+
+class TestFindSatisfiedServersExceptions(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricMatrix({'memory_usage': [0.5, 'unknown']})
+        self.predicates = [('memory_usage', RequirementPredicate('<', 0.8))]
+
+    def test_one_by_one(self):
+        self.vectorize = False
+
+    @unittest.skipIf(np is None, 'NumPy is not installed')
+    def test_masks(self):
+        self.vectorize = True
+
+    def tearDown(self):
+        with self.assertRaises(TypeError):
+            self.metrics.find_satisfied_servers(
+                [0, 1], self.predicates, vectorize=self.vectorize)
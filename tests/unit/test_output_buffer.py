@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+
+# Testing targets
+from training_noodles.output_buffer import (
+    FileFollower, HeadTailBuffer, LineStreamer, OutputHandle)
+
+
+class TestHeadTailBuffer(unittest.TestCase):
+    def test_unlimited(self):
+        buffer = HeadTailBuffer()
+
+        for chunk in [b'abc', b'def', b'ghi']:
+            buffer.write(chunk)
+
+        self.assertEqual(buffer.getvalue(), b'abcdefghi')
+        self.assertEqual(buffer.num_omitted, 0)
+
+    def test_within_limits(self):
+        buffer = HeadTailBuffer(head_size=4, tail_size=4)
+
+        buffer.write(b'abcdefgh')
+
+        self.assertEqual(buffer.getvalue(), b'abcdefgh')
+
+    def test_truncated(self):
+        buffer = HeadTailBuffer(head_size=3, tail_size=4)
+
+        # Write many small chunks
+        for i in range(100):
+            buffer.write(str(i % 10).encode('utf-8'))
+
+        # Check the head, the marker and the tail
+        self.assertEqual(buffer.num_omitted, 93)
+        self.assertEqual(
+            buffer.getvalue(), b'012\n... (93 bytes omitted) ...\n6789')
+
+        # Check the memory is bounded
+        self.assertLessEqual(len(buffer.tail), 8)
+
+    def test_head_only(self):
+        buffer = HeadTailBuffer(head_size=2, tail_size=0)
+
+        buffer.write(b'abcdef')
+
+        self.assertEqual(
+            buffer.getvalue(), b'ab\n... (4 bytes omitted) ...\n')
+
+
+class TestFileFollower(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Set the path of the file
+        self.path = os.path.join(self.temp_dir.name, 'output')
+
+    def test_follow(self):
+        follower = FileFollower(self.path, offset=2)
+        follower.chunk_size = 2
+
+        # The file doesn't exist yet
+        self.assertEqual(list(follower.read_chunks()), [])
+
+        # Write the file
+        with open(self.path, 'wb') as fp:
+            fp.write(b'xxabc')
+
+        self.assertEqual(list(follower.read_chunks()), [b'ab', b'c'])
+
+        # Append to the file
+        with open(self.path, 'ab') as fp:
+            fp.write(b'de')
+
+        self.assertEqual(list(follower.read_chunks()), [b'de'])
+
+        follower.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+
+class TestLineStreamer(unittest.TestCase):
+    def test_lines(self):
+        lines = []
+        streamer = LineStreamer(lines.append)
+
+        # Split a line and a multi-byte character across the chunks
+        encoded = 'one\ntwé\nthree'.encode('utf-8')
+
+        for chunk in [encoded[:5], encoded[5:7], encoded[7:]]:
+            streamer.write(chunk)
+
+        self.assertEqual(lines, ['one', 'twé'])
+
+        # Flush the incomplete line
+        streamer.flush()
+
+        self.assertEqual(lines, ['one', 'twé', 'three'])
+
+    def test_long_line(self):
+        lines = []
+        streamer = LineStreamer(lines.append)
+        streamer.max_line_length = 4
+
+        streamer.write(b'abcdef')
+        streamer.write(b'g\n')
+
+        self.assertEqual(lines, ['abcdef', 'g'])
+
+
+class TestOutputHandle(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Write the old contents and the output to the file
+        self.path = os.path.join(self.temp_dir.name, 'output')
+
+        with open(self.path, 'wb') as fp:
+            fp.write(b'old' + b'0123456789')
+
+    def test_read(self):
+        handle = OutputHandle(self.path, 3, 10)
+
+        self.assertEqual(len(handle), 10)
+        self.assertEqual(handle.read(), b'0123456789')
+        self.assertEqual(handle.read(8, 5), b'89')
+        self.assertEqual(handle.head(2), '01')
+        self.assertEqual(handle.tail(3), '789')
+        self.assertEqual(str(handle), '0123456789')
+
+    def test_appended_later(self):
+        handle = OutputHandle(self.path, 3, 10)
+
+        # The bytes appended after the handle is created are not included
+        with open(self.path, 'ab') as fp:
+            fp.write(b'new')
+
+        self.assertEqual(handle.tail(3), '789')
+
+    def test_limits(self):
+        handle = OutputHandle(self.path, 3, 10, head_size=2, tail_size=3)
+
+        self.assertEqual(str(handle), '01\n... (5 bytes omitted) ...\n789')
+        self.assertEqual('{}'.format(handle), str(handle))
+
+    def test_span(self):
+        handles = [OutputHandle(self.path, 3, 4),
+                   OutputHandle(self.path, 7, 6)]
+
+        self.assertEqual(str(OutputHandle.span(handles)), '0123456789')
+
+    def test_missing_file(self):
+        path = os.path.join(self.temp_dir.name, 'missing')
+        handle = OutputHandle(path, 0, 5)
+
+        self.assertEqual(str(handle), '')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
@@ -0,0 +1,101 @@
+import unittest
+
+# Testing targets
+from training_noodles.placement import (
+    PlacementContext, choose_server, register_policy)
+
+
+class TestChooseServer(unittest.TestCase):
+    def setUp(self):
+        # Set the metrics of 4 servers
+        self.metrics = {
+            'cpu_usage': [0.5, 0.2, 0.9, 0.2],
+            'memory_usage': [0.5, 0.4, 0.3, 0.2],
+            'has_gpu': ['Yes', 'No', 'Yes', None],
+        }
+
+        # Initialize the placement options
+        self.server_idxs = [3, 2, 1, 0]
+        self.metric_ids = ['cpu_usage', 'memory_usage', 'has_gpu']
+        self.weights = {}
+        self.deployment_counts = {}
+
+    def test_first(self):
+        self.policy = 'first'
+        self.expected = 0
+
+    def test_least_loaded(self):
+        self.policy = 'least_loaded'
+        self.expected = 3
+
+    def test_least_loaded_tie(self):
+        self.policy = 'least_loaded'
+        self.metric_ids = ['cpu_usage']
+        self.expected = 1
+
+    def test_best_fit(self):
+        self.policy = 'best_fit'
+        self.expected = 2
+
+    def test_bin_pack(self):
+        self.policy = 'bin_pack'
+        self.server_idxs = [0, 1, 3]
+        self.expected = 0
+
+    def test_spread(self):
+        self.policy = 'spread'
+        self.deployment_counts = {0: 1, 1: 2, 3: 1}
+        self.expected = 2
+
+    def test_spread_load(self):
+        self.policy = 'spread'
+        self.deployment_counts = {1: 1, 2: 1}
+        self.expected = 3
+
+    def test_weighted(self):
+        self.policy = 'weighted'
+        self.weights = {'cpu_usage': -1.0, 'memory_usage': -2.0}
+        self.expected = 3
+
+    def test_weighted_missing_metric(self):
+        self.policy = 'weighted'
+        self.weights = {'unknown': 1.0, 'memory_usage': 1.0}
+        self.expected = 0
+
+    def test_no_servers(self):
+        self.policy = 'least_loaded'
+        self.server_idxs = set()
+        self.expected = None
+
+    def tearDown(self):
+        # Build the placement context
+        context = PlacementContext(
+            self.metrics, metric_ids=self.metric_ids, weights=self.weights,
+            deployment_counts=self.deployment_counts)
+
+        # Choose the server
+        server_idx = choose_server(self.policy, self.server_idxs, context)
+
+        # Check the expected server index
+        self.assertEqual(server_idx, self.expected)
+
+
+class TestRegisterPolicy(unittest.TestCase):
+    def test_custom_policy(self):
+        # Register a policy which prefers the server with the largest index
+        register_policy('last', lambda i, context: -i)
+
+        # Choose the server
+        server_idx = choose_server('last', [0, 2, 1], PlacementContext({}))
+
+        # Check the expected server index
+        self.assertEqual(server_idx, 2)
+
+
+class TestChooseServerExceptions(unittest.TestCase):
+    def test_unknown_policy(self):
+        self.policy = 'unknown'
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            choose_server(self.policy, [0], PlacementContext({}))
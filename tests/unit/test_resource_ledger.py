@@ -0,0 +1,91 @@
+import unittest
+
+# Testing targets
+from training_noodles.resource_ledger import ResourceLedger, check_resources
+
+
+class TestCheckResources(unittest.TestCase):
+    def test_valid(self):
+        check_resources({'slots': 2, 'memory_gb': 15.5, 'gpus': 0})
+
+    def test_not_dict(self):
+        with self.assertRaises(ValueError):
+            check_resources([1, 2])
+
+    def test_negative(self):
+        with self.assertRaises(ValueError):
+            check_resources({'gpus': -1})
+
+    def test_not_number(self):
+        with self.assertRaises(ValueError):
+            check_resources({'gpus': 'two'})
+
+    def test_boolean(self):
+        with self.assertRaises(ValueError):
+            check_resources({'gpus': True})
+
+
+class TestResourceLedger(unittest.TestCase):
+    def setUp(self):
+        # Server 1 has no capacities, server 2 has 2 GPUs and unlimited slots,
+        # server 3 has 2 slots
+        self.ledger = ResourceLedger([None, {'gpus': 2}, {'slots': 2}])
+
+    def test_one_slot_by_default(self):
+        self.ledger.reserve(0, 0)
+
+        self.assertFalse(self.ledger.can_reserve(0))
+        self.assertEqual(self.ledger.get_remaining(0), {'slots': 0})
+
+    def test_pack_gpus(self):
+        self.ledger.reserve(0, 1, {'gpus': 1})
+        self.ledger.reserve(1, 1, {'gpus': 1})
+
+        self.assertFalse(self.ledger.can_reserve(1, {'gpus': 1}))
+        self.assertTrue(self.ledger.can_reserve(1))
+
+    def test_undeclared_resources(self):
+        self.assertTrue(self.ledger.can_reserve(2, {'gpus': 100}))
+
+    def test_explicit_slots(self):
+        self.assertFalse(self.ledger.can_reserve(2, {'slots': 3}))
+
+        self.ledger.reserve(0, 2, {'slots': 2})
+
+        self.assertFalse(self.ledger.can_reserve(2))
+
+    def test_find_unavailable_servers(self):
+        self.ledger.reserve(0, 0)
+        self.ledger.reserve(1, 1, {'gpus': 2})
+
+        self.assertEqual(
+            self.ledger.find_unavailable_servers({'gpus': 1}), {0, 1})
+        self.assertEqual(self.ledger.find_unavailable_servers(), {0})
+
+    def test_is_full(self):
+        ledger = ResourceLedger([None, {'slots': 1}])
+
+        ledger.reserve(0, 0)
+        self.assertFalse(ledger.is_full())
+
+        ledger.reserve(1, 1)
+        self.assertTrue(ledger.is_full())
+
+    def test_release(self):
+        self.ledger.reserve(0, 1, {'gpus': 2})
+        self.ledger.release(0)
+
+        self.assertEqual(self.ledger.get_remaining(1), {'gpus': 2})
+
+        # Release again without errors
+        self.ledger.release(0)
+
+    def test_reserve_twice(self):
+        self.ledger.reserve(0, 1)
+
+        with self.assertRaises(ValueError):
+            self.ledger.reserve(0, 2)
+
+    def test_reserve_without_room(self):
+        with self.assertRaises(ValueError):
+            self.ledger.reserve(0, 1, {'gpus': 3})
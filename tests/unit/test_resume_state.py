@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+
+# Testing targets
+from training_noodles.resume_state import ResumeState, read_resume_state
+
+
+def _deployment(exp_name, status, server='s1'):
+    return {'event': 'deployment', 'stage': 'experiments',
+            'experiment': exp_name, 'server': server, 'status': status}
+
+
+class TestApplyEvent(unittest.TestCase):
+    def setUp(self):
+        self.state = ResumeState()
+
+    def test_deployments(self):
+        events = [
+            {'event': 'run_started', 'resumed': False},
+            {'event': 'round_started', 'stage': 'experiments', 'round': 2},
+            {'event': 'deployment_started', 'stage': 'experiments',
+             'experiment': 'a'},
+            _deployment('a', 'success'),
+            _deployment('b', 'continue', server='s2'),
+            _deployment('c', 'abort'),
+            {'event': 'deployment_started', 'stage': 'experiments',
+             'experiment': 'd'},
+        ]
+
+        for event in events:
+            self.state.apply_event(event)
+
+        self.assertEqual(self.state.deployed['experiments'], {'a', 'b'})
+        self.assertEqual(self.state.interrupted['experiments'], {'d'})
+        self.assertEqual(self.state.last_rounds, {'experiments': 2})
+        self.assertEqual(dict(self.state.server_deployment_counts),
+                         {'s1': 1, 's2': 1})
+
+    def test_finished_stages(self):
+        self.state.apply_event(
+            {'event': 'stage_finished', 'stage': 'before_all_experiments'})
+
+        self.assertEqual(self.state.finished_stages,
+                         {'before_all_experiments'})
+
+    def test_resumed_run(self):
+        self.state.apply_event(_deployment('a', 'success'))
+        self.state.apply_event({'event': 'run_started', 'resumed': True})
+
+        self.assertEqual(self.state.deployed['experiments'], {'a'})
+
+    def test_new_run(self):
+        self.state.apply_event(_deployment('a', 'success'))
+        self.state.apply_event({'event': 'run_started', 'resumed': False})
+
+        self.assertEqual(self.state.deployed.get('experiments', set()), set())
+
+
+class TestReadResumeState(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Set the path of the journal
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+
+    def test_missing_journal(self):
+        state = read_resume_state(self.journal_path)
+
+        self.assertEqual(len(state.deployed), 0)
+        self.assertEqual(len(state.finished_stages), 0)
+
+    def test_half_written_line(self):
+        # Write the journal whose last line is half-written
+        with open(self.journal_path, 'w') as fp:
+            fp.write(json.dumps({'event': 'run_started'}) + '\n')
+            fp.write(json.dumps(_deployment('a', 'success')) + '\n')
+            fp.write('\n')
+            fp.write(json.dumps(_deployment('b', 'success'))[:20])
+
+        state = read_resume_state(self.journal_path)
+
+        self.assertEqual(state.deployed['experiments'], {'a'})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
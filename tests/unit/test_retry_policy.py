@@ -0,0 +1,111 @@
+import unittest
+
+# Testing targets
+from training_noodles.retry_policy import RetryBudget, RetryPolicy, RetryStats
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_defaults(self):
+        policy = RetryPolicy()
+
+        self.assertEqual(policy.compute_delay(1), 0)
+        self.assertIsNone(policy.max_attempts)
+
+    def test_constant(self):
+        policy = RetryPolicy({'delay': 2})
+
+        self.assertEqual([policy.compute_delay(i) for i in range(1, 4)],
+                         [2, 2, 2])
+
+    def test_linear(self):
+        policy = RetryPolicy({'backoff': 'linear', 'delay': 2})
+
+        self.assertEqual([policy.compute_delay(i) for i in range(1, 4)],
+                         [2, 4, 6])
+
+    def test_exponential(self):
+        policy = RetryPolicy(
+            {'backoff': 'exponential', 'delay': 1, 'multiplier': 3,
+             'max_delay': 5})
+
+        self.assertEqual([policy.compute_delay(i) for i in range(1, 4)],
+                         [1, 3, 5])
+
+    def test_full_jitter(self):
+        policy = RetryPolicy({'delay': 4, 'jitter': 'full'})
+
+        self.assertEqual(policy.compute_delay(1, rand=lambda: 0.25), 1)
+
+    def test_equal_jitter(self):
+        policy = RetryPolicy({'delay': 4, 'jitter': 'equal'})
+
+        self.assertEqual(policy.compute_delay(1, rand=lambda: 0.5), 3)
+
+    def test_invalid_specs(self):
+        specs = [
+            [],
+            {'backoff': 'fibonacci'},
+            {'jitter': 'some'},
+            {'delay': -1},
+            {'max_attempts': 'three'},
+            {'delays': 1},
+        ]
+
+        for spec in specs:
+            with self.subTest(spec=spec):
+                with self.assertRaises(ValueError):
+                    RetryPolicy(spec)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def setUp(self):
+        # Set the fake clock
+        self.now = 100.0
+
+        # Create the counters
+        self.stats = RetryStats()
+
+    def create_budget(self, spec):
+        return RetryBudget(RetryPolicy(spec), stats=self.stats,
+                           clock=lambda: self.now)
+
+    def test_max_attempts(self):
+        budget = self.create_budget({'delay': 1, 'max_attempts': 3})
+
+        self.assertEqual(budget.next_delay(), 1)
+        self.assertEqual(budget.next_delay(), 1)
+        self.assertIsNone(budget.next_delay())
+
+        self.assertEqual(self.stats.to_dict(), {
+            'Retries': 2,
+            'Exhausted retries': 1,
+            'Retry wait time (s)': 2,
+        })
+
+    def test_max_elapsed(self):
+        budget = self.create_budget({'delay': 3, 'max_elapsed': 5})
+
+        # The delay is capped by the remaining time
+        self.now = 103.0
+        self.assertEqual(budget.next_delay(), 2)
+
+        self.now = 105.0
+        self.assertIsNone(budget.next_delay())
+
+    def test_replace_policy(self):
+        budget = self.create_budget({'max_attempts': 2})
+
+        # The policy of the error handler allows more attempts
+        budget.policy = RetryPolicy({'max_attempts': 3})
+
+        self.assertEqual(budget.next_delay(), 0)
+        self.assertEqual(budget.next_delay(), 0)
+        self.assertIsNone(budget.next_delay())
+
+    def test_unlimited(self):
+        budget = self.create_budget({})
+
+        for _ in range(100):
+            self.assertEqual(budget.next_delay(), 0)
+
+        self.assertEqual(self.stats.num_retries, 100)
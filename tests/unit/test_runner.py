@@ -0,0 +1,525 @@
+import collections
+import json
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import oyaml as yaml
+
+from tests.unit.test_commands_runner import write_fake_ssh
+
+# Testing targets
+from training_noodles.runner import Runner
+
+
+class TestDeployEmptyExperiments(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec and the journal
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write_spec(self, spec):
+        with open(self.spec_path, 'w') as fp:
+            json.dump(spec, fp)
+
+    def _read_events(self, event):
+        with open(self.journal_path) as fp:
+            return [e for e in map(json.loads, fp) if e['event'] == event]
+
+    def test_depends_on_deployed_experiment(self):
+        # Deploy the experiments one at a time and concurrently
+        for num_workers in [1, 2]:
+            with self.subTest(deployment_workers=num_workers):
+                self._check_deployed_once(num_workers)
+
+    def _check_deployed_once(self, num_workers):
+        # The empty experiment "E" becomes ready again when "A" is deployed
+        self._write_spec({
+            'experiments': [
+                {'name': 'A', 'commands': {'run': 'local:echo A'}},
+                {'name': 'E', 'depends_on': {'run': ['A']}},
+            ],
+            'servers': [{'name': 'L1'}, {'name': 'L2'}],
+            'write_journal_to': {'run': self.journal_path},
+            'round_interval': 0,
+            'deployment_workers': num_workers,
+        })
+
+        # Start a new journal
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        # Run the experiments
+        Runner('run', self.spec_path).run()
+
+        # Check each experiment is deployed once
+        events = self._read_events('deployment')
+
+        self.assertEqual(sorted(e['experiment'] for e in events), ['A', 'E'])
+
+
+class TestStaticRequirementsWithDeploymentsInFlight(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the journal and the marker file
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+        self.marker_path = os.path.join(self.temp_dir.name, 'marker')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_retried_deployment(self):
+        # "A" fails once and is retried after "B" has checked the static
+        # requirement while "A" is in flight
+        fail_once = 'local:sleep 0.5; [ -f {0} ] || {{ touch {0}; exit 3; }}'
+
+        with open(self.spec_path, 'w') as fp:
+            json.dump({
+                'experiments': [
+                    {'name': 'A',
+                     'commands': {'run': fail_once.format(self.marker_path)}},
+                    {'name': 'B', 'commands': {'run': 'local:echo B'},
+                     'requirements': {'run': [{'static:one': '<=1'}]}},
+                    {'name': 'C', 'commands': {'run': 'local:echo C'},
+                     'requirements': {'run': [{'static:one': '<=1'}]}},
+                ],
+                'requirements': {'one': 'local:echo 1'},
+                'servers': [{'name': 'L1'}, {'name': 'L2'}],
+                'error_handlers': [
+                    {'name': 'fail', 'return_code': 3, 'stderr_pattern': '.*',
+                     'action': 'retry'},
+                ],
+                'write_journal_to': {'run': self.journal_path},
+                'round_interval': 0,
+                'deployment_workers': 2,
+            }, fp)
+
+        # Run the experiments
+        Runner('run', self.spec_path).run()
+
+        # Check all experiments are deployed
+        with open(self.journal_path) as fp:
+            deployed = [e['experiment'] for e in map(json.loads, fp)
+                        if e['event'] == 'deployment' and
+                        e['status'] == 'success']
+
+        self.assertEqual(sorted(deployed), ['A', 'B', 'C'])
+
+
+class TestDeployExperimentsConcurrently(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the journal and the status
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+        self.status_path = os.path.join(self.temp_dir.name, 'status.yml')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_interrupted(self):
+        # Interrupt the run by Ctrl+C and the termination signal
+        for exc_type in [KeyboardInterrupt, SystemExit]:
+            with self.subTest(exc_type=exc_type.__name__):
+                self._check_interrupted(exc_type)
+
+    def _check_interrupted(self, exc_type):
+        # "A" is still in flight when the run is interrupted before "B"
+        self._write_spec({
+            'experiments': [
+                {'name': 'A', 'commands': {'run': 'local:sleep 0.3'}},
+                {'name': 'B', 'commands': {'run': 'local:echo B'}},
+            ],
+            'servers': [{'name': 'L1'}, {'name': 'L2'}],
+            'write_journal_to': {'run': self.journal_path},
+            'write_status_to': {'run': self.status_path},
+            'write_status_interval': 1000,
+            'round_interval': 0,
+            'deployment_workers': 2,
+        })
+
+        # Start a new journal
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        # Interrupt the run before the deployment of "B"
+        with mock.patch.object(Runner, '_wait_for_next_deployment',
+                               side_effect=exc_type):
+            with self.assertRaises(exc_type):
+                Runner('run', self.spec_path).run()
+
+        # Check the outcome of "A" in flight is recorded before exiting
+        events = self._read_events()
+
+        self.assertEqual(
+            [(e['experiment'], e['status']) for e in events
+             if e['event'] == 'deployment'],
+            [('A', 'success')])
+        self.assertEqual(events[-1]['event'], 'run_interrupted')
+
+        # Check the status written before exiting
+        with open(self.status_path) as fp:
+            status = yaml.safe_load(fp)
+
+        self.assertEqual(status['Deployed experiments'], ['A'])
+        self.assertEqual(status['Undeployed experiments'], ['B'])
+
+    def test_no_available_servers(self):
+        # The only server is full after "A" is deployed
+        self._write_spec({
+            'experiments': [
+                {'name': 'A', 'commands': {'run': 'local:echo A'}},
+                {'name': 'B', 'commands': {'run': 'local:echo B'}},
+                {'name': 'C', 'commands': {'run': 'local:echo C'}},
+            ],
+            'servers': [{'name': 'L1'}],
+            'write_journal_to': {'run': self.journal_path},
+            'round_interval': 0,
+            'deployment_workers': 2,
+        })
+
+        # Run the experiments
+        with self.assertLogs('run', level='INFO') as logs:
+            Runner('run', self.spec_path, verbose=True).run()
+
+        # Check one experiment is deployed in each round
+        self.assertEqual(
+            [(e['experiment'], e['round']) for e in self._read_events()
+             if e['event'] == 'deployment'],
+            [('A', 1), ('B', 2), ('C', 3)])
+
+        # Check the rest of the round is skipped once the server is full
+        messages = [record.getMessage() for record in logs.records]
+
+        self.assertEqual(
+            messages.count('No available servers, skip the deployment'), 2)
+        self.assertEqual(
+            messages.count('Try to deploy experiment "C"'), 2)
+
+    def _write_spec(self, spec):
+        with open(self.spec_path, 'w') as fp:
+            json.dump(spec, fp)
+
+    def _read_events(self):
+        with open(self.journal_path) as fp:
+            return list(map(json.loads, fp))
+
+
+class TestWriteDeploymentStatus(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the status and the marker file
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.status_path = os.path.join(self.temp_dir.name, 'status.yml')
+        self.copy_path = os.path.join(self.temp_dir.name, 'copy.yml')
+        self.marker_path = os.path.join(self.temp_dir.name, 'marker')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_flush_before_next_round(self):
+        # The requirement of "B" copies the status file and is only satisfied
+        # in the second round
+        check = ('local:cp {0} {1}; [ -f {2} ] && echo 1 ||' +
+                 ' {{ touch {2}; echo 0; }}').format(
+            self.status_path, self.copy_path, self.marker_path)
+
+        with open(self.spec_path, 'w') as fp:
+            json.dump({
+                'experiments': [
+                    {'name': 'A', 'commands': {'run': 'local:echo A'}},
+                    {'name': 'B', 'commands': {'run': 'local:echo B'},
+                     'requirements': {'run': [{'ready': '==1'}]}},
+                ],
+                'requirements': {'ready': check},
+                'servers': [{'name': 'L1'}, {'name': 'L2'}],
+                'write_status_to': {'run': self.status_path},
+                'write_status_interval': 1000,
+                'round_interval': 0,
+            }, fp)
+
+        # Run the experiments
+        Runner('run', self.spec_path).run()
+
+        # Check the status seen in the second round has been updated by the
+        # deployment in the first round within the write interval
+        with open(self.copy_path) as fp:
+            status = yaml.safe_load(fp)
+
+        self.assertEqual(status['Deployed experiments'], ['A'])
+
+
+class TestAllocateGPUs(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the fake "nvidia-smi" and the
+        # outputs
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.output_path = os.path.join(self.temp_dir.name, 'envs.log')
+
+        # Write the fake "nvidia-smi" which prints the memory of 2 GPUs
+        path = os.path.join(self.temp_dir.name, 'nvidia-smi')
+
+        with open(path, 'w') as fp:
+            fp.write('#!/bin/sh\nprintf "15000, 16000\\n0, 16000\\n"\n')
+
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_export_gpu_ids(self):
+        # The experiment prints the environment variables of the GPUs
+        print_envs = ('local:echo $NOODLES_GPU_IDS $CUDA_VISIBLE_DEVICES' +
+                      ' $CUDA_DEVICE_ORDER > {}').format(self.output_path)
+
+        with open(self.spec_path, 'w') as fp:
+            json.dump({
+                'experiments': [
+                    {'name': 'A', 'gpus': 1, 'commands': {'run': print_envs}},
+                ],
+                'servers': [{'name': 'L1'}],
+                'gpu_allocation': {'requirement': 'cuda_memory_usage'},
+            }, fp)
+
+        # Run the experiment with the fake "nvidia-smi"
+        path = '{}:{}'.format(self.temp_dir.name, os.environ['PATH'])
+
+        with mock.patch.dict(os.environ, {'PATH': path}):
+            Runner('run', self.spec_path).run()
+
+        # Check the free GPU is exported in the order of "nvidia-smi"
+        with open(self.output_path) as fp:
+            self.assertEqual(fp.read(), '1 1 PCI_BUS_ID\n')
+
+
+class TestSettleServers(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the journal and the marker files
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+        self.running_path = os.path.join(self.temp_dir.name, 'running')
+        self.busy_path = os.path.join(self.temp_dir.name, 'busy')
+        self.stacked_path = os.path.join(self.temp_dir.name, 'stacked')
+
+    def tearDown(self):
+        # Wait for the background jobs to finish
+        deadline = time.time() + 5
+
+        while os.path.exists(self.running_path) and time.time() < deadline:
+            time.sleep(0.1)
+
+        self.temp_dir.cleanup()
+
+    def test_event_scheduler(self):
+        # The job only makes the server look busy after it has started for a
+        # while, and records whether it's stacked on a running job
+        job = ('local:[ -f {0} ] && echo 1 >> {2}; touch {0};' +
+               ' (sleep 0.5; touch {1}; sleep 1; rm -f {0} {1})' +
+               ' > /dev/null 2>&1 &').format(
+            self.running_path, self.busy_path, self.stacked_path)
+
+        with open(self.spec_path, 'w') as fp:
+            json.dump({
+                'experiments': [
+                    {'name': 'E1', 'commands': {'run': job},
+                     'requirements': {'run': [{'idle': '==0'}]}},
+                    {'name': 'E2', 'commands': {'run': job},
+                     'requirements': {'run': [{'idle': '==0'}]}},
+                ],
+                'requirements': {
+                    'idle': 'local:[ -f {} ] && echo 1 || echo 0'.format(
+                        self.busy_path),
+                },
+                'servers': [{'name': 'L1'}],
+                'write_journal_to': {'run': self.journal_path},
+                'scheduler': 'event',
+                'round_interval': 1,
+            }, fp)
+
+        # Run the experiments
+        Runner('run', self.spec_path).run()
+
+        # Check all experiments are deployed
+        with open(self.journal_path) as fp:
+            deployed = [e['experiment'] for e in map(json.loads, fp)
+                        if e['event'] == 'deployment' and
+                        e['status'] == 'success']
+
+        self.assertEqual(deployed, ['E1', 'E2'])
+
+        # Check the jobs are not stacked before the server looks busy
+        self.assertFalse(os.path.exists(self.stacked_path))
+
+
+class TestBatchRequirements(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the stand-in SSH command and the
+        # marker files
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+        self.calls_path = os.path.join(self.temp_dir.name, 'calls.log')
+        self.marker_path = os.path.join(self.temp_dir.name, 'marker')
+
+        self.ssh_path, self.ssh_log_path, self.drop_path = write_fake_ssh(
+            self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_retry_failed_requirements(self):
+        # "flaky" fails once in the first batch
+        self._run(error_handlers=[
+            {'name': 'flaky', 'return_code': 3, 'stderr_pattern': '.*',
+             'action': 'retry'},
+        ])
+
+        # Check only the failed requirement is checked again in the next batch
+        self.assertEqual(self._read_lines(self.calls_path),
+                         ['one', 'flaky', 'flaky'])
+        self.assertEqual(len(self._read_lines(self.ssh_log_path)), 2)
+
+    def test_dropped_connection(self):
+        # Drop the connection of the first batch, and make "flaky" succeed
+        open(self.drop_path, 'w').close()
+        open(self.marker_path, 'w').close()
+
+        self._run(error_handlers=[
+            {'name': 'dropped', 'return_code': 255,
+             'stderr_pattern': 'Connection closed.*\\n', 'action': 'retry'},
+        ])
+
+        # Check the batch status is applied to all requirements, so both are
+        # checked again in the next batch
+        self.assertEqual(self._read_lines(self.calls_path), ['one', 'flaky'])
+        self.assertEqual(len(self._read_lines(self.ssh_log_path)), 2)
+
+    def _run(self, error_handlers):
+        # Each requirement records its call
+        one = 'echo one >> {}; echo 1'.format(self.calls_path)
+        flaky = ('echo flaky >> {0}; [ -f {1} ] && echo 1 ||' +
+                 ' {{ touch {1}; exit 3; }}').format(
+            self.calls_path, self.marker_path)
+
+        with open(self.spec_path, 'w') as fp:
+            json.dump({
+                'experiments': [
+                    {'name': 'A', 'commands': {'run': 'local:echo A'},
+                     'requirements': {'run': [{'one': '==1',
+                                               'flaky': '==1'}]}},
+                ],
+                'requirements': {'one': one, 'flaky': flaky},
+                'servers': [{'name': 'R1', 'hostname': 'host'}],
+                'ssh': {'command': self.ssh_path, 'multiplexing': False},
+                'error_handlers': error_handlers,
+                'write_journal_to': {'run': self.journal_path},
+                'round_interval': 0,
+            }, fp)
+
+        # Run the experiment
+        Runner('run', self.spec_path).run()
+
+        # Check the experiment is deployed in the first round
+        with open(self.journal_path) as fp:
+            deployed = [(e['experiment'], e['round'])
+                        for e in map(json.loads, fp)
+                        if e['event'] == 'deployment' and
+                        e['status'] == 'success']
+
+        self.assertEqual(deployed, [('A', 1)])
+
+    def _read_lines(self, path):
+        with open(path) as fp:
+            return fp.read().splitlines()
+
+
+class TestProbeWorkers(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the spec, the stand-in SSH command and the
+        # marker files
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.spec_path = os.path.join(self.temp_dir.name, 'spec.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+        self.calls_path = os.path.join(self.temp_dir.name, 'calls.log')
+        self.marker_path = os.path.join(self.temp_dir.name, 'marker')
+
+        self.ssh_path, _, _ = write_fake_ssh(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_concurrent_probes(self):
+        # The probes finish in the reverse order of the servers, the probe on
+        # "h1" fails once and is retried, and the probe on "h2" always fails
+        load = ('echo $FAKE_SSH_DESTINATION >> {0};' +
+                ' case $FAKE_SSH_DESTINATION in' +
+                ' *@h1) sleep 0.4; [ -f {1} ] || {{ touch {1}; exit 4; }};' +
+                ' echo 5;;' +
+                ' *@h2) sleep 0.3; exit 3;;' +
+                ' *@h3) sleep 0.2; echo 1;;' +
+                ' *) sleep 0.1; echo 1;;' +
+                ' esac').format(self.calls_path, self.marker_path)
+
+        with open(self.spec_path, 'w') as fp:
+            json.dump({
+                'experiments': [
+                    {'name': 'A', 'commands': {'run': 'local:echo A'},
+                     'requirements': {'run': [{'load': '==1'}]}},
+                    {'name': 'B', 'commands': {'run': 'local:echo B'},
+                     'requirements': {'run': [{'load': '==1'}]}},
+                ],
+                'requirements': {'load': load},
+                'servers': [
+                    {'name': 'R{}'.format(i), 'hostname': 'h{}'.format(i),
+                     'username': 'user'}
+                    for i in range(1, 5)],
+                'ssh': {'command': self.ssh_path, 'multiplexing': False},
+                'error_handlers': [
+                    {'name': 'down', 'return_code': 3, 'stderr_pattern': '.*',
+                     'action': 'continue'},
+                    {'name': 'flaky', 'return_code': 4,
+                     'stderr_pattern': '.*', 'action': 'retry'},
+                ],
+                'write_journal_to': {'run': self.journal_path},
+                'round_interval': 0,
+                'probe_workers': 4,
+            }, fp)
+
+        # Run the experiments
+        Runner('run', self.spec_path).run()
+
+        # Check the metrics are matched to the servers in order, so the
+        # experiments are deployed to the first satisfied servers
+        with open(self.journal_path) as fp:
+            deployed = [(e['experiment'], e['server'], e['round'])
+                        for e in map(json.loads, fp)
+                        if e['event'] == 'deployment' and
+                        e['status'] == 'success']
+
+        self.assertEqual(deployed, [('A', 'R3', 1), ('B', 'R4', 1)])
+
+        # Check only the probe on "h1" is retried, the failed server "h2" is
+        # checked again for "B", and the deployed server "h3" is skipped
+        with open(self.calls_path) as fp:
+            calls = collections.Counter(
+                line.split('@')[1] for line in fp.read().splitlines())
+
+        self.assertEqual(calls, {'h1': 3, 'h2': 2, 'h3': 1, 'h4': 2})
@@ -0,0 +1,109 @@
+import unittest
+
+# Testing targets
+from training_noodles.scheduler import Scheduler
+
+
+class TestComputeWaitTime(unittest.TestCase):
+    def setUp(self):
+        # Set the current time
+        self.now = 1000.0
+
+        # Set the round interval
+        self.round_interval = 10
+
+        # Initialize the events and recheck times
+        self.events = []
+        self.recheck_times = []
+
+    def test_rounds(self):
+        self.mode = 'rounds'
+        self.events = ['deployment_finished']
+        self.expected = 10
+
+    def test_event_without_events(self):
+        self.mode = 'event'
+        self.expected = 10
+
+    def test_event_with_events(self):
+        self.mode = 'event'
+        self.events = ['deployment_finished', 'dependency_deployed']
+        self.expected = 0
+
+    def test_event_with_recheck_time(self):
+        self.mode = 'event'
+        self.recheck_times = [1005.0, 1003.0]
+        self.expected = 3.0
+
+    def test_event_with_passed_recheck_time(self):
+        self.mode = 'event'
+        self.recheck_times = [990.0, 1004.0]
+        self.expected = 4.0
+
+    def test_event_with_late_recheck_time(self):
+        self.mode = 'event'
+        self.recheck_times = [1100.0]
+        self.expected = 10
+
+    def tearDown(self):
+        # Create a scheduler
+        scheduler = Scheduler(self.mode)
+
+        # Notify the events
+        for event in self.events:
+            scheduler.notify(event)
+
+        # Add the recheck times
+        for t in self.recheck_times:
+            scheduler.add_recheck_time(t)
+
+        # Compute the wait time
+        wait_time = scheduler.compute_wait_time(
+            self.round_interval, now=self.now)
+
+        # Check the expected wait time
+        self.assertAlmostEqual(wait_time, self.expected)
+
+
+class TestWait(unittest.TestCase):
+    def test_events(self):
+        self.mode = 'event'
+        self.events = ['deployment_finished', 'dependency_deployed']
+        self.expected = self.events
+
+    def test_no_events(self):
+        self.mode = 'event'
+        self.events = []
+        self.expected = []
+
+    def test_rounds_mode(self):
+        self.mode = 'rounds'
+        self.events = ['deployment_finished']
+        self.expected = []
+
+    def tearDown(self):
+        # Create a scheduler
+        scheduler = Scheduler(self.mode)
+
+        # Notify the events
+        for event in self.events:
+            scheduler.notify(event)
+
+        # Wait for the next round
+        wait_time, events = scheduler.wait(0)
+
+        # Check the expected wait time and events
+        self.assertEqual(wait_time, 0)
+        self.assertEqual(events, self.expected)
+
+        # Check whether the events are reset
+        self.assertEqual(scheduler.pop_events(), [])
+
+
+class TestSchedulerExceptions(unittest.TestCase):
+    def test_unknown_mode(self):
+        self.mode = 'unknown'
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            Scheduler(self.mode)
@@ -0,0 +1,76 @@
+import os
+import signal
+import unittest
+
+# Testing targets
+from training_noodles.cli import CLI
+from training_noodles.shell_session import ShellSession
+
+
+class TestShellSession(unittest.TestCase):
+    def setUp(self):
+        # Create a session of a local shell
+        self.session = ShellSession('bash -s', CLI())
+
+    def test_reuse(self):
+        # Run the commands twice
+        results1 = self.session.run('echo out; echo err >&2; echo $$')
+        pid = self.session.p_obj.pid
+        results2 = self.session.run('printf no-newline; exit 3')
+
+        # Check the results
+        self.assertEqual(results1['stdout'].split(b'\n')[0], b'out')
+        self.assertEqual(results1['stderr'], b'err\n')
+        self.assertEqual(results1['return_code'], 0)
+        self.assertEqual(results2['stdout'], b'no-newline')
+        self.assertEqual(results2['return_code'], 3)
+
+        # Check the shell is reused
+        self.assertEqual(self.session.p_obj.pid, pid)
+
+    def test_isolation(self):
+        # Change the directory and read STDIN
+        self.session.run('cd /; cat')
+
+        # Run the commands with a syntax error
+        results = self.session.run('echo "unclosed')
+        self.assertEqual(results['return_code'], 2)
+
+        # Check the shell is not affected
+        results = self.session.run('pwd')
+        self.assertEqual(results['stdout'], os.getcwd().encode() + b'\n')
+
+    def test_restart(self):
+        # Stop the shell between the requests
+        self.session.run('true')
+        os.kill(self.session.p_obj.pid, signal.SIGKILL)
+        self.session.p_obj.wait()
+
+        # Check the shell is started again
+        results = self.session.run('echo again')
+        self.assertEqual(results['stdout'], b'again\n')
+
+    def test_exited(self):
+        # Kill the shell during the request
+        results = self.session.run('kill -9 $$')
+
+        # Check the results
+        self.assertRegex(results['outer_stderr'], b'exited unexpectedly')
+        self.assertNotEqual(results['return_code'], 0)
+        self.assertIsNone(results['killed'])
+
+        # Check the shell is started again
+        self.assertEqual(self.session.run('echo ok')['stdout'], b'ok\n')
+
+    def test_timeout(self):
+        # Run the commands which take too long
+        results = self.session.run('echo begin; sleep 30', timeout=0.3)
+
+        # Check the results
+        self.assertEqual(results['killed'], 'timeout')
+
+        # Check the shell is started again
+        self.assertEqual(self.session.run('echo ok')['stdout'], b'ok\n')
+
+    def tearDown(self):
+        self.session.close()
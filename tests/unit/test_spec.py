@@ -4,8 +4,10 @@ import unittest
 
 # Testing targets
 from training_noodles.spec import (
-    _fill_missing_with_defaults, _fill_missing_in_stage_specs,
-    _fill_missing_in_server_specs)
+    compile_user_spec, _check_gpu_allocation, _check_output_buffer,
+    _check_resources, _check_ssh, _check_temp_files, _check_timeouts,
+    _fill_missing_with_defaults,
+    _fill_missing_in_stage_specs, _fill_missing_in_server_specs)
 
 
 class TestFillMissingInStageSpecs(unittest.TestCase):
@@ -323,3 +325,242 @@ class TestFillMissingWithDefaultsOrder(unittest.TestCase):
 
         # Check the order of expected envs
         self.assertEqual(envs, self.expected_envs)
+
+
+class TestCompileUserSpec(unittest.TestCase):
+    def setUp(self):
+        # Set the user spec
+        self.user_spec = {
+            'experiment_default': {
+                'requirements': {'run': [{'cpu_usage': '<=0.5'}]},
+            },
+            'experiments': [
+                {'requirements': {'run': [{'has_file': ' ==Yes '}]}},
+                {'requirements': {'run': [{'cpu_usage': '<=0.5'}]}},
+            ],
+            'error_handlers': [
+                {'name': 'a', 'return_code': 255, 'action': 'retry'},
+            ],
+        }
+
+    def test_requirement_predicates(self):
+        # Compile the spec
+        compiled_spec = compile_user_spec(self.user_spec)
+
+        # Get the predicates
+        predicates = compiled_spec.requirement_predicates
+
+        # Check the compiled expressions
+        self.assertEqual(sorted(predicates.keys()), [' ==Yes ', '<=0.5'])
+        self.assertEqual(
+            (predicates['<=0.5'].operator, predicates['<=0.5'].value),
+            ('<=', 0.5))
+        self.assertEqual(
+            (predicates[' ==Yes '].operator, predicates[' ==Yes '].value),
+            ('==', 'Yes'))
+
+    def test_error_handlers(self):
+        # Compile the spec
+        compiled_spec = compile_user_spec(self.user_spec)
+
+        # Check the compiled error handlers
+        self.assertEqual(
+            [(h.name, h.action) for h in compiled_spec.error_handlers],
+            [('a', 'retry')])
+
+    def test_invalid_expression(self):
+        # Set an invalid expression
+        self.user_spec['experiments'][1]['requirements']['run'].append(
+            {'memory_usage': '=0.5'})
+
+        # Check the location in the error
+        with self.assertRaisesRegex(
+                ValueError,
+                r'experiments\[1\]\.requirements\.run\[1\]\.memory_usage'):
+            compile_user_spec(self.user_spec)
+
+    def test_invalid_aggregation(self):
+        # Set an unknown aggregation
+        self.user_spec['experiments'][1]['requirements']['run'].append(
+            {'cuda_memory_usage@median': '<=0.5'})
+
+        # Check the location in the error
+        with self.assertRaisesRegex(
+                ValueError,
+                r'experiments\[1\]\.requirements\.run\[1\]\.cuda_memory'):
+            compile_user_spec(self.user_spec)
+
+    def test_invalid_requirement_groups(self):
+        # Set the requirement group without a list
+        self.user_spec['experiments'][0]['requirements']['run'] = {
+            'cpu_usage': '<=0.5'}
+
+        # Check the location in the error
+        with self.assertRaisesRegex(
+                ValueError, r'experiments\[0\]\.requirements\.run'):
+            compile_user_spec(self.user_spec)
+
+    def test_invalid_error_handler(self):
+        # Set an invalid pattern
+        self.user_spec['error_handlers'].append({'stderr_pattern': '('})
+
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'error_handlers\[1\]'):
+            compile_user_spec(self.user_spec)
+
+    def test_invalid_server_retry_policy(self):
+        # Set an invalid retry policy of the server
+        self.user_spec['servers'] = [
+            {'retry_policy': {}}, {'retry_policy': {'max_attempts': -1}}]
+
+        # Check the location in the error
+        with self.assertRaisesRegex(
+                ValueError, r'servers\[1\]\.retry_policy'):
+            compile_user_spec(self.user_spec)
+
+
+class TestCheckResources(unittest.TestCase):
+    def setUp(self):
+        # Set the user spec
+        self.user_spec = {
+            'experiments': [
+                {'reservations': {}},
+                {'reservations': {'gpus': 1}},
+            ],
+            'servers': [
+                {'capacities': None},
+                {'capacities': {'slots': 2, 'gpus': 4}},
+            ],
+        }
+
+    def test_valid(self):
+        _check_resources(self.user_spec)
+
+    def test_invalid_reservations(self):
+        # Set an invalid amount
+        self.user_spec['experiments'][1]['reservations']['gpus'] = -1
+
+        # Check the location in the error
+        with self.assertRaisesRegex(
+                ValueError, r'experiments\[1\]\.reservations'):
+            _check_resources(self.user_spec)
+
+    def test_invalid_capacities(self):
+        # Set the capacities without a dict
+        self.user_spec['servers'][0]['capacities'] = 4
+
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'servers\[0\]\.capacities'):
+            _check_resources(self.user_spec)
+
+
+class TestCheckTimeouts(unittest.TestCase):
+    def setUp(self):
+        # Set the user spec
+        self.user_spec = {
+            'experiments': [
+                {'timeout': None},
+                {'timeout': 60},
+            ],
+            'timeouts': {'commands': 30, 'requirements': None},
+            'timeout_action': 'continue',
+        }
+
+    def test_valid(self):
+        _check_timeouts(self.user_spec)
+
+    def test_invalid_timeout(self):
+        # Set an invalid timeout
+        self.user_spec['timeouts']['requirements'] = 'long'
+
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'timeouts\.requirements'):
+            _check_timeouts(self.user_spec)
+
+    def test_invalid_experiment_timeout(self):
+        # Set an invalid timeout
+        self.user_spec['experiments'][0]['timeout'] = -1
+
+        # Check the location in the error
+        with self.assertRaisesRegex(
+                ValueError, r'experiments\[0\]\.timeout'):
+            _check_timeouts(self.user_spec)
+
+    def test_invalid_action(self):
+        # Set an invalid action
+        self.user_spec['timeout_action'] = 'ignore'
+
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'timeout_action'):
+            _check_timeouts(self.user_spec)
+
+
+class TestCheckOutputBuffer(unittest.TestCase):
+    def test_valid(self):
+        _check_output_buffer({'output_buffer': {
+            'head_size': 1024, 'tail_size': None, 'stream': True}})
+
+    def test_invalid_size(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'output_buffer\.tail_size'):
+            _check_output_buffer({'output_buffer': {'tail_size': 1.5}})
+
+    def test_invalid_stream(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'output_buffer\.stream'):
+            _check_output_buffer({'output_buffer': {'stream': 'yes'}})
+
+
+class TestCheckSSH(unittest.TestCase):
+    def test_valid(self):
+        _check_ssh({'ssh': {
+            'command': 'ssh', 'multiplexing': True, 'prewarm': False,
+            'connect_timeout': 10, 'check_interval': 0.5}})
+
+    def test_invalid_switch(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'ssh\.multiplexing'):
+            _check_ssh({'ssh': {'multiplexing': 'auto'}})
+
+    def test_invalid_time(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'ssh\.check_interval'):
+            _check_ssh({'ssh': {'check_interval': -1}})
+
+
+class TestCheckTempFiles(unittest.TestCase):
+    def test_valid(self):
+        _check_temp_files({'temp_files': {
+            'backend': 'shm', 'directory': None, 'pool_size': 16,
+            'max_file_size': 1048576}})
+
+    def test_unknown_backend(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'temp_files\.backend'):
+            _check_temp_files({'temp_files': {'backend': 'memfd'}})
+
+    def test_invalid_limit(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'temp_files\.pool_size'):
+            _check_temp_files({'temp_files': {'pool_size': 1.5}})
+
+
+class TestCheckGPUAllocation(unittest.TestCase):
+    def test_valid(self):
+        _check_gpu_allocation({
+            'gpu_allocation': {
+                'requirement': 'cuda_memory_usage', 'max_usage': 0.1,
+                'hold_time': None},
+            'experiments': [{'gpus': 2}, {'gpus': 0}],
+        })
+
+    def test_invalid_hold_time(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'gpu_allocation\.hold_time'):
+            _check_gpu_allocation({'gpu_allocation': {'hold_time': -1}})
+
+    def test_invalid_gpus(self):
+        # Check the location in the error
+        with self.assertRaisesRegex(ValueError, r'experiments\[1\]\.gpus'):
+            _check_gpu_allocation(
+                {'experiments': [{'gpus': 1}, {'gpus': 0.5}]})
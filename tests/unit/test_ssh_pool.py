@@ -0,0 +1,168 @@
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+
+# Testing targets
+from training_noodles.ssh_pool import SSHConnectionPool
+
+
+# Stand-in of the SSH command, the control socket is a regular file, the
+# master process runs until the file is removed, and the commands are run on
+# the local machine
+FAKE_SSH = textwrap.dedent('''\
+    #!{python}
+    import os
+    import subprocess
+    import sys
+    import time
+
+    # Log the arguments
+    with open(os.environ['FAKE_SSH_LOG'], 'a') as fp:
+        fp.write(' '.join(sys.argv[1:]) + '\\n')
+
+    # Parse the arguments
+    options = {{}}
+    rest = []
+    args = iter(sys.argv[1:])
+
+    for arg in args:
+        if arg == '-o':
+            key, value = next(args).split('=', 1)
+            options[key] = value
+        elif arg in ['-O', '-i', '-p']:
+            options[arg] = next(args)
+        elif arg.startswith('-'):
+            options[arg] = True
+        else:
+            rest.append(arg)
+
+    control_path = options.get('ControlPath')
+
+    if '-O' in options:
+        # Check or stop the master process
+        if options['-O'] == 'check':
+            sys.exit(0 if os.path.exists(control_path) else 255)
+        elif os.path.exists(control_path):
+            os.remove(control_path)
+    elif '-M' in options:
+        # Run the master process, the interactive login prompts forever
+        # unless it's in batch mode
+        if rest[0] == 'bad@host':
+            sys.stderr.write('Permission denied\\n')
+            sys.exit(255)
+        elif rest[0] == 'interactive@host':
+            if options.get('BatchMode') == 'yes':
+                sys.stderr.write('Permission denied (password)\\n')
+                sys.exit(255)
+
+            while True:
+                time.sleep(0.05)
+
+        open(control_path, 'w').close()
+
+        while os.path.exists(control_path):
+            time.sleep(0.05)
+    else:
+        # Run the command
+        sys.exit(subprocess.call(rest[1:], shell=True))
+''')
+
+
+class TestSSHConnectionPool(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Write the stand-in SSH command
+        self.ssh_path = os.path.join(self.temp_dir.name, 'ssh')
+
+        with open(self.ssh_path, 'w') as fp:
+            fp.write(FAKE_SSH.format(python=sys.executable))
+
+        os.chmod(self.ssh_path, stat.S_IRWXU)
+
+        # Set the log of the arguments
+        self.log_path = os.path.join(self.temp_dir.name, 'ssh.log')
+        os.environ['FAKE_SSH_LOG'] = self.log_path
+
+        # Create the pool
+        self.pool = SSHConnectionPool(
+            ssh_command=self.ssh_path, connect_timeout=5, check_interval=60)
+
+    def test_reuse(self):
+        # Get the options twice
+        options = self.pool.get_control_options('-p 22 user@host')
+        self.assertEqual(
+            self.pool.get_control_options('-p 22 user@host'), options)
+
+        # Check the options
+        self.assertRegex(options, r'^-o ControlMaster=no -o ControlPath=\S+$')
+
+        # Check the connection is opened once
+        self.assertEqual(self._count_calls('-M'), 1)
+
+    def test_reconnect(self):
+        # Open the connection
+        options = self.pool.get_control_options('user@host')
+
+        # Check the connection on each use
+        self.pool.check_interval = 0
+
+        # Break the connection
+        os.remove(options.split('ControlPath=')[1])
+
+        # Check the connection is opened again
+        self.assertEqual(
+            self.pool.get_control_options('user@host'), options)
+        self.assertEqual(self._count_calls('-M'), 2)
+
+    def test_failure(self):
+        # Check the fallback to plain SSH
+        self.assertEqual(self.pool.get_control_options('bad@host'), '')
+
+        # Check the connection isn't opened again too soon
+        self.assertEqual(self.pool.get_control_options('bad@host'), '')
+        self.assertEqual(self._count_calls('-M'), 1)
+
+    def test_interactive_login(self):
+        # Save the start time
+        start_time = time.time()
+
+        # Check the fallback to plain SSH without waiting for the prompt
+        self.assertEqual(
+            self.pool.get_control_options('interactive@host'), '')
+        self.assertLess(time.time() - start_time, 2)
+
+    def test_open_and_close(self):
+        # Open the connections in advance
+        self.pool.open_connections(['user@host1', 'user@host2'])
+
+        # Get the master processes
+        processes = [connection['process']
+                     for connection in self.pool.connections.values()]
+
+        self.assertEqual(len(processes), 2)
+
+        # Close the connections
+        control_dir = self.pool.control_dir
+        self.pool.close()
+
+        # Check the processes and the sockets are gone
+        for process in processes:
+            self.assertIsNotNone(process.poll())
+
+        self.assertFalse(os.path.exists(control_dir))
+        self.assertEqual(self._count_calls('-O exit'), 2)
+
+    def _count_calls(self, pattern):
+        with open(self.log_path) as fp:
+            return sum(1 for line in fp if pattern in line)
+
+    def tearDown(self):
+        self.pool.close()
+        self.temp_dir.cleanup()
+        del os.environ['FAKE_SSH_LOG']
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+
+import oyaml as yaml
+
+# Testing targets
+from training_noodles.status_writer import StatusWriter
+
+
+class TestShouldWriteSnapshot(unittest.TestCase):
+    def setUp(self):
+        # Create a writer with 10 seconds interval
+        self.writer = StatusWriter(snapshot_path='status.yml', interval=10)
+
+        # Pretend the snapshot was written at time 100
+        self.writer.last_write_time = 100.0
+
+    def test_first_write(self):
+        self.writer.last_write_time = None
+        self.now = 100.0
+        self.force = False
+        self.expected = True
+
+    def test_within_interval(self):
+        self.now = 105.0
+        self.force = False
+        self.expected = False
+
+    def test_after_interval(self):
+        self.now = 110.0
+        self.force = False
+        self.expected = True
+
+    def test_force_without_changes(self):
+        self.now = 105.0
+        self.force = True
+        self.expected = False
+
+    def test_force_with_changes(self):
+        self.writer.should_write_snapshot(now=101.0)
+        self.now = 105.0
+        self.force = True
+        self.expected = True
+
+    def test_no_snapshot_path(self):
+        self.writer.snapshot_path = None
+        self.now = 110.0
+        self.force = True
+        self.expected = False
+
+    def tearDown(self):
+        # Check whether to write
+        result = self.writer.should_write_snapshot(
+            force=self.force, now=self.now)
+
+        # Check the expected result
+        self.assertEqual(result, self.expected)
+
+
+class TestWriteFiles(unittest.TestCase):
+    def setUp(self):
+        # Create a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Set the paths
+        self.snapshot_path = os.path.join(self.temp_dir.name, 'status.yml')
+        self.journal_path = os.path.join(self.temp_dir.name, 'journal.jsonl')
+
+        # Create a writer
+        self.writer = StatusWriter(
+            snapshot_path=self.snapshot_path, journal_path=self.journal_path)
+
+    def test_snapshot(self):
+        # Write the snapshots
+        self.writer.write_snapshot({'Deployed experiments': ['a']})
+        self.writer.write_snapshot({'Deployed experiments': ['a', 'b']})
+
+        # Read the snapshot
+        with open(self.snapshot_path, 'r') as fp:
+            status = yaml.safe_load(fp)
+
+        # Check the latest status
+        self.assertEqual(status, {'Deployed experiments': ['a', 'b']})
+
+        # Check whether the temporary files are removed
+        self.assertEqual(os.listdir(self.temp_dir.name), ['status.yml'])
+
+    def test_journal(self):
+        # Append the events
+        self.writer.append_event('stage_started', stage='experiments')
+        self.writer.append_event('deployment', experiment='a')
+        self.writer.close()
+
+        # Read the events
+        with open(self.journal_path, 'r') as fp:
+            events = [json.loads(line) for line in fp]
+
+        # Check the events
+        self.assertEqual(
+            [(e['event'], e.get('stage'), e.get('experiment'))
+             for e in events],
+            [('stage_started', 'experiments', None),
+             ('deployment', None, 'a')])
+
+    def tearDown(self):
+        # Close the writer and remove the temporary directory
+        self.writer.close()
+        self.temp_dir.cleanup()
@@ -2,7 +2,9 @@ import unittest
 
 # Testing targets
 from training_noodles.string_utils import (
-    has_environment_variable, parse_requirement_expression, split_by_scheme)
+    expand_environment_variables, has_environment_variable,
+    parse_requirement_expression, split_by_scheme, split_marked_sections,
+    split_requirement_aggregation, split_requirement_id)
 
 
 class TestHasEnvironmentVariable(unittest.TestCase):
@@ -30,6 +32,75 @@ class TestHasEnvironmentVariable(unittest.TestCase):
         self.assertEqual(has_env, self.expected)
 
 
+class TestExpandEnvironmentVariables(unittest.TestCase):
+    def setUp(self):
+        self.envs = {'A': 'abc', 'EMPTY': '', 'SPACES': 'a  b', 'GLOB': '*',
+                     'OPTION': '-n', 'UNKNOWN': None}
+
+    def test_simple_env(self):
+        self.expr = 'pre-$A.log'
+        self.expected = 'pre-abc.log'
+
+    def test_curly_env(self):
+        self.expr = '${A}_1/${A}'
+        self.expected = 'abc_1/abc'
+
+    def test_unset_env(self):
+        self.expr = 'x${NOT_SET}y$NOT_SET'
+        self.expected = 'xy'
+
+    def test_default(self):
+        self.expr = '${NOT_SET:-def}-${EMPTY:-def}-${A:-def}-${EMPTY:-}'
+        self.expected = 'def-def-abc-'
+
+    def test_escaped_dollar(self):
+        self.expr = '\\$A-$A'
+        self.expected = '$A-abc'
+
+    def test_command_substitution(self):
+        self.expr = '$(echo $A)'
+        self.expected = None
+
+    def test_quotes(self):
+        self.expr = '"$A"'
+        self.expected = None
+
+    def test_other_operator(self):
+        self.expr = '${A:=def}'
+        self.expected = None
+
+    def test_special_parameter(self):
+        self.expr = '$$'
+        self.expected = None
+
+    def test_shell_variable(self):
+        self.expr = '$RANDOM'
+        self.expected = None
+
+    def test_word_splitting(self):
+        self.expr = '$SPACES'
+        self.expected = None
+
+    def test_glob(self):
+        self.expr = '$GLOB'
+        self.expected = None
+
+    def test_echo_option(self):
+        self.expr = '$OPTION'
+        self.expected = None
+
+    def test_unknown_value(self):
+        self.expr = '$UNKNOWN'
+        self.expected = None
+
+    def tearDown(self):
+        # Expand the expression
+        expanded = expand_environment_variables(self.expr, self.envs)
+
+        # Check the expected result
+        self.assertEqual(expanded, self.expected)
+
+
 class TestParseRequirementExpression(unittest.TestCase):
     def test_operator_equal(self):
         self.expr = '==abc'
@@ -114,3 +185,116 @@ class TestSplitByScheme(unittest.TestCase):
 
         # Check the expected results
         self.assertEqual(results, self.expected)
+
+
+class TestSplitRequirementId(unittest.TestCase):
+    def test_no_scheme(self):
+        self.req_id = 'cpu_usage'
+        self.expected = ('dynamic', None, 'cpu_usage')
+
+    def test_dynamic(self):
+        self.req_id = 'dynamic:cpu_usage'
+        self.expected = ('dynamic', None, 'cpu_usage')
+
+    def test_static(self):
+        self.req_id = 'static:free_quota'
+        self.expected = ('static', None, 'free_quota')
+
+    def test_ttl(self):
+        self.req_id = 'ttl:30:cpu_usage'
+        self.expected = ('ttl', 30.0, 'cpu_usage')
+
+    def test_ttl_float(self):
+        self.req_id = 'ttl:0.5:memory_usage'
+        self.expected = ('ttl', 0.5, 'memory_usage')
+
+    def tearDown(self):
+        # Split the requirement ID
+        results = split_requirement_id(self.req_id)
+
+        # Check the expected results
+        self.assertEqual(results, self.expected)
+
+
+class TestSplitRequirementIdExceptions(unittest.TestCase):
+    def test_unknown_scheme(self):
+        self.req_id = 'unknown:cpu_usage'
+
+    def test_ttl_without_requirement_id(self):
+        self.req_id = 'ttl:30'
+
+    def test_ttl_invalid_max_age(self):
+        self.req_id = 'ttl:soon:cpu_usage'
+
+    def test_ttl_negative_max_age(self):
+        self.req_id = 'ttl:-1:cpu_usage'
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            split_requirement_id(self.req_id)
+
+
+class TestSplitRequirementAggregation(unittest.TestCase):
+    def test_without_aggregation(self):
+        self.req_id = 'cuda_memory_usage'
+        self.expected = ('cuda_memory_usage', None)
+
+    def test_aggregation(self):
+        self.req_id = 'cuda_memory_usage@min'
+        self.expected = ('cuda_memory_usage', 'min')
+
+    def test_argument(self):
+        self.req_id = 'gpu.memory@count_below(0.1)'
+        self.expected = ('gpu.memory', 'count_below(0.1)')
+
+    def tearDown(self):
+        # Split the requirement ID
+        results = split_requirement_aggregation(self.req_id)
+
+        # Check the expected results
+        self.assertEqual(results, self.expected)
+
+
+class TestSplitRequirementAggregationExceptions(unittest.TestCase):
+    def test_empty_aggregation(self):
+        self.req_id = 'cuda_memory_usage@'
+
+    def test_empty_requirement_id(self):
+        self.req_id = '@min'
+
+    def tearDown(self):
+        with self.assertRaises(ValueError):
+            split_requirement_aggregation(self.req_id)
+
+
+class TestSplitMarkedSections(unittest.TestCase):
+    def setUp(self):
+        self.marker = '__m__'
+
+    def test_sections(self):
+        self.text = ('__m__:begin:0\n0.5\n\n__m__:end:0:0\n' +
+                     '__m__:begin:1\n\n__m__:end:1:2\n')
+        self.expected = {0: ('0.5\n', 0), 1: ('', 2)}
+
+    def test_without_return_code(self):
+        self.text = '__m__:begin:0\nerror\n\n__m__:end:0\n'
+        self.expected = {0: ('error\n', None)}
+
+    def test_without_trailing_newline(self):
+        self.text = '__m__:begin:0\n1\n__m__:end:0:0'
+        self.expected = {0: ('1', 0)}
+
+    def test_outside_texts(self):
+        self.text = 'warning\n__m__:begin:0\n1\n\n__m__:end:0:0\nbye\n'
+        self.expected = {0: ('1\n', 0)}
+
+    def test_incomplete_section(self):
+        self.text = '__m__:begin:0\n1\n\n__m__:end:0:0\n__m__:begin:1\n2\n'
+        self.expected = {0: ('1\n', 0)}
+
+    def tearDown(self):
+        # Split the text into sections
+        results = split_marked_sections(self.text, self.marker)
+
+        # Check the expected results
+        self.assertEqual(results, self.expected)
@@ -1,8 +1,11 @@
 import os
+import subprocess
+import tempfile
 import unittest
 
 # Testing targets
-from training_noodles.temp_files_helper import TempFilesHelper
+from training_noodles.temp_files_helper import (
+    DiskTempFilesBackend, SharedMemoryTempFilesBackend, TempFilesHelper)
 
 
 class TestCreateTempFiles(unittest.TestCase):
@@ -101,3 +104,101 @@ class TestDeleteTempFiles(unittest.TestCase):
 
             # Check whether the path no longer exists
             self.assertFalse(os.path.exists(path))
+
+
+class TestSharedMemoryTempFilesBackend(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the files
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Create a backend which keeps 1 file of at most 4 bytes per stream
+        self.backend = SharedMemoryTempFilesBackend(
+            directory=self.temp_dir.name, pool_size=1, max_file_size=4)
+
+        # Create a new temp files helper
+        self.temp_files_helper = TempFilesHelper(
+            dict(stdout=True, stderr=True), self.backend)
+
+    def tearDown(self):
+        self.temp_files_helper.close()
+        self.temp_dir.cleanup()
+
+    def test_reuse(self):
+        # Write to the temporary files and release them
+        temp_files = self.temp_files_helper.create_temp_files({})
+        paths = {k: v['path'] for k, v in temp_files.items()}
+
+        self._write(paths['stdout'], b'1234')
+        self.temp_files_helper.delete_temp_files(temp_files, reusable=True)
+
+        # Check the files are reused after being truncated
+        temp_files = self.temp_files_helper.create_temp_files({})
+
+        self.assertEqual({k: v['path'] for k, v in temp_files.items()}, paths)
+        self.assertEqual(os.path.getsize(paths['stdout']), 0)
+
+        # Check the files are deleted when closing
+        self.temp_files_helper.delete_temp_files(temp_files, reusable=True)
+        self.temp_files_helper.close()
+
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_eviction(self):
+        # Create three sets of temporary files
+        temp_files1 = self.temp_files_helper.create_temp_files({})
+        temp_files2 = self.temp_files_helper.create_temp_files({})
+        temp_files3 = self.temp_files_helper.create_temp_files({})
+
+        # Release the files which are too large, in use and beyond the pool
+        for temp_file in temp_files1.values():
+            self._write(temp_file['path'], b'12345')
+
+        self.temp_files_helper.delete_temp_files(temp_files1, reusable=True)
+        self.temp_files_helper.delete_temp_files(temp_files2)
+
+        self.temp_files_helper.delete_temp_files(temp_files3, reusable=True)
+
+        # Check only the last set is kept
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir.name)),
+            sorted(os.path.basename(v['path'])
+                   for v in temp_files3.values()))
+
+    def _write(self, path, data):
+        with open(path, 'wb') as fp:
+            fp.write(data)
+
+
+class TestRemoveLeftoverFiles(unittest.TestCase):
+    def setUp(self):
+        # Create a directory for the files
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        # Create a backend
+        self.backend = DiskTempFilesBackend(directory=self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_dead_process(self):
+        # Get the process ID of an exited process
+        p_obj = subprocess.Popen(['true'])
+        p_obj.wait()
+
+        # Create the files of the exited process, the current process and
+        # another program
+        names = [
+            'training_noodles.{}.abc_123.stdout'.format(p_obj.pid),
+            'training_noodles.{}.abc_123.stdout'.format(os.getpid()),
+            'other.{}.abc_123.stdout'.format(p_obj.pid),
+        ]
+
+        for name in names:
+            open(os.path.join(self.temp_dir.name, name), 'w').close()
+
+        # Remove the leftover files
+        self.backend.remove_leftover_files()
+
+        # Check only the file of the exited process is removed
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)),
+                         sorted(names[1:]))
@@ -12,6 +12,10 @@ def parse_args():
     parser.add_argument('spec', type=str,
                         help='Path to the spec file' +
                         ' (e.g., "spec.yml", "spec.yml:exp1,exp2")')
+    # Resume
+    parser.add_argument('-r', '--resume', action='store_true',
+                        help='Resume the deployment from the journal' +
+                        ' (See "write_journal_to" in the spec)')
     # Logging
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Print out verbose messages')
@@ -1,6 +1,10 @@
 import json
 import os
+import select
+import selectors
+import signal
 import subprocess
+import time
 
 from training_noodles.data_structure_utils import convert_values_to_strs
 from training_noodles.logger import Logger
@@ -10,8 +14,22 @@ class CLI:
     """ Command line interface helper.
 
     This class runs command on the local machine and reads the results.
+
+    Each command is run in a new session, so the command and all processes
+    spawned by it (e.g., SSH, the inner commands) are in one process group and
+    can be killed at once when the command times out or is cancelled.
     """
 
+    # Interval in seconds to check whether the command should be killed
+    poll_interval = 0.1
+
+    # Time in seconds to wait for the process group to terminate before killing
+    # it forcibly
+    kill_grace_period = 1.0
+
+    # Number of bytes to read from the pipes at once
+    read_size = 64 * 1024
+
     def __init__(self, shell_string='bash -c'):
         """ Initialize the instance.
 
@@ -23,6 +41,10 @@ class CLI:
         # Save the shell command to read from string
         self.shell_string = shell_string
 
+        # Initialize the environment variables of the local machine, which
+        # are copied once when the first command runs
+        self.base_envs = None
+
         # Create a logger
         self.logger = Logger('cli')
 
@@ -54,18 +76,14 @@ class CLI:
             'Extra environment variables: {}'.format(json.dumps(extra_envs)))
 
         try:
-            # Get default environment variables
-            env = os.environ.copy()
-
-            # Update with extra environment variables
-            if extra_envs:
-                env.update(extra_envs)
+            # Build the environment variables
+            env = self._build_envs(extra_envs)
 
             # Run the program
             p_obj = subprocess.Popen(command, stdin=stdin,
                                      stdout=subprocess.PIPE,
                                      stderr=subprocess.PIPE, shell=True,
-                                     env=env)
+                                     env=env, start_new_session=True)
 
             # Check whether to wait
             if wait:
@@ -79,37 +97,321 @@ class CLI:
                 'STDOUT=>\n{}'.format(self.decode_output(e.stdout)),
                 'STDERR=>\n{}'.format(self.decode_output(e.stderr)),
             ])
-        except:
+        except Exception:
             self.logger.raise_error('Unknown error occurred')
 
-    def wait_command(self, p_obj):
-        """ Wait for the command to finish.
+    def exec_command(self, args, stdin=None, stdout=subprocess.PIPE,
+                     stderr=subprocess.PIPE, extra_envs={}):
+        """ Execute the program directly without the shell.
+
+        Unlike "run_command", the program is not wrapped by the shell command,
+        so it only costs one process. The program is also run in a new
+        session, and it doesn't wait for the program to finish.
 
         Arguments:
-            p_obj (Popen): The object given by "run_command" function.
+            args (list): The program and its arguments (e.g., ["bash", "-s"]).
+            stdin (file object): Input stream. Set to "None" to use default
+                stdin.
+            stdout (file object): Output stream. Defaults to a pipe.
+            stderr (file object): Error stream. Defaults to a pipe.
+            extra_envs (dict): Extra environment variables.
+
+        Returns:
+            Popen: A "Popen" object.
         """
-        p_obj.wait()
+        # Convert environment variable values to strings
+        extra_envs = convert_values_to_strs(extra_envs)
 
-    def read_results(self, p_obj):
-        """ Read command results.
+        # Log the program
+        self.logger.debug('Execute program: {}'.format(args))
 
-        Read the raw stdout and stderr. Will raise error if "check_return_code"
-        is on and return code is non-zero.
+        # Log the extra environment variables
+        self.logger.debug(
+            'Extra environment variables: {}'.format(json.dumps(extra_envs)))
+
+        # Build the environment variables
+        env = self._build_envs(extra_envs)
+
+        # Execute the program
+        return subprocess.Popen(args, stdin=stdin, stdout=stdout,
+                                stderr=stderr, env=env, start_new_session=True)
+
+    def pump_results(self, p_obj, on_output, input=b'', timeout=None,
+                     cancel_event=None, on_poll=None):
+        """ Write the input to the command and forward its outputs as they
+        arrive.
+
+        The outputs are not accumulated, each chunk is passed to "on_output"
+        once it's read from the pipes. The pipes are drained until the command
+        exits, so the processes left in the background by the command don't
+        block the wait. The command is killed with its process group when the
+        timeout expires or the cancel event is set. The process group is also
+        killed when the wait is interrupted (e.g., by Ctrl+C).
 
         Arguments:
-            p_obj (Popen): The object given by "run_command" function.
+            p_obj (Popen): The object given by "run_command" function with
+                "wait" off or "exec_command", with STDIN set to
+                "subprocess.PIPE". The outputs redirected to files are not
+                read.
+            on_output (callable): Function to call with the stream name
+                ("stdout" or "stderr") and the chunk of bytes.
+            input (bytes): Bytes to write to STDIN, which is closed after the
+                bytes are written.
+            timeout (float): Timeout in seconds. Set to "None" to wait
+                forever.
+            cancel_event (threading.Event): The event to cancel the command.
+            on_poll (callable): Function to call after each poll while the
+                command is running.
 
         Returns:
-            (Raw stdout, Raw stderr, Return code (int))
+            (Return code (int), Killed reason) where the reason is "timeout",
+            "cancel" or None if the command finished.
         """
-        # Read stdout and stderr
-        stdout, stderr = p_obj.communicate()
+        # Compute the deadline
+        deadline = None if timeout is None else time.time() + timeout
 
-        # Read return code
-        return_code = p_obj.returncode
+        # Initialize the reason to kill the command
+        killed = None
 
-        # Return the raw results and return code
-        return stdout, stderr, return_code
+        # Register the pipes
+        selector = selectors.DefaultSelector()
+
+        for stream in ['stdout', 'stderr']:
+            # The output may be redirected to a file instead of a pipe
+            fp = getattr(p_obj, stream)
+
+            if fp is not None:
+                selector.register(fp, selectors.EVENT_READ, stream)
+
+        # Write the input without blocking, the command may not read it all
+        # before writing its outputs
+        input_view = memoryview(input)
+
+        if len(input_view) > 0:
+            os.set_blocking(p_obj.stdin.fileno(), False)
+            selector.register(p_obj.stdin, selectors.EVENT_WRITE, 'stdin')
+        else:
+            p_obj.stdin.close()
+
+        try:
+            # Pump until the command exits and its outputs are drained
+            killed = self._pump(
+                p_obj, selector, input_view, on_output, deadline,
+                cancel_event, on_poll)
+
+            # Kill the command when it times out or is cancelled
+            if killed is not None:
+                # Log the kill
+                self.logger.debug('Kill the command by {}: {}'.format(
+                    killed, p_obj.args))
+
+                # Kill the command and all processes spawned by it
+                self.kill_process_group(p_obj)
+
+                # Forward the partial outputs
+                self._pump(p_obj, selector, input_view[:0], on_output)
+        except BaseException:
+            # Don't leave the command running
+            self.kill_process_group(p_obj)
+            raise
+        finally:
+            selector.close()
+
+            # Close the pipes
+            for fp in [p_obj.stdin, p_obj.stdout, p_obj.stderr]:
+                if fp is not None:
+                    fp.close()
+
+        # Return the results
+        return p_obj.wait(), killed
+
+    def _pump(self, p_obj, selector, input_view, on_output, deadline=None,
+              cancel_event=None, on_poll=None):
+        # Initialize the time to stop draining the pipes after the command
+        # exits
+        drain_deadline = None
+
+        while len(selector.get_map()) > 0:
+            # Check whether the command should be killed
+            killed = self._get_kill_reason(deadline, cancel_event)
+
+            if killed is not None:
+                return killed
+
+            # Check whether the command has exited, the pipes may be held
+            # by the background processes, so they are only drained for a
+            # poll interval
+            exited = p_obj.poll() is not None
+
+            if exited and drain_deadline is None:
+                drain_deadline = time.time() + self.poll_interval
+
+            if exited and time.time() > drain_deadline:
+                break
+
+            # Wait for the pipes
+            wait_time = 0 if exited else self._get_wait_time(deadline)
+            events = selector.select(wait_time)
+
+            # Stop when there is nothing left to drain
+            if exited and len(events) == 0:
+                break
+
+            # Process the ready pipes
+            for key, _ in events:
+                if key.data == 'stdin':
+                    input_view = self._write_input(
+                        selector, key.fileobj, input_view)
+                else:
+                    self._read_output(
+                        selector, key.fileobj, key.data, on_output)
+
+            # Notify the poll
+            if on_poll is not None:
+                on_poll()
+
+        # Wait for the command to exit
+        while p_obj.poll() is None:
+            # Check whether the command should be killed
+            killed = self._get_kill_reason(deadline, cancel_event)
+
+            if killed is not None:
+                return killed
+
+            self._wait_for_exit(p_obj, self._get_wait_time(deadline))
+
+        return None
+
+    def _wait_for_exit(self, p_obj, wait_time):
+        try:
+            # Get the file descriptor of the process, which becomes readable
+            # once the process exits
+            pidfd = os.pidfd_open(p_obj.pid)
+        except (AttributeError, OSError):
+            # Poll the process when it's not supported
+            try:
+                p_obj.wait(timeout=wait_time)
+            except subprocess.TimeoutExpired:
+                pass
+
+            return
+
+        try:
+            # Wake up as soon as the process exits instead of polling it
+            select.select([pidfd], [], [], wait_time)
+        finally:
+            os.close(pidfd)
+
+    def _get_kill_reason(self, deadline, cancel_event):
+        # Check whether the command is cancelled
+        if cancel_event is not None and cancel_event.is_set():
+            return 'cancel'
+
+        # Check whether the command times out
+        if deadline is not None and deadline - time.time() <= 0:
+            return 'timeout'
+
+        return None
+
+    def _get_wait_time(self, deadline):
+        # Wait for the poll interval or until the deadline
+        if deadline is None:
+            return self.poll_interval
+        else:
+            return max(0, min(self.poll_interval, deadline - time.time()))
+
+    def _write_input(self, selector, fp, input_view):
+        try:
+            # Write as many bytes as the pipe accepts
+            num_written = os.write(fp.fileno(), input_view[:self.read_size])
+            input_view = input_view[num_written:]
+        except BlockingIOError:
+            return input_view
+        except BrokenPipeError:
+            # The command doesn't read the rest of the input
+            input_view = input_view[:0]
+
+        # Close STDIN after all bytes are written
+        if len(input_view) <= 0:
+            selector.unregister(fp)
+            fp.close()
+
+        return input_view
+
+    def _read_output(self, selector, fp, stream, on_output):
+        # Read the available bytes
+        chunk = os.read(fp.fileno(), self.read_size)
+
+        # Stop reading the pipe at the end of file
+        if len(chunk) <= 0:
+            selector.unregister(fp)
+        else:
+            on_output(stream, chunk)
+
+    def _build_envs(self, extra_envs):
+        # Copy the environment variables of the local machine once
+        if self.base_envs is None:
+            self.base_envs = os.environ.copy()
+
+        # Share the copy when there are no extra environment variables
+        if not extra_envs:
+            return self.base_envs
+
+        # Update with extra environment variables
+        envs = self.base_envs.copy()
+        envs.update(extra_envs)
+
+        return envs
+
+    def kill_process_group(self, p_obj):
+        """ Kill the process group of the command.
+
+        The process group is terminated first, and the remaining processes are
+        killed forcibly after the command exits or the grace period ends.
+
+        Arguments:
+            p_obj (Popen): The object given by "run_command" function.
+        """
+        try:
+            # Terminate the process group, the process ID of the command is
+            # also the process group ID
+            os.killpg(p_obj.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            # All processes have exited
+            return
+
+        try:
+            # Wait for the command to exit
+            p_obj.wait(timeout=self.kill_grace_period)
+        except subprocess.TimeoutExpired:
+            pass
+
+        try:
+            # Kill the remaining processes
+            os.killpg(p_obj.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def is_process_group_alive(self, p_obj):
+        """ Check whether any processes in the process group of the command
+        are running (e.g., the processes left in the background).
+
+        Arguments:
+            p_obj (Popen): The object given by "run_command" function.
+
+        Returns:
+            bool: True if any processes are running.
+        """
+        try:
+            # Send no signal to check whether the process group exists
+            os.killpg(p_obj.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # The processes exist but belong to another user
+            pass
+
+        return True
 
     @staticmethod
     def decode_output(output):
@@ -1,10 +1,20 @@
 import json
+import os
+import shlex
+import subprocess
+import threading
+import time
+import uuid
 
 from training_noodles.cli import CLI
 from training_noodles.data_structure_utils import wrap_with_list
 from training_noodles.file_helper import FileHelper
 from training_noodles.logger import Logger
-from training_noodles.string_utils import split_by_scheme
+from training_noodles.output_buffer import (
+    FileFollower, HeadTailBuffer, OutputHandle)
+from training_noodles.shell_session import ShellSession
+from training_noodles.string_utils import (
+    split_by_scheme, split_marked_sections)
 from training_noodles.temp_files_helper import TempFilesHelper
 
 
@@ -18,11 +28,18 @@ class CommandsRunner:
     unmixed commands by whether they will be run on local or remote endpoint
     2. A group of unmixed commands is mixed with environment variables and
     concatenated with newlines to become inner commands
-    3. Write the inner commands into a temporary STDIN file
-    4. Build the outer command by concatenating endpoint command and the
-    temporary STDIN file
-    5. Run the outer command
-    6. Read the STDOUT and STDERR files
+    3. Build the outer command by appending the shell command to read from
+    STDIN to the endpoint command, the outputs are redirected to temporary
+    files (or user files) unless they are read from the pipes
+    4. Run the outer command and write the inner commands into its STDIN
+    5. Read the STDOUT and STDERR files (or pipes) in chunks, only the
+    beginning and the end of each output are kept in memory
+
+    The outputs are read from the pipes for the commands which don't leave
+    processes in the background (e.g., requirement commands), which saves
+    creating, reading and deleting the temporary files. The processes left in
+    the background would be killed by "SIGPIPE" when they write to the closed
+    pipes, so the files are used for the experiment commands.
 
     Examples:
     1. ['local:cd ~', 'local:echo $TEST1', 'remote:ls'] are organized into 2
@@ -31,26 +48,28 @@ class CommandsRunner:
     2. If the given environment variable is {'TEST1': 'test1'}, the inner
     commands will be ['export TEST1="test1"\ncd ~',
     'export TEST1="test1'\necho $TEST1\nls'].
-    3. The inner commands are written into the temporary files
-    '/tmp/temp1.stdin' and '/tmp/temp2.stdin' (The real paths are determined by
-    Python tempfile module).
-    4. The outer commands will be ['bash -c \'bash -s\' < /tmp/temp1.stdin
-    > /tmp/temp1.stdout' 2> /tmp/temp1.stderr', 'ssh user1@server1 \'bash -s\'
-    < /tmp/temp2.stdin > /tmp/temp2.stdout 2> /tmp/temp2.stderr'].
-    5. Run the outer commands
-    6. Read the files [['/tmp/temp1.stdout', '/tmp/temp1.stderr'],
+    3. The outer commands will be ['bash -c \'bash -s\' > /tmp/temp1.stdout
+    2> /tmp/temp1.stderr', 'ssh user1@server1 \'bash -s\' > /tmp/temp2.stdout
+    2> /tmp/temp2.stderr'] (The real paths are determined by Python tempfile
+    module).
+    4. Run the outer commands and write the inner commands into their STDIN
+    5. Read the files [['/tmp/temp1.stdout', '/tmp/temp1.stderr'],
     ['/tmp/temp2.stdout', '/tmp/temp2.stderr']].
 
     Glossary:
     * Endpoint: Either a local machine or a remote machine.
     * Endpoint command: A command to be run on an endpoint.
     * Inner command: Exporting environment variables commands and unmixed
-    commands, which will be written into the file.
+    commands, which will be written into STDIN of the outer command.
     * Outer command: Command to be run by the subprocess module.
     * Unmixed command: Command specified by the user.
     """
 
-    def __init__(self, shell_string='bash -c', shell_stdin='bash -s'):
+    def __init__(self, shell_string='bash -c', shell_stdin='bash -s',
+                 command_timeout=None, output_head_size=None,
+                 output_tail_size=None, ssh_command='ssh', ssh_pool=None,
+                 shell_sessions=False, direct_local_exec=False,
+                 temp_files_backend=None):
         """ Initialize the instance.
 
         Arguments:
@@ -58,6 +77,24 @@ class CommandsRunner:
                 "bash -c").
             shell_stdin (str): Shell command to read from STDIN (e.g.,
                 "bash -s").
+            command_timeout (float): Timeout in seconds of each outer command.
+                Set to "None" to wait forever.
+            output_head_size (int): Number of bytes to keep from the beginning
+                of each inner output. Set to "None" to keep the whole output.
+            output_tail_size (int): Number of bytes to keep from the end of
+                each inner output. Set to "None" to keep the whole output after
+                the head.
+            ssh_command (str): SSH command to connect to the remote machines.
+            ssh_pool (SSHConnectionPool): Optional pool of persistent SSH
+                connections to reuse.
+            shell_sessions (bool): Whether to run the commands whose outputs
+                are read from the pipes in the long-lived shells (See
+                "ShellSession").
+            direct_local_exec (bool): Whether to execute "shell_stdin"
+                directly for the local commands instead of wrapping it by
+                "shell_string" and the shell of the subprocess module.
+            temp_files_backend (DiskTempFilesBackend): Optional backend of the
+                temporary files of the outputs. Defaults to the disk backend.
         """
 
         # Save the shell command to read from string
@@ -66,6 +103,31 @@ class CommandsRunner:
         # Save the shell command to read from STDIN
         self.shell_stdin = shell_stdin
 
+        # Save the timeout of each outer command
+        self.command_timeout = command_timeout
+
+        # Save the sizes of the kept outputs
+        self.output_head_size = output_head_size
+        self.output_tail_size = output_tail_size
+
+        # Save the SSH command and the pool of SSH connections
+        self.ssh_command = ssh_command
+        self.ssh_pool = ssh_pool
+
+        # Initialize the idle long-lived shells, the key is the outer command
+        # and the value is a list of shells, a shell is taken out of the list
+        # while it's running the commands, so the concurrent commands with the
+        # same outer command (e.g., on two local servers) run in different
+        # shells
+        self.shell_sessions = {} if shell_sessions else None
+        self.shell_sessions_lock = threading.Lock()
+
+        # Save whether to execute the local shell directly
+        self.direct_local_exec = direct_local_exec
+
+        # Create the event to cancel all running commands
+        self.cancel_event = threading.Event()
+
         # Create a CLI
         self.cli = CLI(shell_string=self.shell_string)
 
@@ -73,13 +135,14 @@ class CommandsRunner:
         self.file_helper = FileHelper()
 
         # Create a temporary files helper
-        closes = dict(stdin=False, stdout=True, stderr=True)
-        self.temp_helper = TempFilesHelper(closes)
+        closes = dict(stdout=True, stderr=True)
+        self.temp_helper = TempFilesHelper(closes, temp_files_backend)
 
         # Create a logger
         self.logger = Logger('command')
 
-    def run_commands(self, commands, server_spec=None, user_files={}, envs={}):
+    def run_commands(self, commands, server_spec=None, user_files={}, envs={},
+                     timeout=None, on_output=None, pipe_outputs=False):
         """ Run commands on either local or remote machine.
 
         The "commands" will be written into the temporary file. The final
@@ -93,14 +156,30 @@ class CommandsRunner:
                 omitted, the endpoint will be local.
             user_files (dict): Optional file paths for appending STDOUT and
                 STDERR for all command groups. It's a dict(stdout, stderr)
-                where each value is the corresponding path.
+                where each value is the corresponding path. The outputs in the
+                results are "OutputHandle" instead of strings for these files.
             envs (dict): Optional environment variables.
+            timeout (float): Optional timeout in seconds of all commands. The
+                remaining command groups are skipped when a command group is
+                killed.
+            on_output (callable): Optional function to call with the stream
+                name ("stdout" or "stderr") and the chunk of bytes as the inner
+                outputs arrive. The outputs written to the user files are not
+                forwarded.
+            pipe_outputs (bool): Whether to read the outputs of the inner
+                commands from the pipes instead of the temporary files. It
+                should only be on for the commands which don't leave
+                processes in the background, and it's ignored for the user
+                files.
 
         Returns:
             (all_results, debug_infos) where "all_results" is a list of
             "results" and "debug_infos" is a list of "debug_info". See
             function "_run_commands_on_endpoint".
         """
+        # Compute the deadline of all commands
+        deadline = None if timeout is None else time.time() + timeout
+
         # Wrap the commands in list for consistency
         commands = wrap_with_list(commands)
 
@@ -121,10 +200,18 @@ class CommandsRunner:
             inner_commands = self._build_inner_commands(
                 unmixed_commands, envs=envs)
 
+            # Get the remaining time before the deadline
+            if deadline is None:
+                remaining = None
+            else:
+                remaining = max(0, deadline - time.time())
+
             # Run commands on endpoint
             results, debug_info = self._run_commands_on_endpoint(
                 endpoint_command, inner_commands, user_files=user_files,
-                clear_user_files=clear_user_files, envs=envs)
+                clear_user_files=clear_user_files, envs=envs,
+                timeout=remaining, on_output=on_output,
+                pipe_outputs=pipe_outputs)
 
             # Disable clearing user files in the latter command groups
             clear_user_files = False
@@ -133,19 +220,221 @@ class CommandsRunner:
             all_results.append(results)
             debug_infos.append(debug_info)
 
+            # Skip the remaining command groups when the commands are killed
+            if results['killed'] is not None:
+                break
+
         # Return the results
         return all_results, debug_infos
 
-    def evaluate_expression_on_local(self, expr, envs={}):
+    def can_run_in_batch(self, commands):
+        """ Check whether the commands can be run by "run_commands_batch".
+
+        Arguments:
+            commands (str or list): A single command (str) or list of commands.
+
+        Returns:
+            bool: True if all commands are run on the remote endpoint.
+        """
+        # Check the scheme of each command
+        for command in wrap_with_list(commands):
+            # Try to split the command by scheme
+            success, scheme, _ = split_by_scheme(command, ['local', 'remote'])
+
+            # Only remote commands (default) can be run in batch
+            if not success or scheme == 'local':
+                return False
+
+        return True
+
+    def run_commands_batch(self, commands_batch, server_spec=None, envs={},
+                           timeout=None):
+        """ Run several lists of commands on the remote machine at once.
+
+        All lists of commands are merged into one inner command, so they only
+        cost one endpoint command (e.g., one SSH connection). Each list of
+        commands is run in its own subshell, and its STDOUT, STDERR and return
+        code are enclosed by marker lines to be split back.
+
+        Arguments:
+            commands_batch (list): List of commands (str or list), the commands
+                should be run on the remote endpoint (See "can_run_in_batch").
+            server_spec (dict): Optional server spec. If the server spec is
+                omitted, the endpoint will be local.
+            envs (dict): Optional environment variables.
+            timeout (float): Optional timeout in seconds of the whole batch.
+                The outputs of the lists of commands which have finished before
+                the timeout are still split into sections.
+
+        Returns:
+            (results, debug_info, sections) where "results" and "debug_info"
+            are for the whole batch (See "_run_commands_on_endpoint") and
+            "sections" is a list of (results, debug_info) for each list of
+            commands, the item is None if its outputs are not found (e.g., the
+            connection has failed).
+        """
+        # Generate a marker which is unlikely to appear in the outputs
+        marker = '__noodles_{}__'.format(uuid.uuid4().hex)
+
+        # Initialize the unmixed commands of the batch and each section
+        unmixed_commands = []
+        sections_commands = []
+
+        # Iterate each list of commands
+        for idx, commands in enumerate(commands_batch):
+            # Remove the schemes of the commands
+            commands = [split_by_scheme(command, ['remote'])[2]
+                        for command in wrap_with_list(commands)]
+
+            # Build the begin and end lines
+            begin = '{}:begin:{}'.format(marker, idx)
+            end = '{}:end:{}'.format(marker, idx)
+
+            # Run the commands in a subshell between the marker lines
+            unmixed_commands.append(
+                "printf '%s\\n' '{0}'; printf '%s\\n' '{0}' >&2".format(begin))
+            unmixed_commands.append('(')
+            unmixed_commands.extend(commands)
+            unmixed_commands.append(')')
+            unmixed_commands.append('__noodles_return_code=$?')
+            unmixed_commands.append(
+                ("printf '\\n%s\\n' \"{0}:$__noodles_return_code\";" +
+                 " printf '\\n%s\\n' '{0}' >&2").format(end))
+
+            # Save the commands of the section
+            sections_commands.append(commands)
+
         # Build endpoint command
-        endpoint_command = self._build_local_endpoint_command()
+        endpoint_command = self._build_endpoint_command(server_spec)
 
-        # Build inner command
-        inner_command = self._build_eval_command(expr)
+        # Build inner commands
+        inner_commands = self._build_inner_commands(
+            unmixed_commands, envs=envs)
 
         # Run commands on endpoint
-        return self._run_commands_on_endpoint(
-            endpoint_command, inner_command, envs=envs)
+        results, debug_info = self._run_commands_on_endpoint(
+            endpoint_command, inner_commands, envs=envs, timeout=timeout,
+            pipe_outputs=True)
+
+        # Split the outputs into sections
+        stdout_sections = split_marked_sections(results['stdout'], marker)
+        stderr_sections = split_marked_sections(results['stderr'], marker)
+
+        # Initialize the results of the sections
+        sections = []
+
+        # Iterate each section
+        for idx, commands in enumerate(sections_commands):
+            # Check whether the outputs of the section are complete
+            if idx not in stdout_sections or idx not in stderr_sections:
+                sections.append(None)
+                continue
+
+            # Get the outputs of the section
+            stdout, return_code = stdout_sections[idx]
+            stderr, _ = stderr_sections[idx]
+
+            # Build the results of the section
+            section_results = {
+                'outer_stdout': results['outer_stdout'],
+                'outer_stderr': results['outer_stderr'],
+                'stdout': stdout,
+                'stderr': stderr,
+                'return_code': return_code,
+                'killed': None,
+            }
+
+            # Build debugging info of the section
+            section_debug_info = {
+                'inner_commands': self._build_inner_commands(
+                    commands, envs=envs),
+                'outer_command': debug_info['outer_command'],
+                'envs': envs,
+                'timeout': debug_info['timeout'],
+            }
+
+            # Add the results and debug info to the sections
+            sections.append((section_results, section_debug_info))
+
+        # Return the results
+        return results, debug_info, sections
+
+    def evaluate_expressions_on_local(self, exprs, envs={}):
+        """ Evaluate several expressions on the local machine at once.
+
+        All expressions are evaluated in one shell, each in its own subshell,
+        so the errors can still be handled for each expression.
+
+        Arguments:
+            exprs (list): List of expressions (str).
+            envs (dict): Optional environment variables.
+
+        Returns:
+            (results, debug_info, sections) where "sections" is a list of
+            (results, debug_info) for each expression (See
+            "run_commands_batch").
+        """
+        # Build the commands to evaluate the expressions
+        commands_batch = [self._build_eval_command(expr) for expr in exprs]
+
+        # Run the commands on local in batch
+        return self.run_commands_batch(commands_batch, envs=envs)
+
+    def open_connections(self, server_specs):
+        """ Open the persistent SSH connections to the remote servers.
+
+        Nothing happens if there is no pool of SSH connections.
+
+        Arguments:
+            server_specs (list): List of server specs.
+        """
+        # Check whether there is a pool
+        if self.ssh_pool is None:
+            return
+
+        # Get the destinations of the remote servers
+        destinations = [self._build_ssh_destination(server_spec)
+                        for server_spec in server_specs
+                        if not self._is_local_server(server_spec)]
+
+        # Open the connections
+        self.ssh_pool.open_connections(destinations)
+
+    def remove_leftover_temp_files(self):
+        """ Remove the temporary files left by the dead Noodles processes.
+        """
+        self.temp_helper.remove_leftover_files()
+
+    def close(self):
+        """ Close the long-lived shells, the persistent SSH connections and
+        the pool of temporary files.
+        """
+        # Close the shells
+        if self.shell_sessions is not None:
+            with self.shell_sessions_lock:
+                sessions = [session
+                            for idle in self.shell_sessions.values()
+                            for session in idle]
+                self.shell_sessions.clear()
+
+            for session in sessions:
+                session.close()
+
+        # Close the SSH connections
+        if self.ssh_pool is not None:
+            self.ssh_pool.close()
+
+        # Delete the pooled temporary files
+        self.temp_helper.close()
+
+    def cancel(self):
+        """ Cancel all running commands.
+
+        The commands are killed with their process groups, and their results
+        are marked as killed by "cancel". The commands run after this call are
+        also cancelled immediately.
+        """
+        self.cancel_event.set()
 
     def get_error_messages(self, results, debug_info):
         # Initialize empty messages
@@ -156,8 +445,21 @@ class CommandsRunner:
         outer_error = (len(results['outer_stderr']) > 0)
         inner_error = (len(results['stderr']) > 0)
 
-        if return_code_error or outer_error or inner_error:
+        # Check whether the commands have been killed
+        killed = results.get('killed', None)
+        killed_error = (killed is not None)
+
+        if return_code_error or outer_error or inner_error or killed_error:
             messages.append('Error occurred when running the commands')
+
+            # Add the reason of the kill
+            if killed == 'timeout':
+                messages.append(
+                    'Commands were killed after the timeout of {:.3f}s'.format(
+                        debug_info['timeout']))
+            elif killed_error:
+                messages.append('Commands were killed by {}'.format(killed))
+
             messages.append('Outer command->\n{}'.format(
                 debug_info['outer_command']))
             messages.append('Inner commands->\n{}'.format(
@@ -176,41 +478,52 @@ class CommandsRunner:
 
     def _run_commands_on_endpoint(
             self, endpoint_command, inner_commands, user_files={},
-            clear_user_files=True, envs={}):
-        # Build the user file offsets
-        user_file_offsets = self._build_user_file_offsets(
-            user_files, clear_user_files, envs)
-
-        # Create temporary files for each command group
-        temp_files = self.temp_helper.create_temp_files(user_files)
-
-        # Write command to the stdin file
-        self._write_command_to_stdin(inner_commands, temp_files)
-
-        # Build outer command
-        outer_command = self._build_outer_command(
-            endpoint_command, temp_files, user_files, clear_user_files)
-
-        # Execute the outer command
-        p_obj = self.cli.run_command(outer_command, extra_envs=envs)
-
-        # Read return code from the outer command
-        outer_stdout, outer_stderr, return_code = self.cli.read_results(p_obj)
-
-        # Read stdout and stderr from the inner commands
-        inner_stdout, inner_stderr = self._read_stdout_and_stderr(
-            temp_files, user_files, user_file_offsets)
-
-        # Delete temporary files
-        self.temp_helper.delete_temp_files(temp_files)
+            clear_user_files=True, envs={}, timeout=None, on_output=None,
+            pipe_outputs=False):
+        # The outputs can only be appended to the user files by the
+        # redirections, so they are captured by the files in that case
+        pipe_outputs = pipe_outputs and len(user_files) == 0
+
+        # Use the shorter one of the given timeout and the command timeout
+        timeout = min(
+            [t for t in [timeout, self.command_timeout] if t is not None],
+            default=None)
+
+        # Create the buffers of the outer and inner outputs
+        buffers = {stream: HeadTailBuffer(
+            self.output_head_size, self.output_tail_size)
+            for stream in ['outer_stdout', 'outer_stderr', 'stdout', 'stderr']}
+
+        # Log the inner commands
+        self.logger.debug(
+            'Write command to STDIN->\n{}'.format(inner_commands))
+
+        # Run the commands
+        if pipe_outputs and self.shell_sessions is not None:
+            outer_command, return_code, killed = self._run_in_shell_session(
+                endpoint_command, inner_commands, buffers, timeout=timeout,
+                on_output=on_output)
+        elif pipe_outputs:
+            outer_command, return_code, killed = self._run_with_output_pipes(
+                endpoint_command, inner_commands, buffers, envs=envs,
+                timeout=timeout, on_output=on_output)
+        else:
+            outer_command, return_code, killed = self._run_with_output_files(
+                endpoint_command, inner_commands, buffers,
+                user_files=user_files, clear_user_files=clear_user_files,
+                envs=envs, timeout=timeout, on_output=on_output)
 
-        # Build the decoded results
+        # Build the decoded results, the outputs written to the user files are
+        # the handles (See "OutputHandle")
         results = {
-            'outer_stdout': CLI.decode_output(outer_stdout),
-            'outer_stderr': CLI.decode_output(outer_stderr),
-            'stdout': CLI.decode_output(inner_stdout),
-            'stderr': CLI.decode_output(inner_stderr),
+            'outer_stdout': CLI.decode_output(
+                buffers['outer_stdout'].getvalue()),
+            'outer_stderr': CLI.decode_output(
+                buffers['outer_stderr'].getvalue()),
+            'stdout': self._decode_output(buffers['stdout']),
+            'stderr': self._decode_output(buffers['stderr']),
             'return_code': return_code,
+            'killed': killed,
         }
 
         # Build debugging info
@@ -218,11 +531,212 @@ class CommandsRunner:
             'inner_commands': inner_commands,
             'outer_command': outer_command,
             'envs': envs,
+            'timeout': timeout,
         }
 
         # Return the results
         return results, debug_info
 
+    def _run_with_output_pipes(self, endpoint_command, inner_commands,
+                               buffers, envs={}, timeout=None,
+                               on_output=None):
+        # Check whether to execute the local shell directly
+        direct = self._can_exec_directly(endpoint_command)
+
+        # Build outer command, the outputs of the inner commands are the
+        # outputs of the outer command
+        outer_command = self._build_outer_command(
+            None if direct else endpoint_command)
+
+        # Build the function to keep and forward the outputs
+        def forward(stream, chunk):
+            buffers[stream].write(chunk)
+
+            if on_output is not None:
+                on_output(stream, chunk)
+
+        # Execute the outer command without blocking
+        if direct:
+            try:
+                p_obj = self._exec_local_shell(envs=envs)
+            except OSError as e:
+                # Report the error as the outer error like the shell
+                buffers['outer_stderr'].write(str(e).encode('utf-8'))
+
+                return outer_command, 1, None
+        else:
+            p_obj = self.cli.run_command(
+                outer_command, stdin=subprocess.PIPE, extra_envs=envs,
+                wait=False)
+
+        # Feed the inner commands through STDIN and read the outputs, the
+        # command is killed when it times out or is cancelled
+        return_code, killed = self.cli.pump_results(
+            p_obj, forward, input=inner_commands.encode('utf-8'),
+            timeout=timeout, cancel_event=self.cancel_event)
+
+        # Return the results
+        return outer_command, return_code, killed
+
+    def _run_in_shell_session(self, endpoint_command, inner_commands,
+                              buffers, timeout=None, on_output=None):
+        # Build outer command to start the shell
+        outer_command = self._build_outer_command(endpoint_command)
+
+        # Take an idle shell of the outer command or create a new one
+        with self.shell_sessions_lock:
+            idle = self.shell_sessions.setdefault(outer_command, [])
+
+            if len(idle) > 0:
+                session = idle.pop()
+            else:
+                session = ShellSession(outer_command, self.cli)
+
+        try:
+            # Run the inner commands in the shell, the shell is killed when
+            # the commands time out or are cancelled
+            results = session.run(
+                inner_commands, timeout=timeout,
+                cancel_event=self.cancel_event)
+        finally:
+            # Put the shell back
+            with self.shell_sessions_lock:
+                self.shell_sessions.setdefault(outer_command, []).append(
+                    session)
+
+        # Keep and forward the outputs
+        for stream in ['outer_stdout', 'outer_stderr', 'stdout', 'stderr']:
+            buffers[stream].write(results[stream])
+
+            if (on_output is not None and stream in ['stdout', 'stderr'] and
+                    len(results[stream]) > 0):
+                on_output(stream, results[stream])
+
+        # Return the results
+        return outer_command, results['return_code'], results['killed']
+
+    def _run_with_output_files(self, endpoint_command, inner_commands,
+                               buffers, user_files={}, clear_user_files=True,
+                               envs={}, timeout=None, on_output=None):
+        # Build the user file offsets
+        user_file_offsets = self._build_user_file_offsets(
+            user_files, clear_user_files, envs)
+
+        # Create temporary files for each command group
+        temp_files = self.temp_helper.create_temp_files(user_files)
+
+        # Check whether to execute the local shell directly
+        direct = self._can_exec_directly(endpoint_command)
+
+        # Build outer command
+        outer_command = self._build_outer_command(
+            None if direct else endpoint_command, temp_files=temp_files,
+            user_files=user_files, clear_user_files=clear_user_files)
+
+        # Create the followers of the inner outputs in the temporary files,
+        # the outputs written to the user files are not read or forwarded
+        followers = self._create_output_followers(temp_files)
+
+        # Follow the temporary files while the commands are running only when
+        # the outputs are forwarded
+        if on_output is None:
+            on_poll = None
+        else:
+            def on_poll():
+                self._read_outputs(
+                    followers, buffers, followers.keys(), on_output)
+
+        # Build the function to keep the outer outputs
+        def keep_outer_output(stream, chunk):
+            buffers['outer_{}'.format(stream)].write(chunk)
+
+        # Initialize whether the temporary files can be reused
+        reusable = False
+
+        try:
+            # Execute the outer command without blocking
+            if direct:
+                try:
+                    p_obj = self._exec_local_shell(
+                        temp_files=temp_files, user_files=user_files,
+                        clear_user_files=clear_user_files, envs=envs)
+                except OSError as e:
+                    # Report the error as the outer error like the shell
+                    buffers['outer_stderr'].write(str(e).encode('utf-8'))
+
+                    return outer_command, 1, None
+            else:
+                p_obj = self.cli.run_command(
+                    outer_command, stdin=subprocess.PIPE, extra_envs=envs,
+                    wait=False)
+
+            # Feed the inner commands through STDIN and wait for the outer
+            # command, the command is killed when it times out or is
+            # cancelled
+            return_code, killed = self.cli.pump_results(
+                p_obj, keep_outer_output,
+                input=inner_commands.encode('utf-8'), timeout=timeout,
+                cancel_event=self.cancel_event, on_poll=on_poll)
+
+            # Read the remaining stdout and stderr from the inner commands
+            self._read_outputs(
+                followers, buffers, followers.keys(), on_output)
+
+            # Replace the buffers of the user files by the handles, which read
+            # the outputs lazily
+            buffers.update(self._create_output_handles(
+                user_files, user_file_offsets))
+
+            # The temporary files can be reused when no processes left in the
+            # background may still write to them
+            reusable = not self.cli.is_process_group_alive(p_obj)
+        finally:
+            # Close the files
+            for follower in followers.values():
+                follower.close()
+
+            # Delete temporary files
+            self.temp_helper.delete_temp_files(temp_files, reusable=reusable)
+
+        # Return the results
+        return outer_command, return_code, killed
+
+    def _can_exec_directly(self, endpoint_command):
+        # Only the local shell can be executed directly
+        return (self.direct_local_exec and
+                endpoint_command == self._build_local_endpoint_command())
+
+    def _exec_local_shell(self, temp_files=None, user_files={},
+                          clear_user_files=True, envs={}):
+        # Initialize the files to write the outputs, the outputs are read from
+        # the pipes when there are no files
+        files = {}
+
+        try:
+            # Open the files like the redirections of the outer command
+            if temp_files is not None:
+                for stream in ['stdout', 'stderr']:
+                    # Get user file path
+                    user_path = user_files.get(stream, None)
+
+                    # Check whether to output to the user file
+                    if user_path is None:
+                        files[stream] = open(temp_files[stream]['path'], 'wb')
+                    elif clear_user_files:
+                        files[stream] = open(user_path, 'wb')
+                    else:
+                        files[stream] = open(user_path, 'ab')
+
+            # Execute the shell without blocking
+            return self.cli.exec_command(
+                shlex.split(self.shell_stdin), stdin=subprocess.PIPE,
+                stdout=files.get('stdout', subprocess.PIPE),
+                stderr=files.get('stderr', subprocess.PIPE), extra_envs=envs)
+        finally:
+            # Close the files, which have been inherited by the shell
+            for fp in files.values():
+                fp.close()
+
     def _group_commands_by_endpoints(self, server_spec, commands):
         # Initialize empty outputs
         endpoint_commands = []
@@ -307,48 +821,60 @@ class CommandsRunner:
         Returns:
             str: Remote endpoint command.
         """
-        # Check whether the server spec is intended to run on local machine
-        if (server_spec is None
-                or server_spec.get('hostname', None) == 'localhost'):
-            is_local = True
-        else:
-            is_local = False
-
         # Check whether the endpoint is local
-        if is_local:
+        if self._is_local_server(server_spec):
             return self._build_local_endpoint_command()
         else:
-            # Initialize the ssh options
-            options = []
-
-            # Check whether to add identity option
-            private_key_path = server_spec.get('private_key_path', None)
-            if private_key_path is not None:
-                options.extend(['-i', private_key_path])
+            # Build the SSH options and authority
+            destination = self._build_ssh_destination(server_spec)
 
-            # Check whether to add port option
-            port = server_spec.get('port', None)
-            if port is not None:
-                options.extend(['-p', str(port)])
-
-            # Build the authority
-            username = server_spec.get('username', None)
-            hostname = server_spec.get('hostname', None)
-
-            if username is None:
-                authority = '{}'.format(hostname)
+            # Get the options to reuse the persistent connection
+            if self.ssh_pool is None:
+                control_options = ''
             else:
-                authority = '{}@{}'.format(username, hostname)
-
-            # Build the options command
-            option_command = ' '.join(options)
+                control_options = self.ssh_pool.get_control_options(
+                    destination)
 
             # Build the SSH command
-            ssh_command = 'ssh {} {}'.format(option_command, authority)
+            ssh_command = ' '.join(
+                part for part in [self.ssh_command, control_options,
+                                  destination]
+                if len(part) > 0)
 
             # Return the SSH command
             return ssh_command
 
+    def _is_local_server(self, server_spec):
+        # Check whether the server spec is intended to run on local machine
+        return (server_spec is None or
+                server_spec.get('hostname', None) == 'localhost')
+
+    def _build_ssh_destination(self, server_spec):
+        # Initialize the ssh options
+        options = []
+
+        # Check whether to add identity option
+        private_key_path = server_spec.get('private_key_path', None)
+        if private_key_path is not None:
+            options.extend(['-i', private_key_path])
+
+        # Check whether to add port option
+        port = server_spec.get('port', None)
+        if port is not None:
+            options.extend(['-p', str(port)])
+
+        # Build the authority
+        username = server_spec.get('username', None)
+        hostname = server_spec.get('hostname', None)
+
+        if username is None:
+            authority = '{}'.format(hostname)
+        else:
+            authority = '{}@{}'.format(username, hostname)
+
+        # Build the options and authority and return
+        return ' '.join(options + [authority])
+
     def _build_local_endpoint_command(self):
         return self.shell_string
 
@@ -376,13 +902,19 @@ class CommandsRunner:
         # Concatenate all commands by newlines and return
         return '\n'.join(remote_commands)
 
-    def _build_outer_command(self, endpoint_command, temp_files, user_files,
-                             clear_user_files):
-        # Get temporary file path for STDIN
-        stdin_path = temp_files['stdin']['path']
+    def _build_outer_command(self, endpoint_command, temp_files=None,
+                             user_files={}, clear_user_files=True):
+        # Build the command which reads the inner commands from STDIN, the
+        # shell is executed directly when there is no endpoint command
+        if endpoint_command is None:
+            outer_command = self.shell_stdin
+        else:
+            outer_command = '{} \'{}\''.format(
+                endpoint_command, self.shell_stdin)
 
-        # Build the command part for STDIN
-        stdin_command = '< \'{}\''.format(stdin_path)
+        # Check whether to redirect the outputs to the files
+        if temp_files is None:
+            return outer_command
 
         # Build the command part for STDOUT and STDERR
         stdout_command = self._build_output_command_part(
@@ -390,13 +922,9 @@ class CommandsRunner:
         stderr_command = self._build_output_command_part(
             'stderr', temp_files, user_files, clear_user_files)
 
-        # Build the command
-        outer_command = '{} \'{}\' {} {} {}'.format(
-            endpoint_command, self.shell_stdin, stdin_command, stdout_command,
-            stderr_command)
-
-        # Return the final command
-        return outer_command
+        # Build the command and return
+        return '{} {} {}'.format(
+            outer_command, stdout_command, stderr_command)
 
     def _build_output_command_part(self, stream, temp_files, user_files,
                                    clear_user_files):
@@ -452,58 +980,52 @@ class CommandsRunner:
         # Return the offsets
         return user_file_offsets
 
-    def _write_command_to_stdin(self, command, files):
-        # Get the file pointer and path
-        stdin = files['stdin']
-        fp, path = stdin['fp'], stdin['path']
-
-        # Log the command and temporary file
-        self.logger.debug(
-            'Write command to temporary stdin file "{}"->\n{}'.format(
-                path, command))
-
-        # Write the commands into the stdin file
-        fp.write(command.encode('utf-8'))
-
-        # Close the stdin file
-        fp.close()
-
-    def _read_stdout_and_stderr(self, temp_files, user_files,
-                                user_file_offsets):
-        # Initialize all contents
-        all_contents = []
-
-        # Set all streams to read
-        streams = ['stdout', 'stderr']
-
+    def _create_output_followers(self, temp_files):
+        # Create the follower of each temporary file, there is no old content,
+        # so it's read from the beginning
+        return {stream: FileFollower(temp_file['path'])
+                for stream, temp_file in temp_files.items()}
+
+    def _create_output_handles(self, user_files, user_file_offsets):
+        # Initialize the handles
+        handles = {}
+
+        # Iterate each user file
+        for stream, path in user_files.items():
+            # Get the old user file size as offset
+            offset = user_file_offsets[stream]
+
+            # Get the current size, the file may not be created (e.g., the
+            # directory doesn't exist)
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                size = offset
+
+            # Create the handle of the appended output
+            handles[stream] = OutputHandle(
+                path, offset, max(0, size - offset),
+                head_size=self.output_head_size,
+                tail_size=self.output_tail_size)
+
+        # Return the handles
+        return handles
+
+    def _decode_output(self, buffer):
+        # Keep the handle to read the output lazily
+        if isinstance(buffer, OutputHandle):
+            return buffer
+
+        return CLI.decode_output(buffer.getvalue())
+
+    def _read_outputs(self, followers, buffers, streams, on_output=None):
         # Iterate each stream
         for stream in streams:
-            # Get the user file path
-            user_path = user_files.get(stream)
-
-            # Check whether to read from user file
-            if user_path is None:
-                # Get the temporary file path
-                temp_path = temp_files[stream]['path']
-
-                # Set the file to read
-                read_path = temp_path
-
-                # There is no old file, set offset to the beginning
-                offset = 0
-            else:
-                # Set the file to read
-                read_path = user_path
-
-                # Get the old user file size as offset
-                offset = user_file_offsets.get(stream, None)
-
-            # Read the file contents
-            contents = self.file_helper.read_file_contents(
-                read_path, offset=offset)
-
-            # Add the contents to the list
-            all_contents.append(contents)
-
-        # Return the contents
-        return all_contents[0], all_contents[1]
+            # Read the new chunks
+            for chunk in followers[stream].read_chunks():
+                # Keep the chunk in the buffer
+                buffers[stream].write(chunk)
+
+                # Forward the chunk
+                if on_output is not None:
+                    on_output(stream, chunk)
@@ -0,0 +1,234 @@
+import re
+
+from training_noodles.metric_aggregation import compile_metric_aggregation
+from training_noodles.metric_matrix import RequirementPredicate
+from training_noodles.output_buffer import OutputHandle
+from training_noodles.retry_policy import RetryPolicy
+from training_noodles.string_utils import (
+    parse_requirement_expression, split_requirement_aggregation)
+
+
+def compile_requirement_expression(req_expr):
+    """ Compile the requirement expression into a predicate.
+
+    Arguments:
+        req_expr (str): Requirement expression (e.g., "<=0.5", "==Yes").
+
+    Returns:
+        RequirementPredicate: The compiled predicate.
+
+    Raises:
+        ValueError: When the expression is invalid.
+    """
+    # Check whether the expression is a string
+    if not isinstance(req_expr, str):
+        raise ValueError(
+            'Requirement expression should be a string: {}'.format(req_expr))
+
+    # Parse the expression without whitespaces
+    result = parse_requirement_expression(req_expr.strip())
+
+    # Check whether the expression is valid
+    if result is None:
+        raise ValueError(
+            'Could not parse the requirement expression: {}'.format(req_expr))
+
+    # Build the predicate and return
+    return RequirementPredicate(result['operator'], result['value'])
+
+
+class ErrorHandler:
+    """ Compiled error handler.
+
+    The regex patterns of the return code and STDERR are compiled once. The
+    STDERR pattern is matched against the whole STDERR by default, it can also
+    be matched only against the beginning ("head") or the end ("tail") of the
+    first or last "stderr_limit" characters of STDERR, so huge STDERR outputs
+    won't be scanned entirely.
+    """
+
+    # Available actions
+    actions = ['abort', 'retry', 'continue']
+
+    # Available scopes of STDERR to match
+    stderr_scopes = ['full', 'head', 'tail']
+
+    def __init__(self, spec):
+        """ Initialize the instance.
+
+        Arguments:
+            spec (dict): Error handler spec.
+
+        Raises:
+            ValueError: When the spec is invalid.
+        """
+        # Save the name, response commands and action
+        self.name = spec.get('name', '')
+        self.commands = spec.get('commands', None)
+        self.action = spec.get('action', 'abort')
+
+        # Check whether the action is supported
+        if self.action not in self.actions:
+            raise ValueError('Unknown error action "{}"'.format(self.action))
+
+        # Save the retry policy options which override the options of the
+        # spec and the server, and check the options
+        self.retry_policy = spec.get('retry_policy', None)
+
+        if self.retry_policy is not None:
+            RetryPolicy(self.retry_policy)
+
+        # Get the return code
+        return_code = spec.get('return_code', None)
+
+        # Compile the return code if it's a pattern
+        if isinstance(return_code, str):
+            self.return_code = None
+            self.return_code_pattern = self._compile(return_code)
+        else:
+            self.return_code = return_code
+            self.return_code_pattern = None
+
+        # Get the scope and limit of STDERR to match
+        self.stderr_scope = spec.get('stderr_scope', 'full')
+        self.stderr_limit = spec.get('stderr_limit', 4096)
+
+        # Check whether the scope is supported
+        if self.stderr_scope not in self.stderr_scopes:
+            raise ValueError('Unknown STDERR scope "{}"'.format(
+                self.stderr_scope))
+
+        # Check whether the limit is valid
+        if not isinstance(self.stderr_limit, int) or self.stderr_limit < 0:
+            raise ValueError('Invalid STDERR limit "{}"'.format(
+                self.stderr_limit))
+
+        # Compile the STDERR pattern, the match should end at the end of STDERR
+        # in "tail" scope
+        stderr_pattern = str(spec.get('stderr_pattern', None))
+
+        if self.stderr_scope == 'tail':
+            stderr_pattern = '(?:{})\\Z'.format(stderr_pattern)
+
+        self.stderr_pattern = self._compile(stderr_pattern)
+
+    def match(self, return_code, stderr):
+        """ Check whether the error handler matches the results.
+
+        Arguments:
+            return_code (int): Return code of the commands.
+            stderr (str or OutputHandle): STDERR of the commands.
+
+        Returns:
+            bool: True if both the return code and STDERR are matched.
+        """
+        # Check the return code
+        if self.return_code_pattern is None:
+            match_return_code = (return_code == self.return_code)
+        else:
+            match_return_code = self.return_code_pattern.fullmatch(
+                str(return_code)) is not None
+
+        # Skip matching STDERR when the return code is not matched
+        if not match_return_code:
+            return False
+
+        # Only read the bytes in the scope from the user file
+        if isinstance(stderr, OutputHandle):
+            if self.stderr_scope == 'head':
+                stderr = stderr.head(self.stderr_limit)
+            elif self.stderr_scope == 'tail':
+                stderr = stderr.tail(self.stderr_limit)
+            else:
+                stderr = str(stderr)
+
+        # Check STDERR in the scope
+        if self.stderr_scope == 'head':
+            m = self.stderr_pattern.match(stderr, 0, self.stderr_limit)
+        elif self.stderr_scope == 'tail':
+            m = self.stderr_pattern.search(
+                stderr, max(0, len(stderr) - self.stderr_limit))
+        else:
+            m = self.stderr_pattern.fullmatch(stderr)
+
+        return m is not None
+
+    def _compile(self, pattern):
+        try:
+            return re.compile(pattern)
+        except re.error as e:
+            raise ValueError(
+                'Invalid regex pattern "{}": {}'.format(pattern, e)) from e
+
+
+class CompiledSpec:
+    """ Parts of the user spec compiled once when the spec is read.
+
+    Attributes:
+        requirement_predicates (dict): The key is the requirement expression
+            and the value is the RequirementPredicate.
+        metric_aggregations (dict): The key is the aggregation expression and
+            the value is the MetricAggregation.
+        error_handlers (list): List of ErrorHandler.
+    """
+
+    def __init__(self):
+        self.requirement_predicates = {}
+        self.metric_aggregations = {}
+        self.error_handlers = []
+
+    def get_requirement_predicate(self, req_expr):
+        """ Get the compiled predicate of the requirement expression.
+
+        The expression is compiled and saved if it hasn't been compiled.
+
+        Raises:
+            ValueError: When the expression is invalid.
+        """
+        # Get the compiled predicate
+        predicate = self.requirement_predicates.get(req_expr, None)
+
+        # Compile the expression when it's missing
+        if predicate is None:
+            predicate = compile_requirement_expression(req_expr)
+
+            self.requirement_predicates[req_expr] = predicate
+
+        # Return the predicate
+        return predicate
+
+    def get_metric_aggregation(self, req_id):
+        """ Get the compiled aggregation of the requirement ID.
+
+        The aggregation is compiled and saved if it hasn't been compiled.
+
+        Arguments:
+            req_id (str): Requirement ID which may end with the aggregation
+                (e.g., "cuda_memory_usage@min").
+
+        Returns:
+            (req_id (str), aggregation (MetricAggregation)) where "req_id" is
+            the requirement ID without the aggregation and "aggregation" is
+            None if there is no aggregation.
+
+        Raises:
+            ValueError: When the aggregation is invalid.
+        """
+        # Split the requirement ID by the aggregation
+        req_id, expr = split_requirement_aggregation(req_id)
+
+        # Check whether there is any aggregation
+        if expr is None:
+            return req_id, None
+
+        # Get the compiled aggregation
+        aggregation = self.metric_aggregations.get(expr, None)
+
+        # Compile the aggregation when it's missing
+        if aggregation is None:
+            aggregation = compile_metric_aggregation(expr)
+
+            self.metric_aggregations[expr] = aggregation
+
+        # Return the requirement ID and the aggregation
+        return req_id, aggregation
@@ -0,0 +1,177 @@
+from training_noodles.logger import Logger
+
+
+class DependencyGraph:
+    """ Dependency graph of experiments.
+
+    The dependencies ("depends_on") of the experiments in a stage are compiled
+    into a directed acyclic graph once. Each experiment keeps the number of
+    its undeployed dependencies (in-degree), so an experiment becomes ready
+    as soon as the counter drops to zero when its last dependency is deployed.
+
+    Examples:
+    1. The names are ['A', 'B', 'C'] and the dependencies are [[], ['A'],
+    ['A', 'B']]. The in-degrees are [0, 1, 2] and only experiment 0 is ready.
+    2. After marking experiment 0 deployed, the in-degrees become [0, 0, 1]
+    and experiment 1 becomes ready.
+    """
+
+    def __init__(self, names, dependencies, satisfied_names=[], strict=True):
+        """ Initialize the instance.
+
+        Arguments:
+            names (list): Experiment names (str), the index of the name is the
+                experiment index.
+            dependencies (list): Dependencies of each experiment, as a list of
+                experiment names (str).
+            satisfied_names (list): Names of experiments outside the graph
+                (e.g., experiments in other stages), the dependencies on them
+                are treated as deployed.
+            strict (bool): Whether to raise error for dependencies which are
+                neither in the names nor in the satisfied names. If it's
+                False, the unknown dependencies are treated as deployed (e.g.,
+                experiments which have been filtered out).
+
+        Raises:
+            ValueError: When there are unknown dependencies in strict mode or
+                there are cycles.
+        """
+        # Create a logger
+        self.logger = Logger('graph')
+
+        # Save the names
+        self.names = names
+
+        # Map each name to the experiment indexes, names may be duplicated
+        name_to_idxs = {}
+
+        for exp_idx, name in enumerate(names):
+            name_to_idxs.setdefault(name, []).append(exp_idx)
+
+        # Convert the satisfied names to set
+        satisfied_names = set(satisfied_names)
+
+        # Initialize the dependents of each experiment
+        self.dependents = [[] for _ in names]
+
+        # Initialize the number of undeployed dependencies of each experiment
+        self.in_degrees = [0] * len(names)
+
+        # Iterate each experiment and its dependencies
+        for exp_idx, exp_deps in enumerate(dependencies):
+            # Iterate each unique dependency name
+            for dep_name in sorted(set(exp_deps)):
+                # Get the experiment indexes of the dependency
+                dep_idxs = name_to_idxs.get(dep_name, None)
+
+                # Check whether the dependency is known
+                if dep_idxs is None:
+                    # Skip the dependency outside the graph
+                    if dep_name in satisfied_names or not strict:
+                        continue
+
+                    self.logger.raise_error(
+                        'Experiment "{}" depends on unknown experiment "{}"'
+                        .format(names[exp_idx], dep_name))
+
+                # Add the edges from the dependencies to the experiment
+                for dep_idx in dep_idxs:
+                    self.dependents[dep_idx].append(exp_idx)
+                    self.in_degrees[exp_idx] += 1
+
+        # Check whether there are any cycles
+        self._check_cycles()
+
+        # Initialize the set of deployed experiment indexes
+        self.deployed = set()
+
+        # Initialize the set of ready experiment indexes
+        self.ready = set(
+            i for i, in_degree in enumerate(self.in_degrees) if in_degree == 0)
+
+    def is_ready(self, exp_idx):
+        """ Check whether all dependencies of the experiment are deployed.
+
+        Arguments:
+            exp_idx (int): Experiment index.
+
+        Returns:
+            bool: Whether the experiment is ready.
+        """
+        return self.in_degrees[exp_idx] == 0
+
+    def get_ready(self):
+        """ Get the undeployed experiments whose dependencies are deployed.
+
+        Returns:
+            set: Indexes of ready experiments.
+        """
+        return set(self.ready)
+
+    def mark_deployed(self, exp_idx):
+        """ Mark the experiment as deployed.
+
+        Arguments:
+            exp_idx (int): Experiment index.
+
+        Returns:
+            list: Indexes of experiments which become ready.
+        """
+        # Check whether the experiment has already been deployed
+        if exp_idx in self.deployed:
+            return []
+
+        # Save the deployed experiment
+        self.deployed.add(exp_idx)
+
+        # Remove the experiment from the ready experiments
+        self.ready.discard(exp_idx)
+
+        # Initialize the newly ready experiments
+        newly_ready = []
+
+        # Decrement the counters of the dependents
+        for dependent_idx in self.dependents[exp_idx]:
+            self.in_degrees[dependent_idx] -= 1
+
+            # Check whether the last dependency has been deployed
+            if (self.in_degrees[dependent_idx] == 0 and
+                    dependent_idx not in self.deployed):
+                self.ready.add(dependent_idx)
+                newly_ready.append(dependent_idx)
+
+        # Return the newly ready experiments
+        return newly_ready
+
+    def _check_cycles(self):
+        # Copy the in-degrees
+        in_degrees = list(self.in_degrees)
+
+        # Initialize the experiments without dependencies
+        stack = [i for i, in_degree in enumerate(in_degrees) if in_degree == 0]
+
+        # Initialize the number of visited experiments
+        num_visited = 0
+
+        # Remove the experiments without dependencies one by one (Kahn's
+        # algorithm)
+        while len(stack) > 0:
+            exp_idx = stack.pop()
+            num_visited += 1
+
+            for dependent_idx in self.dependents[exp_idx]:
+                in_degrees[dependent_idx] -= 1
+
+                if in_degrees[dependent_idx] == 0:
+                    stack.append(dependent_idx)
+
+        # All experiments are visited if there are no cycles
+        if num_visited < len(in_degrees):
+            # Get the names of experiments in or behind the cycles
+            cycle_names = [self.names[i]
+                           for i, in_degree in enumerate(in_degrees)
+                           if in_degree > 0]
+
+            self.logger.raise_error(
+                'Found cyclic dependencies among experiments: {}'.format(
+                    ', '.join(cycle_names)))
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from training_noodles.metric_matrix import is_numeric_metric
+
+
+class GPUAllocator:
+    """ Allocator of the GPUs on the servers shared across the run.
+
+    The usage of each GPU (e.g., one line of "nvidia-smi" output per GPU) is
+    probed before the deployment, and a GPU is free if its usage is at most
+    "max_usage". The allocated GPUs are held for "hold_time" seconds, so they
+    won't be allocated to other experiments before the experiment starts
+    using them and the probes can see it. The least used free GPUs are
+    allocated first.
+    """
+
+    def __init__(self, max_usage=0.1, hold_time=300):
+        """ Initialize the instance.
+
+        Arguments:
+            max_usage (float): Maximum usage of a free GPU.
+            hold_time (float): Seconds to hold the allocated GPUs. Set to
+                "None" to hold them until the end of the run.
+        """
+        # Save the options
+        self.max_usage = max_usage
+        self.hold_time = hold_time
+
+        # Initialize the latest usages, the key is the server index and the
+        # value is the list of usages of each GPU
+        self.usages = {}
+
+        # Initialize the holds, the key is (server index, GPU index) and the
+        # value is (holder, expiry time), the expiry time is None if the GPU
+        # is held until the end of the run
+        self.holds = {}
+
+        # Create the lock to protect the usages and holds
+        self.lock = threading.Lock()
+
+    def update_usages(self, server_idx, usages):
+        """ Save the latest usages of the GPUs on the server.
+
+        Arguments:
+            server_idx (int): Index of the server.
+            usages: Usage of each GPU (list) or a single GPU (number). The
+                server has no free GPUs if it's not numeric (e.g., None when
+                the probe failed).
+        """
+        # Treat a single number as one GPU
+        if not isinstance(usages, list):
+            usages = [usages]
+
+        # Ignore the usages which are not numbers
+        if not all(map(is_numeric_metric, usages)):
+            usages = []
+
+        with self.lock:
+            self.usages[server_idx] = usages
+
+    def find_free_gpus(self, server_idx, now=None):
+        """ Find the free GPUs which are not held on the server.
+
+        Returns:
+            list: Indexes of the GPUs, the least used ones come first.
+        """
+        # Get the current time
+        now = time.time() if now is None else now
+
+        with self.lock:
+            return self._find_free_gpus(server_idx, now)
+
+    def allocate(self, holder, server_idx, num_gpus, now=None):
+        """ Allocate the free GPUs on the server.
+
+        Arguments:
+            holder: Hashable key of the allocation (e.g., experiment index).
+            server_idx (int): Index of the server.
+            num_gpus (int): Number of GPUs to allocate.
+
+        Returns:
+            list: Sorted indexes of the allocated GPUs.
+
+        Raises:
+            ValueError: When there are not enough free GPUs.
+        """
+        # Get the current time
+        now = time.time() if now is None else now
+
+        with self.lock:
+            # Find the free GPUs
+            free_gpus = self._find_free_gpus(server_idx, now)
+
+            # Check whether there are enough free GPUs
+            if len(free_gpus) < num_gpus:
+                raise ValueError(
+                    '{} GPUs are required but only {} are free on server #{}'
+                    .format(num_gpus, len(free_gpus), server_idx + 1))
+
+            # Hold the least used GPUs
+            gpu_idxs = sorted(free_gpus[:num_gpus])
+            expiry = None if self.hold_time is None else now + self.hold_time
+
+            for gpu_idx in gpu_idxs:
+                self.holds[(server_idx, gpu_idx)] = (holder, expiry)
+
+        # Return the allocated GPUs
+        return gpu_idxs
+
+    def release(self, holder):
+        """ Release the GPUs allocated to the holder.
+
+        Nothing happens if the holder hasn't allocated any GPUs.
+        """
+        with self.lock:
+            self.holds = {key: hold for key, hold in self.holds.items()
+                          if hold[0] != holder}
+
+    def _find_free_gpus(self, server_idx, now):
+        # Remove the expired holds
+        self.holds = {key: hold for key, hold in self.holds.items()
+                      if hold[1] is None or hold[1] > now}
+
+        # Get the latest usages of the server
+        usages = self.usages.get(server_idx, [])
+
+        # Find the free GPUs which are not held
+        free_gpus = [
+            gpu_idx for gpu_idx, usage in enumerate(usages)
+            if usage <= self.max_usage and
+            (server_idx, gpu_idx) not in self.holds]
+
+        # Sort the GPUs by the usages
+        return sorted(free_gpus, key=lambda gpu_idx: usages[gpu_idx])
@@ -0,0 +1,199 @@
+import math
+import re
+
+from training_noodles.metric_matrix import is_numeric_metric
+
+# Pattern of the aggregation expressions (e.g., "min", "percentile(90)")
+_AGGREGATION_PATTERN = re.compile(
+    r'^(?P<name>\w+)(\((?P<argument>[^()]*)\))?$')
+
+
+def parse_metric_values(results):
+    """ Parse the numeric values in each line of the results.
+
+    Arguments:
+        results (str): STDOUT of the requirement commands.
+
+    Returns:
+        list: The values (float) of the non-empty lines, None if any line is
+        not a number or there are no values.
+    """
+    # Split the results by newlines and remove the empty lines
+    lines = [line for line in results.split('\n') if len(line.strip()) > 0]
+
+    # Check whether there are any values
+    if len(lines) <= 0:
+        return None
+
+    try:
+        # Parse each line
+        return [float(line) for line in lines]
+    except ValueError:
+        return None
+
+
+class MetricAggregation:
+    """ Compiled aggregation which reduces the values of a vector metric (e.g.,
+    one value per GPU) into one number.
+
+    Available aggregations are "min", "max", "mean", "sum", "count",
+    "count_below(<threshold>)", "count_above(<threshold>)" and
+    "percentile(<0-100>)". The percentile is linearly interpolated between the
+    closest values.
+    """
+
+    # Aggregations which require an argument
+    with_argument = ['count_below', 'count_above', 'percentile']
+
+    # Aggregations without any arguments
+    without_argument = ['min', 'max', 'mean', 'sum', 'count']
+
+    def __init__(self, name, argument=None):
+        """ Initialize the instance.
+
+        Arguments:
+            name (str): Name of the aggregation (e.g., "percentile").
+            argument (float): Argument of the aggregation (e.g., 90).
+
+        Raises:
+            ValueError: When the aggregation is unknown or the argument is
+            invalid.
+        """
+        # Check whether the aggregation is supported
+        if name in self.with_argument:
+            if argument is None:
+                raise ValueError(
+                    'Aggregation "{}" requires an argument'.format(name))
+        elif name in self.without_argument:
+            if argument is not None:
+                raise ValueError(
+                    'Aggregation "{}" takes no arguments'.format(name))
+        else:
+            raise ValueError('Unknown aggregation "{}"'.format(name))
+
+        # Check whether the percentile is valid
+        if name == 'percentile' and not 0 <= argument <= 100:
+            raise ValueError(
+                'Percentile should be between 0-100: {}'.format(argument))
+
+        # Save the name, argument and aggregation function
+        self.name = name
+        self.argument = argument
+        self.aggregate = getattr(self, '_aggregate_{}'.format(name))
+
+    def __call__(self, values):
+        """ Aggregate the values.
+
+        Arguments:
+            values (list): Numbers to aggregate.
+
+        Returns:
+            The aggregated number, None if there are no values to aggregate
+            except for the counts.
+        """
+        return self.aggregate(values)
+
+    def __repr__(self):
+        return 'MetricAggregation({!r}, {!r})'.format(self.name, self.argument)
+
+    def _aggregate_min(self, values):
+        return min(values) if len(values) > 0 else None
+
+    def _aggregate_max(self, values):
+        return max(values) if len(values) > 0 else None
+
+    def _aggregate_mean(self, values):
+        return sum(values) / len(values) if len(values) > 0 else None
+
+    def _aggregate_sum(self, values):
+        return sum(values)
+
+    def _aggregate_count(self, values):
+        return len(values)
+
+    def _aggregate_count_below(self, values):
+        return sum(1 for value in values if value < self.argument)
+
+    def _aggregate_count_above(self, values):
+        return sum(1 for value in values if value > self.argument)
+
+    def _aggregate_percentile(self, values):
+        # Check whether there are any values
+        if len(values) <= 0:
+            return None
+
+        # Find the position of the percentile in the sorted values
+        values = sorted(values)
+        position = (len(values) - 1) * self.argument / 100
+        lower, upper = math.floor(position), math.ceil(position)
+
+        # Interpolate between the closest values
+        return values[lower] + (values[upper] - values[lower]) * (
+            position - lower)
+
+
+# Default aggregation of the vector metrics
+default_aggregation = MetricAggregation('mean')
+
+
+def compile_metric_aggregation(expr):
+    """ Compile the aggregation expression.
+
+    Arguments:
+        expr (str): Aggregation expression (e.g., "min", "count_below(0.1)").
+
+    Returns:
+        MetricAggregation: The compiled aggregation.
+
+    Raises:
+        ValueError: When the expression is invalid.
+    """
+    # Parse the name and argument
+    m = _AGGREGATION_PATTERN.fullmatch(expr.strip())
+
+    if m is None:
+        raise ValueError(
+            'Could not parse the aggregation expression: {}'.format(expr))
+
+    # Parse the argument
+    argument = m.group('argument')
+
+    if argument is not None:
+        try:
+            argument = float(argument)
+        except ValueError:
+            raise ValueError('Invalid argument of aggregation "{}"'.format(
+                expr)) from None
+
+    # Build the aggregation and return
+    return MetricAggregation(m.group('name'), argument)
+
+
+def aggregate_metric(metric, aggregation=None):
+    """ Aggregate the vector metric.
+
+    Arguments:
+        metric: The metric, which is a list for the vector metrics.
+        aggregation (MetricAggregation): The aggregation. Set to "None" to
+            only aggregate the vector metrics by the mean.
+
+    Returns:
+        The aggregated metric. The metric is returned as is when it's not
+        numeric.
+    """
+    # Only aggregate the vector metrics by default
+    if aggregation is None:
+        if not isinstance(metric, list):
+            return metric
+
+        aggregation = default_aggregation
+
+    # Treat a single number as a vector
+    values = metric if isinstance(metric, list) else [metric]
+
+    # Check whether all values are numbers
+    if not all(map(is_numeric_metric, values)):
+        return metric
+
+    # Aggregate the values
+    return aggregation(values)
@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+class MetricCache:
+    """ Cache of server metrics shared across deployment rounds.
+
+    Each entry is keyed by the server index, the requirement ID and the
+    rendered requirement commands (e.g., commands and environment variables),
+    and it remembers the time when the metric was checked. An entry is fresh
+    if its age is within the maximum age given by the caller.
+    """
+
+    def __init__(self):
+        # Initialize the entries, the key is (server index, requirement ID,
+        # rendered commands) and the value is (metric, checked time)
+        self.entries = {}
+
+        # Create the lock to protect the entries
+        self.lock = threading.Lock()
+
+    def get(self, server_idx, req_id, rendered, max_age, now=None):
+        """ Get the fresh metric.
+
+        Arguments:
+            server_idx (int): Server index.
+            req_id (str): Requirement ID.
+            rendered (str): Rendered requirement commands.
+            max_age (float): Maximum age of the metric in seconds.
+            now (float): Current Unix time. Set to "None" to use current time.
+
+        Returns:
+            (found (bool), metric)
+        """
+        # Get current time
+        now = time.time() if now is None else now
+
+        with self.lock:
+            # Get the entry
+            entry = self.entries.get((server_idx, req_id, rendered), None)
+
+        # Check whether the entry exists and is fresh
+        if entry is None or now - entry[1] > max_age:
+            return False, None
+        else:
+            return True, entry[0]
+
+    def set(self, server_idx, req_id, rendered, metric, now=None):
+        """ Save the metric.
+
+        Arguments:
+            server_idx (int): Server index.
+            req_id (str): Requirement ID.
+            rendered (str): Rendered requirement commands.
+            metric: The metric to save.
+            now (float): Checked Unix time. Set to "None" to use current time.
+        """
+        # Get current time
+        now = time.time() if now is None else now
+
+        with self.lock:
+            self.entries[(server_idx, req_id, rendered)] = (metric, now)
+
+    def invalidate_server(self, server_idx):
+        """ Remove all metrics of the server.
+
+        Arguments:
+            server_idx (int): Server index.
+        """
+        with self.lock:
+            # Find the keys of the server
+            keys = [key for key in self.entries.keys()
+                    if key[0] == server_idx]
+
+            # Remove the entries
+            for key in keys:
+                del self.entries[key]
+
+    def clear(self):
+        """ Remove all metrics.
+        """
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,240 @@
+import numbers
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, the requirements are evaluated one by one without it
+    np = None
+
+
+def is_numeric_metric(metric):
+    """ Check whether the metric is a number (excluding booleans).
+    """
+    return isinstance(metric, numbers.Real) and not isinstance(metric, bool)
+
+
+class RequirementPredicate:
+    """ Compiled requirement expression.
+
+    The predicate compares a metric to the value of the requirement expression
+    (e.g., "<=0.5" or "==Yes").
+    """
+
+    # Comparison functions of the operators
+    comparisons = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '>': operator.gt,
+        '<=': operator.le,
+        '>=': operator.ge,
+    }
+
+    def __init__(self, operator, value):
+        """ Initialize the instance.
+
+        Arguments:
+            operator (str): Comparison operator (e.g., "<=").
+            value: Value to compare with.
+
+        Raises:
+            ValueError: When the operator is unknown.
+        """
+        # Get the comparison function
+        compare = self.comparisons.get(operator, None)
+
+        # Check whether the operator is supported
+        if compare is None:
+            raise ValueError('Unknown operator: {}'.format(operator))
+
+        # Save the operator, value and comparison function
+        self.operator = operator
+        self.value = value
+        self.compare = compare
+
+        # Only numeric values can be compared with the NumPy arrays
+        self.is_numeric = is_numeric_metric(value)
+
+    def __call__(self, metric):
+        """ Check whether the metric satisfies the requirement.
+
+        Raises:
+            TypeError: When the metric is not comparable to the value.
+        """
+        try:
+            return self.compare(metric, self.value)
+        except TypeError as e:
+            raise TypeError(
+                'Could not compare the values: "{}" "{}" "{}"'.format(
+                    metric, self.operator, self.value)) from e
+
+    def __repr__(self):
+        return 'RequirementPredicate({!r}, {!r})'.format(
+            self.operator, self.value)
+
+
+class MetricMatrix(dict):
+    """ Collected metrics with a numeric server x requirement matrix.
+
+    It's a dict where the key is the requirement ID and the value is the list
+    of metrics of all servers. If NumPy is installed, the numeric metrics of
+    each requirement are also kept as a column of a NumPy array, so a whole
+    requirement group can be evaluated as boolean masks. The columns are built
+    lazily and dropped when the metrics of the requirement are replaced.
+    Non-numeric metrics and values (e.g., "==Yes") are evaluated one by one.
+    """
+
+    # The minimum number of servers to evaluate with boolean masks, fewer
+    # servers are evaluated faster one by one
+    min_vectorized_servers = 64
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Initialize the columns, the key is the requirement ID and the value
+        # is (numeric metrics, whether each metric is numeric)
+        self.columns = {}
+
+    def __setitem__(self, req_id, servers_metrics):
+        super().__setitem__(req_id, servers_metrics)
+
+        # Drop the outdated column
+        self.columns.pop(req_id, None)
+
+    def __delitem__(self, req_id):
+        super().__delitem__(req_id)
+
+        # Drop the outdated column
+        self.columns.pop(req_id, None)
+
+    def get_column(self, req_id):
+        """ Get the numeric metrics of all servers of the requirement.
+
+        Returns:
+            (values, numeric) where "values" is a float array of the metrics
+            (NaN for non-numeric metrics) and "numeric" is a boolean array of
+            whether each metric is numeric.
+        """
+        # Get the cached column
+        column = self.columns.get(req_id, None)
+
+        # Build the column when it's missing
+        if column is None:
+            # Get the metrics of all servers
+            servers_metrics = self[req_id]
+
+            # Find the numeric metrics
+            numeric = np.array([is_numeric_metric(metric)
+                                for metric in servers_metrics], dtype=bool)
+
+            # Convert the metrics to floats
+            values = np.array([
+                metric if is_numeric else np.nan
+                for metric, is_numeric in zip(servers_metrics, numeric)],
+                dtype=float)
+
+            # Save the column
+            column = (values, numeric)
+            self.columns[req_id] = column
+
+        # Return the column
+        return column
+
+    def find_satisfied_servers(self, server_idxs, predicates, vectorize=None):
+        """ Find the servers which satisfy all requirements in the group.
+
+        The requirements are evaluated in order, and each requirement is only
+        evaluated on the servers which satisfy the previous requirements.
+
+        Arguments:
+            server_idxs (iterable): Indexes of candidate servers.
+            predicates (list): List of (requirement ID, RequirementPredicate).
+            vectorize (bool): Whether to evaluate with boolean masks. Set to
+                "None" to decide by the number of servers. It's always False
+                when NumPy is not installed.
+
+        Returns:
+            list: Sorted indexes of satisfied servers.
+
+        Raises:
+            TypeError: When any metric is not comparable to the value.
+        """
+        # Sort the indexes of servers
+        server_idxs = sorted(server_idxs)
+
+        # Decide whether to evaluate with boolean masks
+        if vectorize is None:
+            vectorize = len(server_idxs) >= self.min_vectorized_servers
+
+        # Evaluate the requirements
+        if vectorize and np is not None:
+            return self._find_satisfied_servers_by_masks(
+                server_idxs, predicates)
+        else:
+            return self._find_satisfied_servers_one_by_one(
+                server_idxs, predicates)
+
+    def _find_satisfied_servers_one_by_one(self, server_idxs, predicates):
+        # Initialize the satisfied servers
+        satisfied = server_idxs
+
+        # Iterate each requirement
+        for req_id, predicate in predicates:
+            # Stop when there are no any satisfied servers left
+            if len(satisfied) <= 0:
+                break
+
+            # Get the metrics of all servers
+            servers_metrics = self[req_id]
+
+            # Keep the servers whose metrics satisfy the requirement
+            satisfied = [i for i in satisfied
+                         if predicate(servers_metrics[i])]
+
+        # Return the satisfied servers
+        return satisfied
+
+    def _find_satisfied_servers_by_masks(self, server_idxs, predicates):
+        # Convert the indexes to an array
+        idxs = np.array(server_idxs, dtype=int)
+
+        # Initialize the mask of satisfied servers
+        mask = np.ones(len(idxs), dtype=bool)
+
+        # Iterate each requirement
+        for req_id, predicate in predicates:
+            # Stop when there are no any satisfied servers left
+            if not mask.any():
+                break
+
+            # Get the numeric metrics of candidate servers
+            values, numeric = self.get_column(req_id)
+            values, numeric = values[idxs], numeric[idxs]
+
+            # Compare the numeric metrics at once
+            if predicate.is_numeric:
+                with np.errstate(invalid='ignore'):
+                    req_mask = predicate.compare(values, predicate.value)
+
+                req_mask &= numeric
+
+                # The other metrics are evaluated one by one
+                fallback = mask & ~numeric
+            else:
+                req_mask = np.zeros(len(idxs), dtype=bool)
+
+                # All metrics are evaluated one by one
+                fallback = mask
+
+            # Evaluate the metrics one by one
+            servers_metrics = self[req_id]
+
+            for row in np.flatnonzero(fallback):
+                req_mask[row] = predicate(servers_metrics[idxs[row]])
+
+            # Update the mask of satisfied servers
+            mask &= req_mask
+
+        # Return the satisfied servers
+        return idxs[mask].tolist()
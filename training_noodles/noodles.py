@@ -13,7 +13,8 @@ def main():
     init_logging(args)
 
     # Build the runner
-    runner = Runner(args.type, args.spec, verbose=args.verbose)
+    runner = Runner(args.type, args.spec, verbose=args.verbose,
+                    resume=args.resume)
 
     # Start the runner
     runner.run()
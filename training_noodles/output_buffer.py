@@ -0,0 +1,322 @@
+import codecs
+import os
+
+
+class HeadTailBuffer:
+    """ Buffer which only keeps the beginning and the end of the output.
+
+    The first "head_size" bytes and the last "tail_size" bytes are kept, the
+    bytes in between are dropped and replaced by a marker line, so the memory
+    is bounded no matter how large the output is.
+    """
+
+    def __init__(self, head_size=None, tail_size=None):
+        """ Initialize the instance.
+
+        Arguments:
+            head_size (int): Number of bytes to keep from the beginning. Set to
+                "None" to keep all bytes.
+            tail_size (int): Number of bytes to keep from the end. Set to
+                "None" to keep all bytes after the head.
+        """
+        # Save the sizes
+        self.head_size = head_size
+        self.tail_size = tail_size
+
+        # Initialize the kept bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+
+        # Initialize the number of bytes written
+        self.size = 0
+
+    @property
+    def num_omitted(self):
+        """ Number of bytes dropped from the middle.
+        """
+        # Get the number of bytes kept in the tail
+        tail_len = len(self.tail)
+
+        if self.tail_size is not None:
+            tail_len = min(tail_len, self.tail_size)
+
+        return self.size - len(self.head) - tail_len
+
+    def write(self, data):
+        """ Write the bytes to the buffer.
+        """
+        # Count the bytes
+        self.size += len(data)
+
+        # Fill the head first
+        if self.head_size is None:
+            self.head.extend(data)
+
+            return
+
+        room = self.head_size - len(self.head)
+
+        if room > 0:
+            self.head.extend(data[:room])
+            data = data[room:]
+
+        # Append the rest to the tail
+        self.tail.extend(data)
+
+        # Drop the old bytes of the tail, the tail is trimmed only when it's
+        # twice as large as the limit to avoid moving the bytes on each write
+        if (self.tail_size is not None and
+                len(self.tail) > 2 * self.tail_size):
+            del self.tail[:len(self.tail) - self.tail_size]
+
+    def getvalue(self):
+        """ Get the kept bytes.
+
+        Returns:
+            bytes: The head and the tail, joined by a marker line if any bytes
+                have been dropped.
+        """
+        # Get the tail within the limit
+        if self.tail_size is None:
+            tail = self.tail
+        else:
+            tail = self.tail[max(0, len(self.tail) - self.tail_size):]
+
+        # Check whether any bytes have been dropped
+        num_omitted = self.num_omitted
+
+        if num_omitted > 0:
+            marker = '\n... ({} bytes omitted) ...\n'.format(num_omitted)
+
+            return bytes(self.head) + marker.encode('utf-8') + bytes(tail)
+        else:
+            return bytes(self.head) + bytes(tail)
+
+
+class FileFollower:
+    """ Reader of the bytes appended to a file.
+
+    The file is opened lazily, so it can be followed before it's created.
+    """
+
+    # Number of bytes to read at once
+    chunk_size = 64 * 1024
+
+    def __init__(self, path, offset=0):
+        """ Initialize the instance.
+
+        Arguments:
+            path (str): Path to the file.
+            offset (int): Position to start reading.
+        """
+        self.path = path
+        self.offset = offset
+        self.fp = None
+
+    def read_chunks(self):
+        """ Read the new bytes in chunks.
+
+        Yields:
+            bytes: The chunk of new bytes.
+        """
+        # Open the file when it exists
+        if self.fp is None:
+            if not os.path.exists(self.path):
+                return
+
+            self.fp = open(self.path, 'rb')
+            self.fp.seek(self.offset)
+
+        # Read until the end of the file
+        while True:
+            chunk = self.fp.read(self.chunk_size)
+
+            if len(chunk) <= 0:
+                break
+
+            yield chunk
+
+    def close(self):
+        # Close the file
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+
+class LineStreamer:
+    """ Forward the decoded lines of the output chunks as they arrive.
+
+    A line longer than "max_line_length" is forwarded in pieces, so the memory
+    is bounded even if the output has no newlines.
+    """
+
+    # Maximum number of characters to hold before forwarding
+    max_line_length = 64 * 1024
+
+    def __init__(self, emit):
+        """ Initialize the instance.
+
+        Arguments:
+            emit (callable): Function to call with each line (str) without the
+                newline.
+        """
+        # Save the function
+        self.emit = emit
+
+        # Create the decoder, the chunks may split the multi-byte characters
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        # Initialize the incomplete line
+        self.pending = ''
+
+    def write(self, chunk):
+        """ Write the chunk of bytes and forward the complete lines.
+        """
+        # Decode the chunk
+        text = self.pending + self.decoder.decode(chunk)
+
+        # Split the complete lines
+        lines = text.split('\n')
+
+        # Keep the incomplete line
+        self.pending = lines.pop()
+
+        # Forward the complete lines
+        for line in lines:
+            self.emit(line)
+
+        # Forward the incomplete line when it's too long
+        if len(self.pending) >= self.max_line_length:
+            self.emit(self.pending)
+            self.pending = ''
+
+    def flush(self):
+        """ Forward the remaining incomplete line.
+        """
+        # Decode the remaining bytes
+        text = self.pending + self.decoder.decode(b'', final=True)
+
+        # Reset the incomplete line
+        self.pending = ''
+
+        # Forward the line
+        if len(text) > 0:
+            self.emit(text)
+
+
+class OutputHandle:
+    """ Handle of the output appended to a file, which is read lazily.
+
+    Only the position of the output in the file is kept, the bytes are read on
+    demand, so the commands writing huge outputs to the user files don't cost
+    any I/O or memory unless the outputs are used. The length is fixed when
+    the handle is created, the bytes appended later are not included.
+
+    "len()" is the number of bytes, "head()" and "tail()" only read the bytes
+    they need, and "str()" reads the beginning and the end like
+    "HeadTailBuffer".
+    """
+
+    def __init__(self, path, offset, length, head_size=None, tail_size=None):
+        """ Initialize the instance.
+
+        Arguments:
+            path (str): Path to the file.
+            offset (int): Position of the output in the file.
+            length (int): Number of bytes of the output.
+            head_size (int): Number of bytes to read from the beginning by
+                "str()". Set to "None" to read all bytes.
+            tail_size (int): Number of bytes to read from the end by "str()".
+                Set to "None" to read all bytes after the head.
+        """
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.head_size = head_size
+        self.tail_size = tail_size
+
+    @classmethod
+    def span(cls, handles):
+        """ Combine the handles of the consecutive outputs in the same file.
+
+        Arguments:
+            handles (list): List of OutputHandle in the order of the outputs.
+
+        Returns:
+            OutputHandle: The handle from the first output to the last one.
+        """
+        first, last = handles[0], handles[-1]
+
+        return cls(first.path, first.offset,
+                   last.offset + last.length - first.offset,
+                   head_size=first.head_size, tail_size=first.tail_size)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        # Read all bytes when there is no limit
+        if self.head_size is None or self.tail_size is None:
+            return self._decode(self.read())
+
+        # Check whether any bytes should be dropped
+        num_omitted = self.length - self.head_size - self.tail_size
+
+        if num_omitted <= 0:
+            return self._decode(self.read())
+
+        # Read the beginning and the end
+        marker = '\n... ({} bytes omitted) ...\n'.format(num_omitted)
+
+        return self.head(self.head_size) + marker + self.tail(self.tail_size)
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return 'OutputHandle({!r}, offset={}, length={})'.format(
+            self.path, self.offset, self.length)
+
+    def read(self, start=0, size=None):
+        """ Read the bytes of the output.
+
+        Arguments:
+            start (int): Position relative to the beginning of the output.
+            size (int): Number of bytes to read. Set to "None" to read until
+                the end of the output.
+
+        Returns:
+            bytes: The bytes, empty if the file no longer exists.
+        """
+        # Limit the range within the output
+        start = min(max(0, start), self.length)
+
+        if size is None:
+            size = self.length - start
+        else:
+            size = min(size, self.length - start)
+
+        if size <= 0:
+            return b''
+
+        # Read the range
+        try:
+            with open(self.path, 'rb') as fp:
+                fp.seek(self.offset + start)
+
+                return fp.read(size)
+        except FileNotFoundError:
+            return b''
+
+    def head(self, size):
+        """ Read and decode the first bytes of the output.
+        """
+        return self._decode(self.read(0, size))
+
+    def tail(self, size):
+        """ Read and decode the last bytes of the output.
+        """
+        return self._decode(self.read(max(0, self.length - size), size))
+
+    def _decode(self, data):
+        return data.decode('utf-8', errors='replace')
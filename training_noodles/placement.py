@@ -0,0 +1,168 @@
+import numbers
+
+
+class PlacementContext:
+    """ Information used by placement policies to score the servers.
+    """
+
+    def __init__(self, metrics, metric_ids=[], weights={},
+                 deployment_counts={}):
+        """ Initialize the instance.
+
+        Arguments:
+            metrics (dict): Collected metrics, the key is the requirement ID
+                and the value is a list of metrics of all servers.
+            metric_ids (list): Requirement IDs (str) whose metrics are treated
+                as the load of the servers.
+            weights (dict): Weights of the metrics, the key is the requirement
+                ID and the value is the weight.
+            deployment_counts (dict): Number of experiments deployed by Noodles
+                on each server, the key is the server index.
+        """
+        self.metrics = metrics
+        self.metric_ids = metric_ids
+        self.weights = weights
+        self.deployment_counts = deployment_counts
+
+    def get_metric(self, metric_id, server_idx):
+        """ Get the numeric metric of the server.
+
+        Returns:
+            The metric if it's a number, otherwise None.
+        """
+        # Get the metrics of all servers
+        servers_metrics = self.metrics.get(metric_id, None)
+
+        # Check whether the metric has been collected
+        if servers_metrics is None or server_idx >= len(servers_metrics):
+            return None
+
+        # Get the metric of the server
+        metric = servers_metrics[server_idx]
+
+        # Only numbers (excluding booleans) are comparable as loads
+        if isinstance(metric, numbers.Real) and not isinstance(metric, bool):
+            return metric
+        else:
+            return None
+
+    def get_load(self, server_idx):
+        """ Get the load of the server.
+
+        The load is the mean of numeric metrics in "metric_ids". It's zero if
+        there are no numeric metrics.
+        """
+        # Get the numeric metrics
+        values = [self.get_metric(metric_id, server_idx)
+                  for metric_id in self.metric_ids]
+        values = [value for value in values if value is not None]
+
+        # Calculate the mean
+        if len(values) > 0:
+            return sum(values) / len(values)
+        else:
+            return 0
+
+    def get_weighted_score(self, server_idx):
+        """ Get the weighted sum of the metrics of the server.
+
+        Missing or non-numeric metrics are treated as zeros.
+        """
+        # Initialize the score
+        score = 0
+
+        # Accumulate the weighted metrics
+        for metric_id, weight in self.weights.items():
+            metric = self.get_metric(metric_id, server_idx)
+
+            if metric is not None:
+                score += weight * metric
+
+        # Return the score
+        return score
+
+    def get_deployment_count(self, server_idx):
+        return self.deployment_counts.get(server_idx, 0)
+
+
+def _first(server_idx, context):
+    # All servers are equal, the server index breaks the tie
+    return 0
+
+
+def _least_loaded(server_idx, context):
+    # Prefer the server with the lowest load
+    return context.get_load(server_idx)
+
+
+def _best_fit(server_idx, context):
+    # Prefer the server with the highest load which still satisfies the
+    # requirements, so that the other servers are kept free for larger jobs
+    return -context.get_load(server_idx)
+
+
+def _spread(server_idx, context):
+    # Prefer the server with the fewest deployments, then the lowest load
+    return (context.get_deployment_count(server_idx),
+            context.get_load(server_idx))
+
+
+def _weighted(server_idx, context):
+    # Prefer the server with the highest weighted score
+    return -context.get_weighted_score(server_idx)
+
+
+# Registered placement policies, each policy maps the server index and the
+# context to a cost, the server with the lowest cost is chosen
+policies = {
+    'first': _first,
+    'least_loaded': _least_loaded,
+    'best_fit': _best_fit,
+    'bin_pack': _best_fit,
+    'spread': _spread,
+    'weighted': _weighted,
+}
+
+
+def register_policy(name, policy):
+    """ Register a placement policy.
+
+    Arguments:
+        name (str): Name of the policy used in the spec.
+        policy (callable): Function of (server index, PlacementContext) which
+            returns a comparable cost, the server with the lowest cost is
+            chosen.
+    """
+    policies[name] = policy
+
+
+def choose_server(policy_name, server_idxs, context):
+    """ Choose a server by the placement policy.
+
+    Ties are broken by the server index (i.e., the order in the spec), so the
+    placement is deterministic.
+
+    Arguments:
+        policy_name (str): Name of the registered policy.
+        server_idxs (iterable): Indexes of satisfied servers.
+        context (PlacementContext): Information to score the servers.
+
+    Returns:
+        int: Index of the chosen server, None if there are no servers.
+    """
+    # Get the policy
+    policy = policies.get(policy_name, None)
+
+    # Check whether the policy exists
+    if policy is None:
+        raise ValueError('Unknown placement policy "{}"'.format(policy_name))
+
+    # Sort the indexes for the tie-break
+    server_idxs = sorted(server_idxs)
+
+    # Check whether there are any servers
+    if len(server_idxs) <= 0:
+        return None
+
+    # Choose the server with the lowest cost and index
+    return min(server_idxs, key=lambda i: (policy(i, context), i))
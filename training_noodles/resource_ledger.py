@@ -0,0 +1,171 @@
+import numbers
+
+
+# The resource taken by each deployment, a server without declared capacities
+# has one slot, so at most one experiment is deployed to it in a round
+slots_resource = 'slots'
+
+
+def check_resources(resources):
+    """ Check whether the resources (capacities or reservations) are valid.
+
+    Arguments:
+        resources (dict): The key is the resource name (e.g., "gpus") and the
+            value is the non-negative amount.
+
+    Raises:
+        ValueError: When the resources are invalid.
+    """
+    # Check whether the resources are in a dict
+    if not isinstance(resources, dict):
+        raise ValueError('Resources should be a dict: {}'.format(resources))
+
+    # Check each amount
+    for name, amount in resources.items():
+        if (not isinstance(amount, numbers.Real) or
+                isinstance(amount, bool) or amount < 0):
+            raise ValueError(
+                'Amount of resource "{}" should be a non-negative number: {}'
+                .format(name, amount))
+
+
+class ResourceLedger:
+    """ In-memory ledger of the resources reserved on the servers in a round.
+
+    Each server has capacities (e.g., {"slots": 4, "gpus": 8}) and each
+    deployment reserves some resources (e.g., {"gpus": 1}) on the chosen server
+    until the end of the round. A deployment takes one slot unless "slots" is
+    reserved explicitly. The resources which are not declared by the server are
+    unlimited, and a server without any declared capacities has only one slot.
+
+    The ledger doesn't probe the servers, so several experiments can be packed
+    onto one server in a round without waiting for the probes to see the
+    experiments which have just started.
+    """
+
+    def __init__(self, servers_capacities):
+        """ Initialize the instance.
+
+        Arguments:
+            servers_capacities (list): Capacities (dict or None) of each
+                server.
+        """
+        # Save the capacities, the servers without capacities have one slot
+        self.capacities = [
+            {slots_resource: 1} if capacities is None else dict(capacities)
+            for capacities in servers_capacities]
+
+        # Initialize the reservations, the key is the holder (e.g., the
+        # experiment index) and the value is (server index, resources)
+        self.reservations = {}
+
+        # Initialize the reserved resources of each server
+        self.reserved = [{} for _ in self.capacities]
+
+    def can_reserve(self, server_idx, resources={}):
+        """ Check whether the resources fit on the server.
+        """
+        # Get the capacities and reserved resources of the server
+        capacities = self.capacities[server_idx]
+        reserved = self.reserved[server_idx]
+
+        # Check each requested resource
+        for name, amount in self._add_slot(resources).items():
+            # The resource is unlimited when it's not declared
+            if name not in capacities:
+                continue
+
+            # Check whether the remaining resource is enough
+            if reserved.get(name, 0) + amount > capacities[name]:
+                return False
+
+        return True
+
+    def find_unavailable_servers(self, resources={}):
+        """ Find the servers where the resources don't fit.
+
+        Returns:
+            set: Indexes of the servers.
+        """
+        return set(i for i in range(len(self.capacities))
+                   if not self.can_reserve(i, resources))
+
+    def is_full(self):
+        """ Check whether no more deployments fit on any server.
+        """
+        return len(self.find_unavailable_servers()) >= len(self.capacities)
+
+    def reserve(self, holder, server_idx, resources={}):
+        """ Reserve the resources on the server.
+
+        Arguments:
+            holder: Hashable key of the reservation (e.g., experiment index).
+            server_idx (int): Index of the server.
+            resources (dict): Resources to reserve.
+
+        Raises:
+            ValueError: When the holder has reserved or the resources don't
+                fit.
+        """
+        # Check whether the holder has reserved
+        if holder in self.reservations:
+            raise ValueError(
+                'Resources have been reserved by "{}"'.format(holder))
+
+        # Check whether the resources fit
+        if not self.can_reserve(server_idx, resources):
+            raise ValueError(
+                'Resources {} do not fit on server #{}'.format(
+                    resources, server_idx + 1))
+
+        # Add the slot to the resources
+        resources = self._add_slot(resources)
+
+        # Save the reservation
+        self.reservations[holder] = (server_idx, resources)
+
+        # Accumulate the reserved resources
+        reserved = self.reserved[server_idx]
+
+        for name, amount in resources.items():
+            reserved[name] = reserved.get(name, 0) + amount
+
+    def release(self, holder):
+        """ Release the resources reserved by the holder.
+
+        Nothing happens if the holder hasn't reserved any resources.
+        """
+        # Remove the reservation
+        reservation = self.reservations.pop(holder, None)
+
+        if reservation is None:
+            return
+
+        # Subtract the reserved resources
+        server_idx, resources = reservation
+        reserved = self.reserved[server_idx]
+
+        for name, amount in resources.items():
+            reserved[name] -= amount
+
+    def get_remaining(self, server_idx):
+        """ Get the remaining declared resources of the server.
+
+        Returns:
+            dict: The key is the resource name and the value is the remaining
+                amount.
+        """
+        # Get the capacities and reserved resources of the server
+        capacities = self.capacities[server_idx]
+        reserved = self.reserved[server_idx]
+
+        # Subtract the reserved resources from the capacities
+        return {name: capacity - reserved.get(name, 0)
+                for name, capacity in capacities.items()}
+
+    def _add_slot(self, resources):
+        # Each deployment takes one slot by default
+        resources = dict(resources)
+        resources.setdefault(slots_resource, 1)
+
+        return resources
@@ -0,0 +1,124 @@
+import collections
+import json
+import os
+
+from training_noodles.logger import Logger
+
+
+class ResumeState:
+    """ Deployment state rebuilt from the journal written by StatusWriter.
+
+    The state covers the latest run which is not resumed and all runs resumed
+    from it (i.e., events after the last "run_started" event without
+    "resumed").
+
+    Attributes:
+        finished_stages (set): Names of the finished stages.
+        deployed (dict): The key is the stage and the value is the set of names
+            of deployed experiments (including the empty experiments).
+        interrupted (dict): The key is the stage and the value is the set of
+            names of experiments whose deployments have started but not
+            finished.
+        last_rounds (dict): The key is the stage and the value is the last
+            round number.
+        server_deployment_counts (Counter): The key is the server name and the
+            value is the number of deployments on the server.
+    """
+
+    # Statuses of the deployments which are treated as deployed
+    deployed_statuses = ['success', 'continue', 'empty']
+
+    def __init__(self):
+        self.finished_stages = set()
+        self.deployed = collections.defaultdict(set)
+        self.interrupted = collections.defaultdict(set)
+        self.last_rounds = {}
+        self.server_deployment_counts = collections.Counter()
+
+    def apply_event(self, event):
+        """ Update the state by the event.
+
+        Arguments:
+            event (dict): Event in the journal.
+        """
+        # Get the name and stage of the event
+        name = event.get('event', None)
+        stage = event.get('stage', None)
+
+        if name == 'run_started':
+            # Start over when the run is not resumed
+            if not event.get('resumed', False):
+                self.__init__()
+        elif name == 'stage_finished':
+            self.finished_stages.add(stage)
+        elif name == 'round_started':
+            self.last_rounds[stage] = event.get('round', 0)
+        elif name == 'deployment_started':
+            self.interrupted[stage].add(event.get('experiment', ''))
+        elif name == 'deployment':
+            # Get the experiment name
+            exp_name = event.get('experiment', '')
+
+            # The deployment has finished
+            self.interrupted[stage].discard(exp_name)
+
+            # Check whether the experiment has been deployed
+            if event.get('status', None) in self.deployed_statuses:
+                self.deployed[stage].add(exp_name)
+
+                # Count the deployments on the server
+                server_name = event.get('server', None)
+
+                if server_name is not None:
+                    self.server_deployment_counts[server_name] += 1
+
+
+def read_resume_state(path):
+    """ Read the deployment state from the journal.
+
+    Arguments:
+        path (str): Path to the journal.
+
+    Returns:
+        ResumeState: The state, it's empty if the journal doesn't exist.
+    """
+    # Create a logger
+    logger = Logger('resume')
+
+    # Initialize the state
+    state = ResumeState()
+
+    # Check whether the journal exists
+    if not os.path.exists(path):
+        logger.warning('Journal "{}" does not exist, start over'.format(path))
+
+        return state
+
+    try:
+        with open(path, 'r') as fp:
+            # Iterate each line
+            for line_idx, line in enumerate(fp):
+                # Skip empty lines
+                if len(line.strip()) <= 0:
+                    continue
+
+                try:
+                    # Parse the event
+                    event = json.loads(line)
+                except ValueError:
+                    # The last line may be half-written when the process is
+                    # killed
+                    logger.warning(
+                        'Skip invalid line #{} in journal "{}"'.format(
+                            line_idx + 1, path))
+
+                    continue
+
+                # Update the state
+                state.apply_event(event)
+    except OSError:
+        logger.exception('Could not read the journal "{}"'.format(path))
+        raise
+
+    # Return the state
+    return state
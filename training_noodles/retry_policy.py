@@ -0,0 +1,235 @@
+import numbers
+import random
+import threading
+import time
+
+
+class RetryPolicy:
+    """ How to wait between the retries and when to give up.
+
+    The delay before the n-th retry (n starts from 1) is computed by the
+    backoff curve:
+    * constant: delay
+    * linear: delay * n
+    * exponential: delay * multiplier ^ (n - 1)
+
+    The delay is capped by "max_delay" and then randomized by the jitter:
+    * none: No randomization.
+    * full: Uniformly random in [0, delay].
+    * equal: Uniformly random in [delay / 2, delay].
+
+    The retries stop when there have been "max_attempts" attempts (including
+    the first attempt) or "max_elapsed" seconds have passed since the first
+    attempt, and the error is treated as "continue".
+    """
+
+    # Available backoff curves
+    backoffs = ['constant', 'linear', 'exponential']
+
+    # Available jitters
+    jitters = ['none', 'full', 'equal']
+
+    # Default options, which retry immediately and forever
+    defaults = {
+        'backoff': 'constant',
+        'delay': 0,
+        'multiplier': 2,
+        'max_delay': None,
+        'jitter': 'none',
+        'max_attempts': None,
+        'max_elapsed': None,
+    }
+
+    def __init__(self, spec={}):
+        """ Initialize the instance.
+
+        Arguments:
+            spec (dict): Retry policy spec, the missing options are filled by
+                the defaults.
+
+        Raises:
+            ValueError: When the spec is invalid.
+        """
+        # Check whether the spec is a dict
+        if not isinstance(spec, dict):
+            raise ValueError('Retry policy should be a dict: {}'.format(spec))
+
+        # Check whether there are unknown options
+        for name in spec.keys():
+            if name not in self.defaults:
+                raise ValueError('Unknown retry policy option "{}"'.format(
+                    name))
+
+        # Fill the missing options
+        spec = {**self.defaults, **spec}
+
+        # Save the options
+        self.backoff = spec['backoff']
+        self.delay = self._check_number('delay', spec['delay'])
+        self.multiplier = self._check_number(
+            'multiplier', spec['multiplier'])
+        self.max_delay = self._check_number(
+            'max_delay', spec['max_delay'], nullable=True)
+        self.jitter = spec['jitter']
+        self.max_attempts = self._check_number(
+            'max_attempts', spec['max_attempts'], nullable=True)
+        self.max_elapsed = self._check_number(
+            'max_elapsed', spec['max_elapsed'], nullable=True)
+
+        # Check whether the backoff curve is supported
+        if self.backoff not in self.backoffs:
+            raise ValueError('Unknown backoff "{}"'.format(self.backoff))
+
+        # Check whether the jitter is supported
+        if self.jitter not in self.jitters:
+            raise ValueError('Unknown jitter "{}"'.format(self.jitter))
+
+    def compute_delay(self, retry_idx, rand=random.random):
+        """ Compute the delay before the retry.
+
+        Arguments:
+            retry_idx (int): The retry number, starts from 1.
+            rand (callable): Function which returns a random float in [0, 1).
+
+        Returns:
+            float: The delay in seconds.
+        """
+        # Compute the delay by the backoff curve
+        if self.backoff == 'linear':
+            delay = self.delay * retry_idx
+        elif self.backoff == 'exponential':
+            delay = self.delay * self.multiplier ** (retry_idx - 1)
+        else:
+            delay = self.delay
+
+        # Cap the delay
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+
+        # Randomize the delay
+        if self.jitter == 'full':
+            delay = delay * rand()
+        elif self.jitter == 'equal':
+            delay = delay / 2 + delay / 2 * rand()
+
+        return delay
+
+    def _check_number(self, name, value, nullable=False):
+        # Check whether the value is null
+        if value is None and nullable:
+            return value
+
+        # Check whether the value is a non-negative number
+        if (not isinstance(value, numbers.Real) or isinstance(value, bool) or
+                value < 0):
+            raise ValueError(
+                'Retry policy option "{}" should be a non-negative number: {}'
+                .format(name, value))
+
+        return value
+
+
+class RetryStats:
+    """ Thread-safe counters of the retries.
+
+    Attributes:
+        num_retries (int): Number of retries.
+        num_exhausted (int): Number of retry loops which gave up since the
+            budget is spent.
+        wait_time (float): Total delay in seconds before the retries.
+    """
+
+    def __init__(self):
+        self.num_retries = 0
+        self.num_exhausted = 0
+        self.wait_time = 0.0
+
+        # Create the lock to protect the counters
+        self.lock = threading.Lock()
+
+    def record_retry(self, delay):
+        with self.lock:
+            self.num_retries += 1
+            self.wait_time += delay
+
+    def record_exhausted(self):
+        with self.lock:
+            self.num_exhausted += 1
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'Retries': self.num_retries,
+                'Exhausted retries': self.num_exhausted,
+                'Retry wait time (s)': self.wait_time,
+            }
+
+
+class RetryBudget:
+    """ The state of one retry loop (e.g., checking a requirement on a server).
+
+    The policy can be replaced before each retry (e.g., by the policy of the
+    matched error handler).
+    """
+
+    def __init__(self, policy, stats=None, clock=time.time,
+                 rand=random.random):
+        """ Initialize the instance.
+
+        Arguments:
+            policy (RetryPolicy): The policy to follow.
+            stats (RetryStats): The counters to update. Set to "None" to skip
+                the counting.
+            clock (callable): Function which returns current time.
+            rand (callable): Function which returns a random float in [0, 1).
+        """
+        self.policy = policy
+        self.stats = stats
+        self.clock = clock
+        self.rand = rand
+
+        # Initialize the number of attempts, the first attempt is running
+        self.num_attempts = 1
+
+        # Save the time of the first attempt
+        self.start_time = clock()
+
+    def next_delay(self):
+        """ Get the delay before the next attempt.
+
+        Returns:
+            float: The delay in seconds, None if the budget is spent.
+        """
+        # Get the policy
+        policy = self.policy
+
+        # Get the elapsed time since the first attempt
+        elapsed = self.clock() - self.start_time
+
+        # Check whether the budget is spent
+        if ((policy.max_attempts is not None and
+             self.num_attempts >= policy.max_attempts) or
+                (policy.max_elapsed is not None and
+                 elapsed >= policy.max_elapsed)):
+            # Count the exhausted retries
+            if self.stats is not None:
+                self.stats.record_exhausted()
+
+            return None
+
+        # Compute the delay
+        delay = policy.compute_delay(self.num_attempts, rand=self.rand)
+
+        # Don't wait beyond the maximum elapsed time
+        if policy.max_elapsed is not None:
+            delay = min(delay, policy.max_elapsed - elapsed)
+
+        # Count the attempt
+        self.num_attempts += 1
+
+        # Count the retry
+        if self.stats is not None:
+            self.stats.record_retry(delay)
+
+        # Return the delay
+        return delay
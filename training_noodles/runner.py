@@ -1,22 +1,41 @@
-import ast
+import collections
+import heapq
 import json
-import re
+import os
+import signal
+import threading
 import time
-
-import oyaml as yaml
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from training_noodles.commands_runner import CommandsRunner
+from training_noodles.dependency_graph import DependencyGraph
+from training_noodles.gpu_allocator import GPUAllocator
 from training_noodles.logger import Logger
+from training_noodles.metric_aggregation import (
+    aggregate_metric, parse_metric_values)
+from training_noodles.metric_cache import MetricCache
+from training_noodles.metric_matrix import MetricMatrix
+from training_noodles.output_buffer import LineStreamer, OutputHandle
+from training_noodles.placement import PlacementContext, choose_server
+from training_noodles.resource_ledger import ResourceLedger
+from training_noodles.retry_policy import RetryBudget, RetryPolicy, RetryStats
+from training_noodles.resume_state import read_resume_state
+from training_noodles.scheduler import Scheduler
+from training_noodles.ssh_pool import SSHConnectionPool
 from training_noodles.data_structure_utils import (
     update_dict_with_missing, wrap_with_list)
-from training_noodles.spec import read_user_spec
+from training_noodles.spec import compile_user_spec, read_user_spec
+from training_noodles.status_writer import StatusWriter
 from training_noodles.string_utils import (
-    has_environment_variable, parse_requirement_expression, split_by_scheme)
+    expand_environment_variables, has_environment_variable,
+    split_requirement_id)
+from training_noodles.temp_files_helper import create_temp_files_backend
 from training_noodles.time_utils import convert_unix_time_to_iso
 
 
 class Runner:
-    def __init__(self, command_type, user_spec_path, verbose=False):
+    def __init__(self, command_type, user_spec_path, verbose=False,
+                 resume=False):
         # Save the command type
         self.command_type = command_type
 
@@ -26,22 +45,60 @@ class Runner:
         # Save the logging variable
         self.verbose = verbose
 
+        # Save whether to resume from the journal
+        self.resume = resume
+
         # Read the spec
         self.user_spec = read_user_spec(self.user_spec_path)
 
+        # Compile the requirement expressions and error handlers
+        self.compiled_spec = compile_user_spec(self.user_spec)
+
         # Create a commands runner
         shell_string = self.user_spec.get('shell_string', None)
         shell_stdin = self.user_spec.get('shell_stdin', None)
+        output_buffer = self._get_output_buffer_spec()
+        ssh = self._get_ssh_spec()
         self.commands_runner = CommandsRunner(
-            shell_string=shell_string, shell_stdin=shell_stdin)
+            shell_string=shell_string, shell_stdin=shell_stdin,
+            command_timeout=self._get_timeouts_spec().get('commands', None),
+            output_head_size=output_buffer.get('head_size', None),
+            output_tail_size=output_buffer.get('tail_size', None),
+            ssh_command=ssh.get('command', 'ssh'),
+            ssh_pool=self._create_ssh_pool(),
+            shell_sessions=self.user_spec.get('shell_sessions', False),
+            direct_local_exec=self.user_spec.get('direct_local_exec', False),
+            temp_files_backend=self._create_temp_files_backend())
+
+        # Create a scheduler to decide when to start the next round
+        self.scheduler = Scheduler(self._get_scheduler_spec())
+
+        # Create a cache of metrics shared across rounds
+        self.metric_cache = MetricCache()
+
+        # Create the allocator of GPUs shared across the run
+        self.gpu_allocator = self._create_gpu_allocator()
+
+        # Create the counters of retries
+        self.retry_stats = RetryStats()
+
+        # Initialize the times until which the servers are skipped after the
+        # deployments, the key is the server index
+        self.server_settle_times = {}
 
         # Initialize other attributes
+        self.server_deployment_counts = collections.Counter()
+        self.status_writer = None
+        self.resume_state = None
         self.start_time = None
         self.stage = None
         self.undeployed = None
         self.round_idx = None
         self.prev_round_time = None
-        self.running_response_commands = False
+
+        # Initialize the states local to each thread (e.g., whether response
+        # commands are running)
+        self.thread_states = threading.local()
 
         # Create a logger
         self.logger = Logger('run')
@@ -56,14 +113,63 @@ class Runner:
         # Save the first timestamp
         self.start_time = time.time()
 
-        # Deploy "before all" experiments
-        self._deploy_stage('before_all_experiments')
+        # Remove the temporary files left by the crashed runs
+        self.commands_runner.remove_leftover_temp_files()
+
+        # Create the writer of deployment status and journal
+        self.status_writer = self._create_status_writer()
+
+        # Read the deployment state of previous runs from the journal
+        if self.resume:
+            self._read_resume_state()
+
+        # Record the start of the run
+        self.status_writer.append_event(
+            'run_started', command_type=self.command_type,
+            user_spec_path=self.user_spec_path, resumed=self.resume)
+
+        # Handle the termination signal to flush the deployment status
+        prev_handlers = self._install_signal_handlers()
+
+        try:
+            # Open the persistent SSH connections in advance
+            if self._get_ssh_spec().get('prewarm', False):
+                self.commands_runner.open_connections(
+                    self._get_server_specs())
+
+            # Deploy "before all" experiments
+            self._deploy_stage('before_all_experiments')
+
+            # Deploy main experiments
+            num_success, total = self._deploy_stage('experiments')
+
+            # Deploy "after all" experiments
+            self._deploy_stage('after_all_experiments')
+
+            # Record the finish of the run
+            self.status_writer.append_event('run_finished')
+        except (KeyboardInterrupt, SystemExit):
+            # Log the interruption
+            self.logger.warning(
+                'Interrupted, write the deployment status before exiting')
+
+            # Record the interruption
+            self.status_writer.append_event(
+                'run_interrupted', stage=self.stage)
+
+            # Write the unwritten deployment status
+            self._write_deployment_status(force=True)
+
+            raise
+        finally:
+            # Restore the signal handlers
+            self._restore_signal_handlers(prev_handlers)
 
-        # Deploy main experiments
-        num_success, total = self._deploy_stage('experiments')
+            # Close the long-lived shells and the persistent SSH connections
+            self.commands_runner.close()
 
-        # Deploy "after all" experiments
-        self._deploy_stage('after_all_experiments')
+            # Close the journal
+            self.status_writer.close()
 
         # Calculate total elapsed time
         elapsed = time.time() - self.start_time
@@ -83,7 +189,7 @@ class Runner:
                 percentage, num_success, total, self.command_type))
 
     def _deploy_stage(self, stage):
-       # Initialize total number of successful deployments
+        # Initialize total number of successful deployments
         total_num_success = 0
 
         # Save the current stage
@@ -92,51 +198,79 @@ class Runner:
         # Get number of experiments in the stage
         num_exps = self._count_experiments(self.stage)
 
+        # Build the dependency graph of the stage
+        self.dependency_graph = self._build_dependency_graph(self.stage)
+
+        # Find the empty experiments, which are deployed without checking
+        # their dependencies
+        self.empty_exps = self._find_empty_experiments(self.stage)
+
         # Initialize a set of indexes of deployed experiments
         self.deployed = set()
 
         # Initialize a set of indexes of undeployed experiments
         self.undeployed = set(range(num_exps))
 
+        # Initialize the index of the first round
+        self.round_idx = 0
+
+        # Restore the deployed experiments of previous runs
+        if self.resume_state is not None:
+            # Skip the stage if it has finished
+            if self.stage in self.resume_state.finished_stages:
+                self.logger.info(
+                    'Stage "{}" has finished in previous runs, skip'.format(
+                        self.stage))
+
+                return num_exps, num_exps
+
+            # Count the restored experiments as successful deployments
+            total_num_success += self._restore_deployed_experiments()
+
+        # Save the index of the first round in this run
+        start_round_idx = self.round_idx
+
         # Log the start
         self.logger.info('Start stage "{}"'.format(self.stage))
 
         # Deploy all remaining experiments until there are none
-        self.round_idx = 0
         self.prev_round_time = time.time()
 
+        # Record the start of the stage
+        self.status_writer.append_event(
+            'stage_started', stage=self.stage, num_experiments=num_exps)
+
         # Write the initial deployment status
-        self._write_deployment_status()
+        self._write_deployment_status(force=True)
+
+        # Discard the events notified in previous stages
+        self.scheduler.pop_events()
 
         while len(self.undeployed) > 0:
             # Log the deployment round
             self._log_round()
 
             # Wait for next round
-            if self.round_idx > 0:
+            if self.round_idx > start_round_idx:
                 self._wait_for_next_round()
 
-            # Create undeployed experiments
-            filtered_exps = self._filter_undeployed_experiments(
-                stage, self.undeployed)
+            # Record the start of the round
+            self.status_writer.append_event(
+                'round_started', stage=self.stage, round=self.round_idx + 1)
 
-            # Try to deploy each experiment to one of the satisfied servers
-            filtered_deployed, num_success = self._deploy_experiment_specs(
-                filtered_exps, self.undeployed)
-
-            # Restore unfiltered indexes
-            round_deployed = self._restore_unfiltered_indexes(
-                self.undeployed, filtered_deployed)
+            # Collect the experiments which are ready to be deployed
+            candidates = self._collect_candidate_experiments()
 
-            # Add deployed indexes
-            self.deployed |= round_deployed
-
-            # Remove deployed indexes
-            self.undeployed -= round_deployed
+            # Try to deploy each experiment to one of the satisfied servers
+            num_success = self._deploy_experiment_specs(candidates)
 
             # Accumulate number of successful deployments
             total_num_success += num_success
 
+            # Write the unwritten deployment status before waiting for the next
+            # round, so the status file isn't stale for a whole round interval
+            self._write_deployment_status(force=True)
+
             # Log the round time
             self._log_round_time()
 
@@ -146,35 +280,163 @@ class Runner:
             # Increment round index
             self.round_idx += 1
 
+        # Record the finish of the stage
+        self.status_writer.append_event('stage_finished', stage=self.stage)
+
         # Log the finish
         self.logger.info('Finished stage "{}"'.format(stage))
 
         # Return the ratio of successful deployments
         return total_num_success, num_exps
 
-    def _write_deployment_status(self, filtered_deployed=set()):
-        # Check whether it's the main stage
-        if self.stage != 'experiments':
-            return
+    def _read_resume_state(self):
+        # Get the journal path
+        journal_path = self.status_writer.journal_path
 
-        # Get the output path
-        write_path = self._get_write_status_to_spec()
+        # Check whether the journal is written
+        if journal_path is None:
+            self.logger.raise_error(
+                ('Spec option "write_journal_to" of command type "{}" is' +
+                 ' required to resume').format(self.command_type))
 
-        # Check whether to write
-        if write_path is None:
-            return
+        # Log the resume
+        self.logger.info('Resume from journal "{}"'.format(journal_path))
 
-        # Calculate elapsed time
-        elapsed_time = time.time() - self.start_time
+        # Read the state
+        self.resume_state = read_resume_state(journal_path)
+
+        # Restore the number of deployments on each server
+        for server_idx, server_spec in enumerate(self._get_server_specs()):
+            count = self.resume_state.server_deployment_counts.get(
+                server_spec.get('name', ''), 0)
+
+            if count > 0:
+                self.server_deployment_counts[server_idx] = count
+
+    def _restore_deployed_experiments(self):
+        # Get all experiment names in the stage
+        exp_names = self._get_experiment_names(
+            self._get_experiment_specs(self.stage))
+
+        # Get the names of deployed experiments in previous runs
+        deployed_names = self.resume_state.deployed.get(self.stage, set())
+
+        # Initialize the number of restored experiments
+        num_restored = 0
+
+        # Iterate each experiment
+        for exp_idx, exp_name in enumerate(exp_names):
+            if exp_name in deployed_names:
+                # Move the experiment to deployed indexes
+                self.undeployed.discard(exp_idx)
+                self.deployed.add(exp_idx)
+
+                # Update the dependency graph
+                self.dependency_graph.mark_deployed(exp_idx)
+
+                # Count the restored experiment
+                num_restored += 1
+
+        # Warn the interrupted deployments, which will be deployed again
+        interrupted_names = [
+            exp_name for exp_name in exp_names
+            if exp_name in self.resume_state.interrupted.get(self.stage, set())
+            and exp_name not in deployed_names]
+
+        if len(interrupted_names) > 0:
+            self.logger.warning(
+                ('Deployments of experiments {} were interrupted in previous' +
+                 ' runs, they will be deployed again').format(
+                    json.dumps(interrupted_names)))
+
+        # Continue the round number of previous runs
+        self.round_idx = self.resume_state.last_rounds.get(self.stage, 0)
+
+        # Log the restored experiments
+        if num_restored > 0:
+            self.logger.info(
+                'Restored {} deployed experiments in stage "{}"'.format(
+                    num_restored, self.stage))
 
+        # Return the number of restored experiments
+        return num_restored
+
+    def _install_signal_handlers(self):
+        # Signal handlers can only be installed in the main thread
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        # Build the handler to exit like SIGINT (KeyboardInterrupt), so the
+        # deployment status can be written before exiting
+        def handle(signum, frame):
+            raise SystemExit(128 + signum)
+
+        # Install the handler and return the previous handlers
+        return {signal.SIGTERM: signal.signal(signal.SIGTERM, handle)}
+
+    def _restore_signal_handlers(self, prev_handlers):
+        for signum, handler in prev_handlers.items():
+            signal.signal(signum, handler)
+
+    def _create_ssh_pool(self):
+        # Get the SSH spec
+        ssh = self._get_ssh_spec()
+
+        # Check whether to keep persistent connections
+        if not ssh.get('multiplexing', False):
+            return None
+
+        # Create the pool and return
+        return SSHConnectionPool(
+            ssh_command=ssh.get('command', 'ssh'),
+            connect_timeout=ssh.get('connect_timeout', 10),
+            check_interval=ssh.get('check_interval', 60))
+
+    def _create_temp_files_backend(self):
+        # Get the temporary files spec
+        temp_files = self._get_temp_files_spec()
+
+        # Create the backend and return
+        return create_temp_files_backend(
+            backend=temp_files.get('backend', 'disk'),
+            **{k: v for k, v in temp_files.items() if k != 'backend'})
+
+    def _create_status_writer(self):
         # Get default experiment spec
         default_exp_spec = self._get_default_experiment_spec()
 
         # Get default experiment environment variables
         envs = self._get_experiment_details(default_exp_spec, 'envs')
 
-        # Evaluate the path
-        write_path = self._evaluate_expression(write_path, envs=envs)
+        # Get the paths
+        snapshot_path = self._get_write_status_to_spec()
+        journal_path = self._get_write_journal_to_spec()
+
+        # Evaluate the paths once
+        paths = {'snapshot': snapshot_path, 'journal': journal_path}
+        paths = {k: v for k, v in paths.items() if v is not None}
+
+        paths = self._evaluate_expressions(paths, envs=envs)
+
+        snapshot_path = paths.get('snapshot', None)
+        journal_path = paths.get('journal', None)
+
+        # Create the writer and return
+        return StatusWriter(
+            snapshot_path=snapshot_path, journal_path=journal_path,
+            interval=self._get_write_status_interval_spec())
+
+    def _write_deployment_status(self, force=False):
+        # Check whether it's the main stage
+        if self.stage != 'experiments':
+            return
+
+        # Check whether to write, the writes are debounced
+        if not self.status_writer.should_write_snapshot(force=force):
+            return
+
+        # Calculate elapsed time
+        elapsed_time = time.time() - self.start_time
 
         # Get the experiments in the stage
         exps_spec = self._get_experiment_specs('experiments')
@@ -182,17 +444,11 @@ class Runner:
         # Get all experiment names
         exp_names = self._get_experiment_names(exps_spec)
 
-        # Restore deployed experiment indexes in current round
-        round_deployed = self._restore_unfiltered_indexes(
-            self.undeployed, filtered_deployed)
+        # Sort the deployed indexes
+        cur_deployed = sorted(self.deployed)
 
-        # Combine previously deployed indexes with current deployed indexes
-        # and sort the result
-        cur_deployed = sorted(self.deployed | round_deployed)
-
-        # Remove current deployed indexes from previously undeployed indexes
-        # and sort the result
-        cur_undeployed = sorted(self.undeployed - round_deployed)
+        # Sort the undeployed indexes
+        cur_undeployed = sorted(self.undeployed)
 
         # Build deployed experiment names
         deployed_names = list(
@@ -215,73 +471,87 @@ class Runner:
             'Deployed experiments': deployed_names,
             'Undeployed experiments': undeployed_names,
             'Undeployed experiments (For command)': ','.join(undeployed_names),
+            'Retry statistics': self.retry_stats.to_dict(),
         }
 
-        # Serialize the status into YAML string
-        status = yaml.dump(status)
-
         # Write the status
-        self._write_to_file(status, write_path)
+        self.status_writer.write_snapshot(status)
+
+    def _deploy_experiment_specs(self, candidates):
+        """ Deploy the candidate experiments in a deployment round.
+
+        Arguments:
+            candidates (list): Heap of indexes of experiments which are ready
+                to be deployed, the experiments which become ready during the
+                round are pushed into the heap.
+
+        Returns:
+            int: Number of successful deployments.
+        """
+        # Get the maximum number of deployments in flight
+        num_workers = self._get_deployment_workers_spec()
+
+        # Check whether to deploy the experiments concurrently
+        if num_workers > 1:
+            return self._deploy_experiment_specs_concurrently(
+                candidates, num_workers)
 
-    def _deploy_experiment_specs(self, exps_spec, undeployed):
         # Initialize set of deployed experiment indexes
         deployed_exps = set()
 
-        # Initialize set of deployed server indexes
-        deployed_servers = set()
+        # Create the ledger of resources reserved on the servers
+        ledger = self._create_resource_ledger()
 
         # Initialize the number of successful deployments
         num_success = 0
 
-        # Get experiment names
-        exp_names = self._get_experiment_names(exps_spec)
+        # Get the experiments in the stage
+        exps_spec = self._get_experiment_specs(self.stage)
 
         # Get server specs
         servers_spec = self._get_server_specs()
 
         # Initialize the empty metrics
-        metrics = {}
+        metrics = MetricMatrix()
 
-        # Iterate each experiment spec
-        for exp_idx, exp_spec in enumerate(exps_spec):
-            # Get the experiment name
-            exp_name = exp_spec.get('name', '')
+        # Get the servers deployed in the previous rounds which the probes may
+        # not see the experiments on yet
+        settling = self._find_settling_servers()
 
-            # Log the experiment
-            self._log_verbose('Try to deploy experiment "{}"'.format(exp_name))
+        # Deploy the candidates in the order of experiment indexes
+        while len(candidates) > 0:
+            # Get the candidate with the smallest index
+            exp_idx = heapq.heappop(candidates)
 
-            # Check whether the experiment is empty
-            if self._check_empty_experiment(exp_spec):
-                # Log the skip
-                self._log_verbose('Experiment "{}" is empty, skip'.format(
-                    exp_name))
+            # Skip the experiment which has been deployed in this round (e.g.,
+            # an empty experiment pushed again when its dependency is
+            # deployed)
+            if exp_idx not in self.undeployed:
+                continue
 
-                # Add the experiment index to the deployed experiment indexes
-                deployed_exps.add(exp_idx)
+            # Get the experiment spec
+            exp_spec = exps_spec[exp_idx]
 
-                # Increment the number of successful deployments
+            # Check whether the experiment is empty
+            if self._deploy_empty_experiment(
+                    exp_spec, exp_idx, deployed_exps, candidates):
+                # Count the empty experiment as a successful deployment
                 num_success += 1
 
                 # Continue to next experiment
                 continue
 
-            # Get the undeployed experiment dependencies
-            undeployed_deps = self._get_undeployed_experiment_dependencies(
-                undeployed, exp_names, exp_spec, deployed_exps)
+            # Get the resources reserved by the experiment
+            reservations = self._get_experiment_reservations(exp_spec)
 
-            # Check whether there are still some undeployed dependencies
-            if len(undeployed_deps) > 0:
-                # Log the skip
-                self._log_verbose(('Experiment "{}" depends on experiments' +
-                                   ' which are still undeployed: {}').format(
-                                       exp_name, json.dumps(undeployed_deps)))
-
-                # Continue to next experiment
-                continue
+            # Get the servers where the reservations don't fit or which are
+            # settling
+            unavailable = ledger.find_unavailable_servers(
+                reservations) | settling
 
             # Find satisfied servers and update metrics lazily
             satisfied_servers = self._update_metrics_and_find_servers(
-                exp_spec, metrics, deployed_servers)
+                exp_spec, metrics, unavailable)
 
             # Check whether there are any satisfied servers
             if len(satisfied_servers) > 0:
@@ -289,66 +559,419 @@ class Runner:
                 if len(deployed_exps) > 0:
                     self._wait_for_next_deployment()
 
-                # Choose the first satisfied server
-                server_idx = next(iter(satisfied_servers))
+                # Choose a satisfied server by the placement policy
+                server_idx = self._choose_server(
+                    exp_spec, satisfied_servers, metrics, unavailable)
+
+                # Reserve the resources on the server
+                self._reserve_resources(
+                    ledger, exp_idx, server_idx, reservations)
+
+                # Allocate the GPUs on the server
+                gpu_idxs = self._allocate_gpus(exp_spec, exp_idx, server_idx)
 
                 # Get server spec
                 server_spec = servers_spec[server_idx]
 
                 # Log the deployment
-                self._log_deployment_to_server(exp_name, server_spec)
+                self._log_deployment_to_server(
+                    exp_spec.get('name', ''), server_spec)
 
                 # Build the environment variables
-                envs = self._build_experiment_envs(exp_spec, server_spec)
+                envs = self._build_experiment_envs(
+                    exp_spec, server_spec, gpu_idxs=gpu_idxs)
 
                 # Deploy the experiment to the server
-                status, stdout, stderr = self._deploy_experiment_to_server(
+                outputs = self._deploy_experiment_to_server(
                     exp_spec, server_spec, envs)
 
-                # Log outputs to terminal
-                self._log_experiment_outputs(
-                    exp_spec, status, stdout, stderr, envs)
-
-                # Update deployed indexes by status
-                self._update_deployed_indexes_by_status(
-                    status, deployed_exps, deployed_servers, exp_idx,
-                    server_idx, exp_name)
-
-                # Check whether the deployment is successful
-                if status == 'success' or status == 'continue':
-                    # Write the deployment status
-                    self._write_deployment_status(
-                        filtered_deployed=deployed_exps)
-
-                    # Increment the number of successful deployments
-                    num_success += 1
+                # Update the deployment bookkeeping by the outputs
+                num_success += self._finish_experiment_deployment(
+                    exp_spec, exp_idx, server_idx, envs, outputs,
+                    deployed_exps, ledger, candidates)
 
             # Check whether there are no available servers in this
             # deployment
-            if len(deployed_servers) >= len(servers_spec):
+            if ledger.is_full():
                 # Log the break
                 self._log_verbose('No available servers, skip the deployment')
 
                 break
 
-        # Return the deployed experiment indexes and number of successful
-        # deployments
-        return deployed_exps, num_success
+        # Return the number of successful deployments
+        return num_success
+
+    def _deploy_experiment_specs_concurrently(self, candidates, num_workers):
+        # Initialize set of deployed experiment indexes
+        deployed_exps = set()
+
+        # Create the ledger of resources reserved on the servers, the
+        # resources of deployments in flight are also reserved
+        ledger = self._create_resource_ledger()
+
+        # Initialize the number of successful deployments
+        num_success = 0
+
+        # Get the experiments in the stage
+        exps_spec = self._get_experiment_specs(self.stage)
+
+        # Get server specs
+        servers_spec = self._get_server_specs()
+
+        # Initialize the empty metrics
+        metrics = MetricMatrix()
+
+        # Get the servers deployed in the previous rounds which the probes may
+        # not see the experiments on yet
+        settling = self._find_settling_servers()
+
+        # Initialize the deployments in flight, the key is the future and the
+        # value is (experiment index, server index, environment variables)
+        in_flight = {}
+
+        # Build the function to finish the completed deployments
+        def finish(futures):
+            # Initialize the number of successful deployments
+            num_finished_success = 0
+
+            # Iterate each completed deployment
+            for future in futures:
+                # Remove the deployment from the deployments in flight
+                exp_idx, server_idx, envs = in_flight.pop(future)
+
+                # Update the deployment bookkeeping by the outputs, the errors
+                # raised in the deployment are raised again here
+                num_finished_success += self._finish_experiment_deployment(
+                    exps_spec[exp_idx], exp_idx, server_idx, envs,
+                    future.result(), deployed_exps, ledger, candidates)
+
+            # Return the number of successful deployments
+            return num_finished_success
+
+        # Build the function to wait for any deployment to finish
+        def wait_for_any():
+            done, _ = wait(in_flight.keys(), return_when=FIRST_COMPLETED)
+
+            return finish(done)
+
+        # Log the concurrent deployment
+        self._log_verbose(
+            'Deploy experiments with at most {} deployments in flight'.format(
+                num_workers))
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            try:
+                while len(candidates) > 0 or len(in_flight) > 0:
+                    # Finish the deployments which have already completed
+                    num_success += finish(
+                        [f for f in list(in_flight.keys()) if f.done()])
+
+                    # Wait until a server is free, all servers are deployed or
+                    # some experiment becomes ready
+                    while (len(in_flight) > 0 and
+                           (len(in_flight) >= num_workers or
+                            ledger.is_full() or
+                            len(candidates) <= 0)):
+                        num_success += wait_for_any()
+
+                    # Check whether there are no candidates left
+                    if len(candidates) <= 0:
+                        break
+
+                    # Get the candidate with the smallest index
+                    exp_idx = heapq.heappop(candidates)
+
+                    # Skip the experiment which has been deployed in this
+                    # round (e.g., an empty experiment pushed again when its
+                    # dependency is deployed)
+                    if exp_idx not in self.undeployed:
+                        continue
+
+                    # Get the experiment spec
+                    exp_spec = exps_spec[exp_idx]
+
+                    # Check whether the experiment is empty
+                    if self._deploy_empty_experiment(
+                            exp_spec, exp_idx, deployed_exps, candidates):
+                        # Count the empty experiment as a successful deployment
+                        num_success += 1
+
+                        # Continue to next experiment
+                        continue
+
+                    # Check whether there are no available servers in this
+                    # deployment
+                    if ledger.is_full():
+                        # Log the break
+                        self._log_verbose(
+                            'No available servers, skip the deployment')
+
+                        break
+
+                    # Get the resources reserved by the experiment
+                    reservations = self._get_experiment_reservations(exp_spec)
+
+                    # Get the servers where the reservations don't fit,
+                    # including the resources of deployments in flight, or
+                    # which are settling
+                    unavailable = ledger.find_unavailable_servers(
+                        reservations) | settling
+
+                    # Find satisfied servers among the available servers, and
+                    # update metrics lazily
+                    satisfied_servers = self._update_metrics_and_find_servers(
+                        exp_spec, metrics, unavailable)
+
+                    # Check whether there are any satisfied servers
+                    if len(satisfied_servers) > 0:
+                        # Wait for next deployment
+                        if len(deployed_exps) > 0 or len(in_flight) > 0:
+                            self._wait_for_next_deployment()
+
+                        # Choose a satisfied server by the placement policy
+                        server_idx = self._choose_server(
+                            exp_spec, satisfied_servers, metrics, unavailable)
+
+                        # Reserve the resources on the server
+                        self._reserve_resources(
+                            ledger, exp_idx, server_idx, reservations)
+
+                        # Allocate the GPUs on the server
+                        gpu_idxs = self._allocate_gpus(
+                            exp_spec, exp_idx, server_idx)
+
+                        # Get server spec
+                        server_spec = servers_spec[server_idx]
+
+                        # Log the deployment
+                        self._log_deployment_to_server(
+                            exp_spec.get('name', ''), server_spec)
+
+                        # Build the environment variables
+                        envs = self._build_experiment_envs(
+                            exp_spec, server_spec, gpu_idxs=gpu_idxs)
+
+                        # Deploy the experiment to the server in the background
+                        future = executor.submit(
+                            self._deploy_experiment_to_server, exp_spec,
+                            server_spec, envs)
+
+                        # Save the deployment in flight
+                        in_flight[future] = (exp_idx, server_idx, envs)
+
+                # Wait for all remaining deployments to finish
+                while len(in_flight) > 0:
+                    num_success += wait_for_any()
+            except (KeyboardInterrupt, SystemExit):
+                # Log the deployments in flight
+                self.logger.warning(
+                    'Interrupted, wait for {} deployments in flight'.format(
+                        len(in_flight)))
+
+                # Record the outcomes of the deployments in flight
+                try:
+                    finish(wait(in_flight.keys())[0])
+                except Exception:
+                    self.logger.exception(
+                        'Could not finish the deployments in flight')
+
+                raise
+
+        # Return the number of successful deployments
+        return num_success
+
+    def _deploy_empty_experiment(
+            self, exp_spec, exp_idx, deployed_exps, candidates):
+        # Get the experiment name
+        exp_name = exp_spec.get('name', '')
+
+        # Log the experiment
+        self._log_verbose('Try to deploy experiment "{}"'.format(exp_name))
+
+        # Check whether the experiment is empty
+        if exp_idx not in self.empty_exps:
+            return False
+
+        # Log the skip
+        self._log_verbose('Experiment "{}" is empty, skip'.format(exp_name))
+
+        # Record the deployment
+        self._append_deployment_event(exp_name, exp_idx, None, 'empty')
+
+        # Add the experiment index to the deployed experiment indexes
+        deployed_exps.add(exp_idx)
+
+        # Mark the experiment as deployed
+        self._mark_experiment_deployed(exp_idx, candidates)
+
+        return True
+
+    def _finish_experiment_deployment(
+            self, exp_spec, exp_idx, server_idx, envs, outputs, deployed_exps,
+            ledger, candidates):
+        # Get the experiment name
+        exp_name = exp_spec.get('name', '')
+
+        # Unpack the status and outputs
+        status, stdout, stderr = outputs
+
+        # Log outputs to terminal
+        self._log_experiment_outputs(exp_spec, status, stdout, stderr, envs)
+
+        # Update deployed indexes by status
+        self._update_deployed_indexes_by_status(
+            status, deployed_exps, ledger, exp_idx, exp_name)
+
+        # Record the deployment
+        self._append_deployment_event(exp_name, exp_idx, server_idx, status)
+
+        # Check whether the deployment is successful
+        if status == 'success' or status == 'continue':
+            # Mark the experiment as deployed
+            self._mark_experiment_deployed(exp_idx, candidates)
+
+            # Count the deployments on the server
+            self.server_deployment_counts[server_idx] += 1
+
+            # Remove the cached metrics which are outdated by the deployment
+            self.metric_cache.invalidate_server(server_idx)
+
+            # Skip the server in the next rounds until the experiment has
+            # settled
+            self._settle_server(server_idx)
+
+            # Write the deployment status
+            self._write_deployment_status()
+
+            # Notify the scheduler that the server has been deployed
+            self.scheduler.notify('deployment_finished')
+
+            # Return the number of successful deployments
+            return 1
+        else:
+            return 0
+
+    def _settle_server(self, server_idx):
+        # Get the settle time
+        settle_time = self._get_settle_time_spec()
+
+        # Check whether the settle time is zero
+        if settle_time <= 0:
+            return
+
+        # Save the time when the server has settled
+        settled_time = time.time() + settle_time
+
+        self.server_settle_times[server_idx] = settled_time
+
+        # Check the server again when it has settled
+        self.scheduler.add_recheck_time(settled_time)
+
+    def _find_settling_servers(self):
+        # Get current time
+        now = time.time()
+
+        # Find the servers which haven't settled
+        settling = set(
+            server_idx
+            for server_idx, settled_time in self.server_settle_times.items()
+            if settled_time > now)
+
+        # Log the settling servers
+        if len(settling) > 0:
+            self._log_verbose('Skip the settling servers: {}'.format(
+                json.dumps(sorted(i + 1 for i in settling))))
+
+        # Return the server indexes
+        return settling
+
+    def _append_deployment_event(self, exp_name, exp_idx, server_idx, status):
+        # Get the server name
+        if server_idx is None:
+            server_name = None
+        else:
+            server_name = self._get_server_specs()[server_idx].get('name', '')
+
+        # Append the event to the journal
+        self.status_writer.append_event(
+            'deployment', stage=self.stage, round=self.round_idx + 1,
+            experiment=exp_name, experiment_index=exp_idx, server=server_name,
+            server_index=server_idx, status=status)
+
+    def _mark_experiment_deployed(self, exp_idx, candidates):
+        # Move the experiment from undeployed indexes to deployed indexes
+        self.undeployed.discard(exp_idx)
+        self.deployed.add(exp_idx)
+
+        # Update the dependency graph and get the newly ready experiments
+        newly_ready = self.dependency_graph.mark_deployed(exp_idx)
+
+        # Add the newly ready experiments to the candidates of this round
+        for ready_idx in newly_ready:
+            if ready_idx in self.undeployed:
+                heapq.heappush(candidates, ready_idx)
+
+        # Notify the scheduler when some dependencies have been deployed
+        if len(newly_ready) > 0:
+            self.scheduler.notify('dependency_deployed')
 
     def _deploy_experiment_to_server(self, exp_spec, server_spec, envs):
+        # Record the start of the deployment
+        self.status_writer.append_event(
+            'deployment_started', stage=self.stage, round=self.round_idx + 1,
+            experiment=exp_spec.get('name', ''),
+            server=server_spec.get('name', ''))
+
         # Get experiment commands
         commands = self._get_experiment_details(exp_spec, 'commands')
 
         # Build the user files
         user_files = self._build_user_files(exp_spec, envs)
 
+        # Create the streamers to log the outputs as they arrive
+        streamers = self._create_output_streamers(exp_spec)
+
+        if streamers is None:
+            on_output = None
+        else:
+            def on_output(stream, chunk):
+                streamers[stream].write(chunk)
+
         # Deploy the experiment to the server
         status, stdout, stderr = self._run_commands(
-            server_spec, commands, user_files=user_files, envs=envs)
+            server_spec, commands, user_files=user_files, envs=envs,
+            timeout=self._get_experiment_timeout(exp_spec),
+            on_output=on_output)
+
+        # Log the remaining incomplete lines
+        if streamers is not None:
+            for streamer in streamers.values():
+                streamer.flush()
 
         # Return the status and outputs
         return status, stdout, stderr
 
+    def _create_output_streamers(self, exp_spec):
+        # Check whether to stream the outputs
+        if not self._get_output_buffer_spec().get('stream', False):
+            return None
+
+        # Get the experiment name to tell the concurrent deployments apart
+        exp_name = exp_spec.get('name', '')
+
+        # Build the function to log the lines of each stream
+        def build_emit(log, stream_name):
+            def emit(line):
+                log('[{}] {}: {}'.format(exp_name, stream_name, line))
+
+            return emit
+
+        # Create the streamers
+        return {
+            'stdout': LineStreamer(build_emit(self.logger.info, 'STDOUT')),
+            'stderr': LineStreamer(build_emit(self.logger.warning, 'STDERR')),
+        }
+
     def _build_user_files(self, exp_spec, envs):
         # Initialize the user files
         user_files = {}
@@ -369,14 +992,10 @@ class Runner:
 
             # Check whether to add the path to the outputs
             if path is not None:
-                # Evaluate the path
-                evaluated_path = self._evaluate_expression(path, envs=envs)
-
-                # Save the evaluated path
-                user_files[stream] = evaluated_path
+                user_files[stream] = path
 
-        # Return the user files
-        return user_files
+        # Evaluate the paths at once and return
+        return self._evaluate_expressions(user_files, envs=envs)
 
     def _log_experiment_outputs(
             self, exp_spec, status, stdout, stderr, envs):
@@ -387,10 +1006,14 @@ class Runner:
         stdout_path = write_outputs.get('stdout_to', None)
         stderr_path = write_outputs.get('stderr_to', None)
 
+        # Check whether the outputs have been logged as they arrived
+        streamed = self._get_output_buffer_spec().get('stream', False)
+
         # Check whether to write the STDOUT to the file
         if stdout_path is None:
-            self.logger.info(
-                'Commands output from STDOUT->\n{}'.format(stdout))
+            if not streamed:
+                self.logger.info(
+                    'Commands output from STDOUT->\n{}'.format(stdout))
         else:
             # Log the write
             self.logger.info(
@@ -398,7 +1021,7 @@ class Runner:
 
         # Check whether to write STDERR to the file
         if stderr_path is None:
-            if len(stderr) > 0:
+            if len(stderr) > 0 and not streamed:
                 self.logger.warning(
                     'Commands output from STDERR->\n{}'.format(stderr))
         else:
@@ -407,33 +1030,33 @@ class Runner:
                 'STDERR output is written to "{}"'.format(stderr_path))
 
     def _update_deployed_indexes_by_status(
-            self, status, deployed_exps, deployed_servers, exp_idx, server_idx,
-            exp_name):
+            self, status, deployed_exps, ledger, exp_idx, exp_name):
         # Take action according to the status
         if status == 'success':
             # Add the experiment index to the deployed experiment
             # indexes
             deployed_exps.add(exp_idx)
 
-            # Add the deployed server index to the deployed server
-            # indexes
-            deployed_servers.add(server_idx)
-
         elif status == 'continue':
             # Log the continue
             self.logger.warning(('Unsuccessful deployment of experiment' +
                                  ' "{}", will continue').format(exp_name))
 
             # Give up this experiment by treating it as if it has been
-            # deployed
+            # deployed, the reserved resources are kept until the end of the
+            # round
             deployed_exps.add(exp_idx)
-            deployed_servers.add(server_idx)
 
         elif status == 'retry':
             # Log the retry
             self.logger.warning(('Unsuccessful deployment of experiment' +
                                  ' "{}", will retry').format(exp_name))
 
+            # Release the reserved resources and the allocated GPUs, so the
+            # server is still available in this round
+            ledger.release(exp_idx)
+            self.gpu_allocator.release((self.stage, exp_idx))
+
         else:
             # Should not reach here
             raise ValueError('Unknown status: {}'.format(status))
@@ -442,61 +1065,81 @@ class Runner:
     # Stage Deployment Management
     ############################################################################
 
-    def _filter_undeployed_experiments(self, stage, undeployed):
-        # Initialize the list of undeployed experiments
-        undeployed_exps = []
+    def _build_dependency_graph(self, stage):
+        # Get experiments
+        exps_spec = self._get_experiment_specs(stage)
+
+        # Get experiment names
+        exp_names = self._get_experiment_names(exps_spec)
+
+        # Get experiment dependencies
+        dependencies = [self._get_experiment_details(exp_spec, 'depends_on')
+                        for exp_spec in exps_spec]
+
+        # Build the dependency graph and return, the dependencies have been
+        # checked when reading the spec, so the dependencies outside the stage
+        # (e.g., other stages, filtered experiments) are treated as deployed
+        return DependencyGraph(exp_names, dependencies, strict=False)
 
+    def _find_empty_experiments(self, stage):
         # Get experiments
         exps_spec = self._get_experiment_specs(stage)
 
-        # Add each undeployed experiment to the list
-        for exp_idx in undeployed:
-            # Get the experiment spec
-            exp_spec = exps_spec[exp_idx]
+        # Return the indexes of experiments without commands
+        return set(i for i, exp_spec in enumerate(exps_spec)
+                   if self._check_empty_experiment(exp_spec))
+
+    def _collect_candidate_experiments(self):
+        # Get the undeployed experiments whose dependencies are deployed, and
+        # the undeployed empty experiments
+        candidates = list(
+            self.dependency_graph.get_ready() |
+            (self.empty_exps & self.undeployed))
+
+        # Log the blocked experiments
+        num_blocked = len(self.undeployed) - len(candidates)
 
-            # Add to the undeployed list
-            undeployed_exps.append(exp_spec)
+        if num_blocked > 0:
+            self._log_verbose(('{} experiments depend on experiments which' +
+                               ' are still undeployed').format(num_blocked))
 
-        # Return the undeployed experiments
-        return undeployed_exps
+        # Build the heap of candidates and return
+        heapq.heapify(candidates)
+
+        return candidates
 
     def _filter_satisfied_servers(self, satisfied, req_group, metrics):
+        # Initialize the requirement predicates
+        predicates = []
+
         # Iterate each requirement
         for req_id, req_expr in req_group.items():
-            # Stop the search when there are no any satisfied servers left
-            if len(satisfied) <= 0:
-                break
-
-            # Parse the requirement expression
-            operator, value = self._parse_requirement_expression(req_expr)
+            # Get the compiled requirement predicate
+            predicate = self._get_requirement_predicate(req_expr)
 
             # Log the requirement
             self.logger.debug(('Requirement ID: "{}", Operator: "{}",' +
                                ' Value: "{}"').format(
-                req_id, operator, value))
+                req_id, predicate.operator, predicate.value))
 
-            # Get the list of server metrics of the requirement
-            servers_metrics = metrics.get(req_id, None)
-
-            if servers_metrics is None:
+            # Check whether the metrics of the requirement have been collected
+            if req_id not in metrics:
                 self.logger.raise_error(
                     'Requirement ID "{}" should be in metrics'.format(req_id))
 
-            # Update the indexes of satisfied servers by comparing the
-            # server metric to the requirement value
-            satisfied = filter(lambda i: self._is_metric_satisfied(
-                servers_metrics[i], operator, value), satisfied)
+            # Add the requirement predicate
+            predicates.append((req_id, predicate))
+
+        try:
+            # Find the servers whose metrics satisfy all requirements
+            satisfied = metrics.find_satisfied_servers(satisfied, predicates)
+        except TypeError as e:
+            self.logger.exception(str(e))
+            raise
 
         # Return the filtered indexes
         return set(satisfied)
 
-    def _restore_unfiltered_indexes(self, undeployed, filtered_deployed):
-        # Convert the set of undeployed indexes to list
-        undeployed = list(undeployed)
-
-        # Map the filtered deployed indexes to original undeployed indexes
-        return set(map(lambda i: undeployed[i], filtered_deployed))
-
     def _restore_experiment_names(self, exp_names, idxs):
         # Map the indexes to experiment names and return
         return map(lambda i: exp_names[i], idxs)
@@ -505,38 +1148,6 @@ class Runner:
     # Experiment Deployment Management
     ############################################################################
 
-    def _get_undeployed_experiment_dependencies(
-            self, prev_undeployed, exp_names, exp_spec, filtered_deployed):
-        # Get experiment dependencies
-        depends_on = self._get_experiment_details(exp_spec, 'depends_on')
-
-        # Convert the dependencies to set
-        depends_on = set(depends_on)
-
-        # Get all experiments in the stage
-        all_exps_spec = self._get_experiment_specs('experiments')
-
-        # Get a list of all experiment names
-        all_names = self._get_experiment_names(all_exps_spec)
-
-        # Restore unfiltered indexes
-        round_deployed = self._restore_unfiltered_indexes(
-            prev_undeployed, filtered_deployed)
-
-        # Remove current deployed indexes from previously undeployed indexes
-        cur_undeployed = prev_undeployed - round_deployed
-
-        # Get a set of current undeployed experiment names
-        cur_undeployed_names = set(
-            self._restore_experiment_names(all_names, cur_undeployed))
-
-        # Calculate the intersection of dependencies and current undeployed
-        # names
-        undeployed_deps = depends_on.intersection(cur_undeployed_names)
-
-        # Return the undeployed dependency names
-        return list(undeployed_deps)
-
     def _update_metrics_and_find_servers(self, exp_spec, metrics, deployed):
         # Get server specs
         servers_spec = self._get_server_specs()
@@ -573,6 +1184,10 @@ class Runner:
             satisfied = self._filter_satisfied_servers(
                 satisfied, req_group, metrics)
 
+        # Filter indexes of satisfied servers with enough free GPUs
+        satisfied = self._filter_servers_with_free_gpus(
+            exp_spec, satisfied, envs)
+
         # Log the satisfied servers
         if self.verbose:
             server_names = [servers_spec[i].get('name', '')
@@ -583,235 +1198,720 @@ class Runner:
         # Return indexes of satisfied servers
         return satisfied
 
+    def _choose_server(self, exp_spec, satisfied_servers, metrics, deployed):
+        # Get the placement spec of the experiment
+        placement_spec = self._get_placement_spec(exp_spec)
+
+        # Get the placement policy
+        policy = placement_spec.get('policy', 'first')
+
+        # Get the requirement IDs whose metrics are treated as loads
+        metric_ids = placement_spec.get('metrics', None)
+
+        if metric_ids is None:
+            # Use the requirement IDs of the experiment by default
+            reqs_spec = self._get_experiment_details(exp_spec, 'requirements')
+            metric_ids = [req_id for req_group in reqs_spec
+                          for req_id in req_group.keys()]
+        else:
+            metric_ids = wrap_with_list(metric_ids)
+
+        # Get the weights of metrics
+        weights = placement_spec.get('weights', None) or {}
+
+        # Check the metrics which haven't been checked in this round
+        if policy != 'first':
+            # Collect the missing requirement IDs
+            missing_req_ids = [req_id for req_id in metric_ids + list(weights)
+                               if req_id not in metrics]
+
+            # Check the missing metrics on the servers
+            if len(missing_req_ids) > 0:
+                # Get experiment environment variables
+                envs = self._get_experiment_details(exp_spec, 'envs')
+
+                # Update the metrics
+                self._update_metrics(
+                    metrics, collections.OrderedDict.fromkeys(missing_req_ids),
+                    deployed, envs)
+
+        # Build the placement context
+        context = PlacementContext(
+            metrics, metric_ids=metric_ids, weights=weights,
+            deployment_counts=self.server_deployment_counts)
+
+        try:
+            # Choose the server
+            server_idx = choose_server(policy, satisfied_servers, context)
+        except ValueError:
+            self.logger.exception('Could not choose a server for experiment' +
+                                  ' "{}"'.format(exp_spec.get('name', '')))
+            raise
+
+        # Log the choice
+        self._log_verbose('Chose server #{} by placement policy "{}"'.format(
+            server_idx + 1, policy))
+
+        # Return the server index
+        return server_idx
+
+    def _create_resource_ledger(self):
+        # Get the capacities of the servers
+        servers_capacities = [server_spec.get('capacities', None)
+                              for server_spec in self._get_server_specs()]
+
+        # Create the ledger and return
+        return ResourceLedger(servers_capacities)
+
+    def _reserve_resources(self, ledger, exp_idx, server_idx, reservations):
+        # Reserve the resources until the end of the round
+        ledger.reserve(exp_idx, server_idx, reservations)
+
+        # Log the remaining resources
+        self._log_verbose('Remaining resources on server #{}: {}'.format(
+            server_idx + 1, json.dumps(ledger.get_remaining(server_idx))))
+
+    def _create_gpu_allocator(self):
+        # Get the GPU allocation spec
+        gpu_allocation = self._get_gpu_allocation_spec()
+
+        # Create the allocator and return
+        return GPUAllocator(
+            max_usage=gpu_allocation.get('max_usage', 0.1),
+            hold_time=gpu_allocation.get('hold_time', 300))
+
+    def _filter_servers_with_free_gpus(self, exp_spec, satisfied, envs):
+        # Get the number of GPUs required by the experiment
+        num_gpus = self._get_experiment_gpus(exp_spec)
+
+        # Check whether there are any GPUs to allocate
+        if num_gpus <= 0 or len(satisfied) <= 0:
+            return satisfied
+
+        # Get the requirement ID whose metric is the usage of each GPU
+        req_name = self._get_gpu_allocation_spec().get(
+            'requirement', 'cuda_memory_usage')
+
+        # Log the check
+        self._log_verbose(
+            'Check GPU usages by requirement ID "{}" for {} GPUs'.format(
+                req_name, num_gpus))
+
+        # Check the usages of each GPU only on the satisfied servers
+        skipped = set(range(len(self._get_server_specs()))) - set(satisfied)
+        usages = self._check_server_metrics(
+            [req_name], skipped, envs, aggregate=False)[0]
+
+        # Initialize the servers with enough free GPUs
+        filtered = set()
+
+        # Iterate each satisfied server
+        for server_idx in satisfied:
+            # Save the usages in the allocator
+            self.gpu_allocator.update_usages(server_idx, usages[server_idx])
+
+            # Find the free GPUs which are not held
+            free_gpus = self.gpu_allocator.find_free_gpus(server_idx)
+
+            # Log the free GPUs
+            self._log_verbose('Free GPUs on server #{}: {}'.format(
+                server_idx + 1, json.dumps(sorted(free_gpus))))
+
+            # Check whether there are enough free GPUs
+            if len(free_gpus) >= num_gpus:
+                filtered.add(server_idx)
+
+        # Return the filtered indexes
+        return filtered
+
+    def _allocate_gpus(self, exp_spec, exp_idx, server_idx):
+        # Get the number of GPUs required by the experiment
+        num_gpus = self._get_experiment_gpus(exp_spec)
+
+        # Check whether there are any GPUs to allocate
+        if num_gpus <= 0:
+            return None
+
+        # Allocate the GPUs, which are held across the rounds
+        gpu_idxs = self.gpu_allocator.allocate(
+            (self.stage, exp_idx), server_idx, num_gpus)
+
+        # Log the allocated GPUs
+        self._log_verbose('Allocated GPUs on server #{}: {}'.format(
+            server_idx + 1, json.dumps(gpu_idxs)))
+
+        # Return the indexes of the GPUs
+        return gpu_idxs
+
     def _update_metrics(self, metrics, req_group, deployed, envs):
+        # Initialize the requirements to check, each item is (requirement ID,
+        # maximum age, requirement name)
+        checks = []
+
         # Iterate each requirement ID
         for req_id in req_group.keys():
+            # Split the requirement ID by scheme
+            scheme, max_age, req_name = self._split_requirement_id(req_id)
+
             # Check whether we should update the metric
-            if self._should_update_metric(req_id, metrics):
+            if self._should_update_metric(req_id, scheme, metrics, deployed):
                 # Log the check
                 self._log_verbose(('Check requirement ID: {}').format(req_id))
 
-                # Check server metrics
-                server_metrics = self._check_server_metrics(
-                    req_id, deployed, envs)
+                # Add the requirement to the checks
+                checks.append((req_id, max_age, req_name))
 
-                # Update the metrics
-                metrics[req_id] = server_metrics
+        # Check whether there are any requirements to check
+        if len(checks) <= 0:
+            return
 
-    def _should_update_metric(self, req_id, metrics):
-        # Check whether the requirement ID contains any scheme (e.g.,
-        # "static:cpu_usage", "dynamic:cpu_usage")
-        schemes = ['static', 'dynamic']
-        success, scheme, req_id = split_by_scheme(req_id, schemes)
+        # Find the fresh metrics in the cache for the requirements with
+        # maximum ages
+        all_cached_metrics = [
+            self._find_cached_metrics(req_name, max_age, deployed, envs)
+            for _, max_age, req_name in checks]
+
+        # Check the metrics on the servers without fresh metrics
+        all_server_metrics = self._check_server_metrics(
+            [req_name for _, _, req_name in checks], deployed, envs,
+            skipped=[set(cached.keys()) for cached in all_cached_metrics])
+
+        # Get the checked time
+        checked_time = time.time()
+
+        # Iterate each checked requirement
+        for (req_id, max_age, req_name), cached_metrics, server_metrics in zip(
+                checks, all_cached_metrics, all_server_metrics):
+            # Check whether the metrics should be cached
+            if max_age is not None:
+                # Save the new metrics in the cache
+                self._cache_metrics(
+                    req_name, max_age, server_metrics, deployed, envs,
+                    checked_time)
+
+                # Fill in the cached metrics
+                for server_idx, metric in cached_metrics.items():
+                    server_metrics[server_idx] = metric
+
+            # Update the metrics
+            metrics[req_id] = server_metrics
+
+    def _split_requirement_id(self, req_id):
+        try:
+            # Split the requirement ID and return
+            return split_requirement_id(req_id)
+        except ValueError as e:
+            self.logger.raise_error(str(e))
 
-        # Check whether there is unknown scheme
-        if success:
-            # Set default scheme to "dynamic"
-            scheme = scheme or 'dynamic'
+    def _resolve_requirement_name(self, req_name):
+        # Get requirement specs
+        reqs_spec = self._get_requirement_specs()
 
-            # Log the scheme
-            self._log_verbose('Requirement ID "{}" has scheme: {}'.format(
-                req_id, scheme))
+        try:
+            # Split the aggregation of the vector metrics (e.g., "@min")
+            req_name, aggregation = self.compiled_spec.get_metric_aggregation(
+                req_name)
+        except ValueError as e:
+            self.logger.raise_error(str(e))
+
+        # Check whether the requirement name is a requirement in the specs
+        if req_name in reqs_spec:
+            return req_name, None, aggregation
+
+        # Split the requirement name into the requirement and the key of one
+        # of its named metrics (e.g., "gpu.memory_usage")
+        parts = req_name.split(sep='.', maxsplit=1)
+
+        # Check whether the requirement exists
+        if len(parts) < 2 or parts[0] not in reqs_spec:
+            self.logger.raise_error(
+                'Requirement ID does not exist: {}'.format(req_name))
+
+        # Return the requirement, the key and the aggregation
+        return parts[0], parts[1], aggregation
+
+    def _should_update_metric(self, req_id, scheme, metrics, deployed):
+        # Log the scheme
+        self._log_verbose('Requirement ID "{}" has scheme: {}'.format(
+            req_id, scheme))
+
+        # Check whether to update metric
+        if scheme == 'dynamic' or scheme == 'ttl':
+            # Log the result
+            self._log_verbose(
+                'Requirement ID "{}" should be checked'.format(req_id))
+
+            return True
+        elif scheme == 'static':
+            # Check whether the requirement ID has existed in metrics, the
+            # metrics of the servers which were unavailable (e.g., deploying
+            # in flight) but are available now are missing
+            if req_id in metrics and not any(
+                    metric is None and server_idx not in deployed
+                    for server_idx, metric in enumerate(metrics[req_id])):
+                # Log the result
+                self._log_verbose(
+                    'Requirement ID "{}" is already in metrics'.format(req_id))
 
-            # Check whether to update metric
-            if scheme == 'dynamic':
+                return False
+            else:
                 # Log the result
                 self._log_verbose(
-                    'Requirement ID "{}" should be checked'.format(req_id))
+                    'Requirement ID "{}" is not in metrics'.format(req_id))
 
                 return True
-            elif scheme == 'static':
-                # Check whether the requirement ID has existed in metrics
-                if req_id in metrics:
-                    # Log the result
-                    self._log_verbose(
-                        'Requirement ID "{}" is not in metrics'.format(req_id))
-
-                    return False
-                else:
-                    # Log the result
-                    self._log_verbose(
-                        'Requirement ID "{}" is already in metrics'.format(
-                            req_id))
-
-                    return True
-            else:
-                # Should not reach here
-                raise ValueError('Unknown scheme "{}"'.format(scheme))
         else:
-            self.logger.raise_error(
-                'Unknown scheme "{}" in requirement ID "{}"'.format(
-                    scheme, req_id))
+            # Should not reach here
+            raise ValueError('Unknown scheme "{}"'.format(scheme))
+
+    def _render_requirement(self, req_name, envs):
+        # Get the requirement which runs the commands
+        req_base, _, _ = self._resolve_requirement_name(req_name)
+
+        # Render the requirement commands with the environment variables as
+        # the cache key
+        return json.dumps({
+            'commands': self._get_requirement_specs()[req_base],
+            'envs': envs,
+        }, sort_keys=True)
+
+    def _find_cached_metrics(self, req_name, max_age, deployed, envs):
+        # Initialize the cached metrics
+        cached_metrics = {}
+
+        # Only the requirements with maximum ages are cached
+        if max_age is None:
+            return cached_metrics
+
+        # Render the requirement
+        rendered = self._render_requirement(req_name, envs)
+
+        # Find the fresh metrics of undeployed servers in the cache
+        for server_idx in range(len(self._get_server_specs())):
+            if server_idx not in deployed:
+                found, metric = self.metric_cache.get(
+                    server_idx, req_name, rendered, max_age)
+
+                if found:
+                    cached_metrics[server_idx] = metric
+
+        # Log the cached metrics
+        self._log_verbose(
+            'Requirement ID "{}" has fresh metrics on {} servers'.format(
+                req_name, len(cached_metrics)))
+
+        # Return the cached metrics
+        return cached_metrics
+
+    def _cache_metrics(self, req_name, max_age, server_metrics, deployed, envs,
+                       checked_time):
+        # Render the requirement
+        rendered = self._render_requirement(req_name, envs)
+
+        # Save the new metrics in the cache
+        for server_idx, metric in enumerate(server_metrics):
+            if server_idx not in deployed and metric is not None:
+                self.metric_cache.set(
+                    server_idx, req_name, rendered, metric, now=checked_time)
+
+        # Check the servers again when the new metrics expire
+        self.scheduler.add_recheck_time(checked_time + max_age)
+
+    def _check_server_metrics(self, req_names, deployed, envs, skipped=None,
+                              aggregate=True):
+        # Get server specs
+        servers_spec = self._get_server_specs()
 
-    def _check_server_metrics(self, req_id, deployed, envs):
-        # Initialize the metric outputs
-        metrics = []
+        # Skip no servers by default
+        skipped = skipped or [set() for _ in req_names]
 
-        # Get requirement specs
-        reqs_spec = self._get_requirement_specs()
+        # Resolve the requirement names into the requirements, keys and
+        # aggregations
+        resolved = [self._resolve_requirement_name(req_name)
+                    for req_name in req_names]
 
-        # Get server specs
-        servers_spec = self._get_server_specs()
+        # Initialize the requirements to check on each server
+        servers_reqs = collections.OrderedDict()
 
         # Iterate each server spec
         for server_idx, server_spec in enumerate(servers_spec):
-            # Get name of the server
-            server_name = server_spec['name']
-
             # Check whether the server has been deployed
             if server_idx in deployed:
                 # Log the skip
-                self._log_verbose(
-                    'Server "{}" has been deployed, skip'.format(server_name))
-
-                # Append null metric to the list
-                metrics.append(None)
+                self._log_verbose('Server "{}" has been deployed, skip'.format(
+                    server_spec['name']))
 
-                # Continue to next server
                 continue
 
-            # Evaluate until success
-            status = None
+            # Collect the requirements whose metrics are needed (e.g., not
+            # cached), each requirement is only checked once
+            reqs = []
 
-            while status != 'success':
-                # Log the server and requirement ID
-                self._log_verbose(
-                    'Check requirement "{}" on server "{}"'.format(
-                        req_id, server_name))
+            for (req_base, _, _), req_skipped in zip(resolved, skipped):
+                if server_idx not in req_skipped and req_base not in reqs:
+                    reqs.append(req_base)
 
-                # Get the requirement commands
-                req_commands = reqs_spec.get(req_id, None)
+            # Add the requirements to check on the server
+            if len(reqs) > 0:
+                servers_reqs[server_idx] = reqs
 
-                # Check whether the requirement command exists
-                if req_commands is None:
-                    self.logger.raise_error(
-                        'Requirement ID does not exist: {}'.format(req_id))
+        # Get the indexes of servers to check
+        server_idxs = list(servers_reqs.keys())
 
-                # Run the remote command on server
-                status, stdout, _ = self._run_commands(
-                    server_spec, req_commands, envs=envs)
+        # Build the function to check the metrics on one server
+        def check(server_idx):
+            return self._check_server_metrics_on_server(
+                servers_reqs[server_idx], servers_spec[server_idx], envs)
 
-                # Take action according to the status
-                if status == 'success':
-                    # Log the results
-                    self.logger.debug('Metric results->\n{}'.format(stdout))
+        # Get the number of workers to check the servers concurrently
+        num_workers = min(self._get_probe_workers_spec(), len(server_idxs))
+
+        # Check the metrics on each server
+        if num_workers > 1:
+            # Log the concurrent check
+            self._log_verbose(
+                'Check requirements on {} servers with {} workers'.format(
+                    len(server_idxs), num_workers))
+
+            # Check the servers concurrently and keep the order of servers
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                servers_metrics = list(executor.map(check, server_idxs))
+        else:
+            # Check the servers one at a time
+            servers_metrics = list(map(check, server_idxs))
+
+        # Initialize the metrics of all requirements
+        all_metrics = []
+
+        # Iterate each requirement
+        for (req_base, key, aggregation), req_skipped in zip(
+                resolved, skipped):
+            # Initialize the metric outputs with null metrics
+            metrics = [None] * len(servers_spec)
+
+            # Fill in the metrics of checked servers
+            for server_idx, server_metrics in zip(
+                    server_idxs, servers_metrics):
+                if server_idx not in req_skipped:
+                    # Extract the named metric
+                    metric = self._extract_metric(
+                        server_metrics.get(req_base, None), key)
 
-                    # Try to calculate mean metric of results
-                    metric = self._try_calc_mean(stdout)
+                    # Aggregate the vector metric
+                    if aggregate:
+                        metric = aggregate_metric(metric, aggregation)
 
-                    # Log the processed metric
-                    self.logger.debug('Processed metric->\n{}'.format(metric))
+                    metrics[server_idx] = metric
 
-                    # Add the metric to the list
-                    metrics.append(metric)
+            # Add the metrics to the outputs
+            all_metrics.append(metrics)
+
+        # Return list of metrics for all servers of each requirement
+        return all_metrics
+
+    def _check_server_metrics_on_server(self, req_ids, server_spec, envs):
+        # Get requirement specs
+        reqs_spec = self._get_requirement_specs()
+
+        # Collect the requirements which can be checked in one batch
+        if self._get_batch_requirements_spec():
+            batch_req_ids = [
+                req_id for req_id in req_ids
+                if self.commands_runner.can_run_in_batch(reqs_spec[req_id])]
+        else:
+            batch_req_ids = []
+
+        # Initialize the metrics, the key is the requirement ID
+        metrics = {}
+
+        # Check the requirements in one batch when there are more than one
+        if len(batch_req_ids) > 1:
+            metrics.update(self._check_server_metrics_in_batch(
+                batch_req_ids, server_spec, envs))
+
+        # Check the other requirements one at a time
+        for req_id in req_ids:
+            if req_id not in metrics:
+                metrics[req_id] = self._check_server_metric(
+                    req_id, reqs_spec[req_id], server_spec, envs)
+
+        # Return the metrics
+        return metrics
+
+    def _check_server_metrics_in_batch(self, req_ids, server_spec, envs):
+        # Get requirement specs
+        reqs_spec = self._get_requirement_specs()
+
+        # Get name of the server
+        server_name = server_spec['name']
+
+        # Save the start time of the check
+        start_time = time.time()
+
+        # Initialize the metrics
+        metrics = {}
+
+        # Initialize the requirements to check
+        pending = list(req_ids)
+
+        # Create the retry budget of the server, which is shared by all
+        # requirements in the batch
+        retry = self._create_retry_budget(server_spec=server_spec)
+
+        # Evaluate until all requirements are done
+        while len(pending) > 0:
+            # Log the server and requirement IDs
+            self._log_verbose(
+                'Check requirements {} on server "{}" in batch'.format(
+                    json.dumps(pending), server_name))
+
+            # Wait for next commands
+            self._wait_for_next_commands()
+
+            # Run the commands of all requirements at once
+            results, debug_info, sections = \
+                self.commands_runner.run_commands_batch(
+                    [reqs_spec[req_id] for req_id in pending],
+                    server_spec=server_spec, envs=envs,
+                    timeout=self._get_timeouts_spec().get(
+                        'requirements', None))
+
+            # Handle the errors of the whole batch once when the outputs of
+            # any requirements are missing
+            if None in sections:
+                batch_status = self._handle_errors(
+                    results, debug_info, server_spec=server_spec, envs=envs,
+                    retry=retry)
+            else:
+                batch_status = None
+
+            # Initialize the requirements to retry
+            retries = []
+
+            # Iterate each requirement
+            for req_id, section in zip(pending, sections):
+                # Get the status of the requirement
+                if section is None:
+                    status = batch_status
+                else:
+                    status = self._handle_errors(
+                        *section, server_spec=server_spec, envs=envs,
+                        retry=retry)
+
+                # Take action according to the status
+                if status == 'success':
+                    # The metric is null if the outputs are missing
+                    if section is None:
+                        self.logger.warning(
+                            ('Missing outputs of requirement "{}" on' +
+                             ' server "{}"').format(req_id, server_name))
+
+                        metrics[req_id] = None
+                    else:
+                        # Parse the metric from the outputs
+                        metrics[req_id] = self._parse_metric(
+                            section[0]['stdout'])
 
                 elif status == 'continue':
                     # Log the continue
                     self.logger.warning(
                         ('Unsuccessful commands execution on server "{}",' +
                          ' will continue->\n{}').format(
-                            server_name, req_commands))
+                            server_name, reqs_spec[req_id]))
 
-                    # Append null metric to the list
-                    metrics.append(None)
-
-                    # Continue to next server spec
-                    break
+                    # Continue with null metric
+                    metrics[req_id] = None
 
                 elif status == 'retry':
                     # Log the retry
                     self.logger.warning(
                         ('Unsuccessful commands execution on server "{}",' +
                          ' will retry->\n{}').format(
-                            server_name, req_commands))
+                            server_name, reqs_spec[req_id]))
+
+                    # Add the requirement to the retries
+                    retries.append(req_id)
 
                 else:
                     # Should not reach here
                     raise ValueError('Unknown status: {}'.format(status))
 
-        # Return list of metrics for all servers
+            # Continue with null metrics when the retry budget is spent
+            if len(retries) > 0 and not self._wait_for_retry(retry):
+                for req_id in retries:
+                    metrics[req_id] = None
+
+                retries = []
+
+            # Retry the unsuccessful requirements
+            pending = retries
+
+        # Log the probe latency
+        self._log_verbose(
+            'Checked {} requirements on server "{}" in {:.3f}s'.format(
+                len(req_ids), server_name, time.time() - start_time))
+
+        # Return the metrics
         return metrics
 
+    def _check_server_metric(self, req_id, req_commands, server_spec, envs):
+        # Get name of the server
+        server_name = server_spec['name']
+
+        # Save the start time of the check
+        start_time = time.time()
+
+        # Initialize the metric
+        metric = None
+
+        # Create the retry budget of the server
+        retry = self._create_retry_budget(server_spec=server_spec)
+
+        # Evaluate until success
+        status = None
+
+        while status != 'success':
+            # Log the server and requirement ID
+            self._log_verbose(
+                'Check requirement "{}" on server "{}"'.format(
+                    req_id, server_name))
+
+            # Run the remote command on server, the requirement commands
+            # shouldn't leave processes in the background, so their outputs
+            # are read from the pipes
+            status, stdout, _ = self._run_commands(
+                server_spec, req_commands, envs=envs, retry=retry,
+                timeout=self._get_timeouts_spec().get('requirements', None),
+                pipe_outputs=True)
+
+            # Take action according to the status
+            if status == 'success':
+                # Parse the metric from the outputs
+                metric = self._parse_metric(stdout)
+
+            elif status == 'continue':
+                # Log the continue
+                self.logger.warning(
+                    ('Unsuccessful commands execution on server "{}",' +
+                     ' will continue->\n{}').format(
+                        server_name, req_commands))
+
+                # Continue to next server spec with null metric
+                break
+
+            elif status == 'retry':
+                # Log the retry
+                self.logger.warning(
+                    ('Unsuccessful commands execution on server "{}",' +
+                     ' will retry->\n{}').format(
+                        server_name, req_commands))
+
+                # Continue to next server spec with null metric when the
+                # retry budget is spent
+                if not self._wait_for_retry(retry):
+                    break
+
+            else:
+                # Should not reach here
+                raise ValueError('Unknown status: {}'.format(status))
+
+        # Log the probe latency
+        self._log_verbose(
+            'Checked requirement "{}" on server "{}" in {:.3f}s'.format(
+                req_id, server_name, time.time() - start_time))
+
+        # Return the metric
+        return metric
+
     ############################################################################
     # Metric Checking
     ############################################################################
 
-    def _is_metric_satisfied(self, metric, operator, value):
+    def _get_requirement_predicate(self, req_expr):
         try:
-            if operator == '==':
-                return metric == value
-            elif operator == '!=':
-                return metric != value
-            elif operator == '<':
-                return metric < value
-            elif operator == '>':
-                return metric > value
-            elif operator == '<=':
-                return metric <= value
-            elif operator == '>=':
-                return metric >= value
-            else:
-                self.logger.raise_error(
-                    'Unknown operator: {}'.format(operator))
-        except:
-            self.logger.exception(
-                'Could not compare the values: "{}" "{}" "{}"'.format(
-                    metric, operator, value))
-            raise
+            # Get the predicate compiled when the spec is read
+            return self.compiled_spec.get_requirement_predicate(req_expr)
+        except ValueError as e:
+            self.logger.raise_error(str(e))
 
-    def _parse_requirement_expression(self, req_expr):
-        # Remove whitespaces
-        req_expr = req_expr.strip()
+    def _parse_metric(self, results):
+        # Log the results
+        self.logger.debug('Metric results->\n{}'.format(results))
 
-        # Parse the expression
-        result = parse_requirement_expression(req_expr)
+        # Try to parse the named metrics from a JSON object
+        metric = self._try_parse_named_metrics(results)
 
-        # Check whether the expression is valid
-        if result is None:
-            self.logger.raise_error(
-                'Could not parse the requirement expression: {}'.format(
-                    req_expr))
-        else:
-            # Get operator and value
-            operator, value = result['operator'], result['value']
+        # Try to parse the numbers in each line otherwise, a single number is
+        # the metric and multiple numbers (e.g., one per GPU) are kept as a
+        # vector metric for the aggregation
+        if metric is None:
+            metric = self._try_parse_values(results)
 
-        # Return operator and value
-        return operator, value
+        # Log the processed metric
+        self.logger.debug('Processed metric->\n{}'.format(metric))
 
-    def _try_calc_mean(self, results):
-        # Split the results by newlines
-        lines = results.split('\n')
+        # Return the metric
+        return metric
 
-        # Remove empty contents in results
-        lines = filter(lambda s: len(s.strip()) > 0, lines)
+    def _try_parse_named_metrics(self, results):
+        # Only JSON objects contain the named metrics
+        if not results.strip().startswith('{'):
+            return None
 
         try:
-            # Parse the results
-            parsed_lines = list(map(ast.literal_eval, lines))
+            # Parse the JSON object
+            metrics = json.loads(results)
+        except ValueError:
+            return None
+
+        # Return the named metrics
+        return metrics if isinstance(metrics, dict) else None
+
+    def _extract_metric(self, metric, key):
+        # Return the whole metric when there is no key
+        if key is None:
+            return metric
+
+        # Follow the dot-separated key in the named metrics
+        for part in key.split('.'):
+            if isinstance(metric, dict):
+                metric = metric.get(part, None)
+            else:
+                metric = None
+
+        # Return the named metric
+        return metric
 
-            # Calculate the mean
-            result = sum(parsed_lines) / len(parsed_lines)
-        except:
-            # Use original results
-            result = results
+    def _try_parse_values(self, results):
+        # Parse the numbers in each line
+        values = parse_metric_values(results)
 
-        return result
+        # Use original results when they are not numbers
+        if values is None:
+            self.logger.debug(
+                'Metric results are not numbers, use original results')
+
+            return results
+
+        # Return the number or the vector of numbers
+        return values[0] if len(values) == 1 else values
 
     ############################################################################
     # Extra Environment Variables Provided by Noodles
     ############################################################################
 
-    def _build_experiment_envs(self, exp_spec, server_spec):
+    def _build_experiment_envs(self, exp_spec, server_spec, gpu_idxs=None):
         # Get experiment environment variables
         envs = self._get_experiment_details(exp_spec, 'envs')
 
         # Add environment variables of the satisfied server
-        server_envs = self._build_extra_envs(exp_spec, server_spec, envs)
+        server_envs = self._build_extra_envs(
+            exp_spec, server_spec, envs, gpu_idxs=gpu_idxs)
 
         # Merge environment variables and return
         return {**envs, **server_envs}
 
-    def _build_extra_envs(self, exp_spec, server_spec, envs):
+    def _build_extra_envs(self, exp_spec, server_spec, envs, gpu_idxs=None):
         # Build extra environment variables
         extra_envs = {
             # Experiment
@@ -825,13 +1925,17 @@ class Runner:
                 self._build_server_authority(server_spec),
         }
 
-        # Evaluate values in environment variables
-        for key, expr in extra_envs.items():
-            # Set evaluated values
-            extra_envs[key] = self._evaluate_expression(expr, envs=envs)
+        # Add the GPUs allocated to the experiment, the indexes follow the
+        # PCI bus order of "nvidia-smi" instead of the default order of CUDA
+        if gpu_idxs is not None:
+            gpu_ids = ','.join(map(str, gpu_idxs))
+
+            extra_envs['NOODLES_GPU_IDS'] = gpu_ids
+            extra_envs['CUDA_VISIBLE_DEVICES'] = gpu_ids
+            extra_envs['CUDA_DEVICE_ORDER'] = 'PCI_BUS_ID'
 
-        # Return evaluated environment variables
-        return extra_envs
+        # Evaluate values in environment variables at once and return
+        return self._evaluate_expressions(extra_envs, envs=envs)
 
     def _build_server_authority(self, server_spec):
         # Get username
@@ -851,14 +1955,16 @@ class Runner:
     ############################################################################
 
     def _run_commands(self, server_spec, commands, user_files={}, envs={},
-                      handle_errors=True):
+                      handle_errors=True, retry=None, timeout=None,
+                      on_output=None, pipe_outputs=False):
         # Wait for next commands
         self._wait_for_next_commands()
 
         # Run the commands
         all_results, debug_infos = self.commands_runner.run_commands(
             commands, server_spec=server_spec, user_files=user_files,
-            envs=envs)
+            envs=envs, timeout=timeout, on_output=on_output,
+            pipe_outputs=pipe_outputs)
 
         # Check errors from all results
         status = 'success'
@@ -866,7 +1972,8 @@ class Runner:
             for results, debug_info in zip(all_results, debug_infos):
                 # Handle the errors
                 status = self._handle_errors(
-                    results, debug_info, server_spec=server_spec, envs=envs)
+                    results, debug_info, server_spec=server_spec, envs=envs,
+                    retry=retry)
 
                 # Stop checking errors when the status is "retry"
                 if status == 'retry':
@@ -881,7 +1988,15 @@ class Runner:
         # Return the error status, combined STDOUT and combined STDERR
         return status, combined_stdout, combined_stderr
 
-    def _handle_errors(self, results, debug_info, server_spec=None, envs={}):
+    def _handle_errors(self, results, debug_info, server_spec=None, envs={},
+                       retry=None):
+        # Check whether the commands have been killed (e.g., timed out), which
+        # is handled even if "check_any_errors" is off
+        killed = results.get('killed', None)
+
+        if killed is not None:
+            return self._handle_killed_commands(killed, results, debug_info)
+
         # Get error handling spec
         check_any_errors = self._get_check_any_errors_spec()
 
@@ -900,12 +2015,24 @@ class Runner:
             self._log_verbose('Error messages: {}'.format(messages))
 
             # Find error handling match
-            commands, action = self._find_error_handler_match(results)
+            error_handler = self._find_error_handler_match(results)
+
+            # Get the response commands and action, abort the runner when no
+            # error handlers match
+            if error_handler is None:
+                commands, action = None, 'abort'
+            else:
+                commands, action = error_handler.commands, error_handler.action
 
             # Run response commands
-            if not self.running_response_commands:
+            if not self._is_running_response_commands():
                 self._run_response_commands(commands, server_spec, envs)
 
+            # Follow the retry policy of the server and error handler
+            if action == 'retry' and retry is not None:
+                retry.policy = self._build_retry_policy(
+                    server_spec=server_spec, error_handler=error_handler)
+
             # Take action
             if action == 'continue' or action == 'retry':
                 pass
@@ -921,55 +2048,54 @@ class Runner:
             # Indicate no action should be taken
             return 'success'
 
-    def _find_error_handler_match(self, results):
-        # Get error handler specs
-        error_handlers = self._get_error_handler_specs()
+    def _handle_killed_commands(self, killed, results, debug_info):
+        # Get error messages
+        messages = self.commands_runner.get_error_messages(
+            results, debug_info)
 
-        # Iterate each error handler
-        for error_handler in error_handlers:
-            # Get return code to ignore
-            return_code = error_handler.get('return_code', None)
-
-            # Get STDERR pattern to ignore
-            stderr_pattern = error_handler.get('stderr_pattern', None)
-
-            # Check the return code
-            if isinstance(return_code, str):
-                # Convert the return code to string
-                return_code_str = str(results['return_code'])
+        # Log the messages
+        self._log_verbose('Error messages: {}'.format(messages))
 
-                # Check whether it's a full match
-                match_return_code = re.fullmatch(return_code, return_code_str)
-            else:
-                match_return_code = (results['return_code'] == return_code)
+        # Get the action, the cancelled commands haven't finished, so they
+        # should be retried
+        if killed == 'timeout':
+            action = self._get_timeout_action_spec()
+        else:
+            action = 'retry'
 
-            # Check whether it's a full match
-            match_stderr = re.fullmatch(str(stderr_pattern), results['stderr'])
+        # Take action
+        if action == 'abort':
+            self.logger.raise_error(messages)
 
-            # Return code and STDERR must all be matched
-            if match_return_code and match_stderr:
-                # Get the name of the filter
-                name = error_handler.get('name', '')
+        # Log the action
+        self.logger.warning(
+            'Commands were killed by {}, take action "{}"'.format(
+                killed, action))
 
-                # Get the response commands
-                commands = error_handler.get('commands', None)
+        # Return the action
+        return action
 
-                # Get the action
-                action = error_handler.get('action', 'abort')
+    def _find_error_handler_match(self, results):
+        # Get the compiled error handlers
+        error_handlers = self.compiled_spec.error_handlers
 
+        # Iterate each error handler
+        for error_handler in error_handlers:
+            # Return code and STDERR must all be matched
+            if error_handler.match(results['return_code'], results['stderr']):
                 # Log the match
                 self._log_verbose([
                     'Found error handler match',
-                    'Name: {}'.format(name),
-                    'Commands->\n{}'.format(commands),
-                    'Action: {}'.format(action),
+                    'Name: {}'.format(error_handler.name),
+                    'Commands->\n{}'.format(error_handler.commands),
+                    'Action: {}'.format(error_handler.action),
                 ])
 
-                # Return the commands and action
-                return commands, action
+                # Return the error handler
+                return error_handler
 
-        # All filters do not apply, abort the runner
-        return None, 'abort'
+        # All filters do not apply
+        return None
 
     def _run_response_commands(self, commands, server_spec, envs):
         # Check whether the commands are not empty
@@ -980,7 +2106,7 @@ class Runner:
         self._log_verbose('Run response commands')
 
         # Mark the response commands are running
-        self.running_response_commands = True
+        self._set_running_response_commands(True)
 
         # Run commands until success
         status = None
@@ -1013,62 +2139,186 @@ class Runner:
                 raise ValueError('Unknown status: {}'.format(status))
 
         # Mark the response commands are not running
-        self.running_response_commands = False
+        self._set_running_response_commands(False)
+
+    def _is_running_response_commands(self):
+        return getattr(self.thread_states, 'running_response_commands', False)
+
+    def _set_running_response_commands(self, running):
+        self.thread_states.running_response_commands = running
+
+    def _build_retry_policy(self, server_spec=None, error_handler=None):
+        # Get the retry policy of all servers
+        policy_spec = dict(self._get_retry_policy_spec())
+
+        # Override the options by the server
+        if server_spec is not None:
+            policy_spec.update(server_spec.get('retry_policy', None) or {})
+
+        # Override the options by the error handler
+        if error_handler is not None:
+            policy_spec.update(error_handler.retry_policy or {})
+
+        # Build the policy, the options have been checked when reading the
+        # spec
+        return RetryPolicy(policy_spec)
+
+    def _create_retry_budget(self, server_spec=None):
+        # Create the budget with the retry policy of the server
+        return RetryBudget(self._build_retry_policy(server_spec=server_spec),
+                           stats=self.retry_stats)
+
+    def _wait_for_retry(self, retry):
+        # Get the delay before the next attempt
+        delay = retry.next_delay()
+
+        # Check whether the retry budget is spent
+        if delay is None:
+            # Log the give-up
+            self.logger.warning(
+                'Gave up after {} attempts in {:.3f}s, will continue'.format(
+                    retry.num_attempts, time.time() - retry.start_time))
+
+            return False
+
+        # Wait for the delay
+        if delay > 0:
+            # Log the wait
+            self._log_verbose('Wait for retry #{} for {:.3f}s'.format(
+                retry.num_attempts - 1, delay))
+
+            time.sleep(delay)
+
+        return True
 
     def _combine_outputs(self, all_results, output_type):
         # Get outputs
-        outputs = map(lambda x: x[output_type], all_results)
+        outputs = [results[output_type] for results in all_results]
+
+        # The outputs of all command groups are appended to the same user
+        # file, so the handles are combined without reading the file
+        if (len(outputs) > 0 and
+                all(isinstance(x, OutputHandle) for x in outputs)):
+            return OutputHandle.span(outputs)
 
         # Concatenate the outputs and return
-        return ''.join(outputs)
+        return ''.join(map(str, outputs))
 
-    def _evaluate_expression(self, expr, envs={}):
-        # Convert to string
-        expr = str(expr)
+    def _evaluate_expressions(self, exprs, envs={}):
+        # Initialize the evaluated values, the original expression is kept
+        # when its evaluation is unsuccessful
+        values = {}
 
-        # Check whether there are any environment variables
-        if not has_environment_variable(expr):
-            # Return the original expression
-            return expr
+        # Initialize the keys of the expressions which need the shell
+        pending = []
 
-        # Evaluate expression until success
-        status = None
+        # Iterate each expression
+        for key, expr in exprs.items():
+            # Convert to string
+            expr = str(expr)
 
-        while status != 'success':
-            # Evaluate expression on local
-            results, debug_info = \
-                self.commands_runner.evaluate_expression_on_local(
-                    expr, envs=envs)
+            # Check whether there are any environment variables
+            if not has_environment_variable(expr):
+                # Keep the original expression
+                values[key] = expr
+                continue
 
-            # Handle errors
-            status = self._handle_errors(results, debug_info, envs=envs)
+            # Expand the simple environment variables without running the
+            # shell
+            expanded = self._expand_expression(expr, envs)
 
-            # Take action according to the status
-            if status == 'success':
-                # Return evaluated values
-                return results['stdout']
+            if expanded is None:
+                values[key] = expr
+                pending.append(key)
+            else:
+                values[key] = expanded
+
+        # Create the retry budget
+        retry = self._create_retry_budget()
+
+        # Evaluate the remaining expressions in one shell until all are done
+        while len(pending) > 0:
+            # Evaluate expressions on local
+            results, debug_info, sections = \
+                self.commands_runner.evaluate_expressions_on_local(
+                    [values[key] for key in pending], envs=envs)
+
+            # Handle the errors of the whole batch once when the outputs of
+            # any expressions are missing
+            if None in sections:
+                batch_status = self._handle_errors(
+                    results, debug_info, envs=envs, retry=retry)
+            else:
+                batch_status = None
 
-            elif status == 'continue':
-                # Log the continue
-                self.logger.warning(
-                    ('Unsuccessful expression evaluation, will' +
-                        ' continue->\n{}').format(expr))
+            # Initialize the expressions to retry
+            retries = []
 
-                # Give up this evaluation
-                break
+            # Iterate each expression
+            for key, section in zip(pending, sections):
+                # Get the status of the expression
+                if section is None:
+                    status = batch_status
+                else:
+                    status = self._handle_errors(
+                        *section, envs=envs, retry=retry)
 
-            elif status == 'retry':
-                # Log the retry
-                self.logger.warning(
-                    ('Unsuccessful expression evaluation, will' +
-                        ' retry->\n{}').format(expr))
+                # Take action according to the status
+                if status == 'success':
+                    # Keep the original expression if the outputs are missing
+                    if section is None:
+                        self.logger.warning(
+                            'Missing outputs of expression->\n{}'.format(
+                                values[key]))
+                    else:
+                        # Save the evaluated value
+                        values[key] = section[0]['stdout']
+
+                elif status == 'continue':
+                    # Log the continue
+                    self.logger.warning(
+                        ('Unsuccessful expression evaluation, will' +
+                            ' continue->\n{}').format(values[key]))
+
+                elif status == 'retry':
+                    # Log the retry
+                    self.logger.warning(
+                        ('Unsuccessful expression evaluation, will' +
+                            ' retry->\n{}').format(values[key]))
+
+                    # Add the expression to the retries
+                    retries.append(key)
+
+                else:
+                    # Should not reach here
+                    raise ValueError('Unknown status: {}'.format(status))
+
+            # Give up the evaluations when the retry budget is spent
+            if len(retries) > 0 and not self._wait_for_retry(retry):
+                retries = []
+
+            # Retry the unsuccessful expressions
+            pending = retries
+
+        # Return the evaluated values
+        return values
+
+    def _expand_expression(self, expr, envs):
+        # Build the environment variables seen by the evaluation command, the
+        # experiment's variables are exported in double quotes, so the values
+        # which the shell would expand again are unknown
+        shell_envs = collections.ChainMap({}, os.environ)
+
+        for k, v in envs.items():
+            v = str(v)
 
+            if any(c in v for c in '$`\\'):
+                shell_envs[k] = None
             else:
-                # Should not reach here
-                raise ValueError('Unknown status: {}'.format(status))
+                shell_envs[k] = v
 
-        # Return the original expression
-        return expr
+        # Expand the expression, it's None if the shell is needed
+        return expand_environment_variables(expr, shell_envs)
 
     ############################################################################
     # Experiment Spec Processing
@@ -1174,15 +2424,18 @@ class Runner:
         # Get round interval
         round_interval = self._get_round_interval_spec()
 
-        # Check whether the interval is zero
-        if round_interval <= 0:
-            return
+        # Wait until the time is up or any events are notified
+        wait_time, events = self.scheduler.wait(round_interval)
 
         # Log the wait
-        self._log_verbose('Wait for next round for {}s'.format(round_interval))
+        if wait_time > 0:
+            self._log_verbose('Waited for next round for {:.3f}s'.format(
+                wait_time))
 
-        # Wait for some time
-        time.sleep(round_interval)
+        # Log the events which started the next round
+        if len(events) > 0:
+            self._log_verbose('Start next round by events: {}'.format(
+                json.dumps(sorted(set(events)))))
 
     def _wait_for_next_deployment(self):
         # Get deployment interval
@@ -1230,6 +2483,52 @@ class Runner:
     def _get_requirement_specs(self):
         return self.user_spec.get('requirements', {})
 
+    def _get_placement_spec(self, exp_spec):
+        # Get the placement spec of all experiments
+        placement_spec = self.user_spec.get('placement', {})
+
+        # Override the options by the experiment
+        return {**placement_spec, **exp_spec.get('placement', {})}
+
+    def _get_experiment_reservations(self, exp_spec):
+        # Get the resources reserved by the experiment
+        return exp_spec.get('reservations', None) or {}
+
+    def _get_experiment_gpus(self, exp_spec):
+        # Get the number of GPUs allocated to the experiment
+        return exp_spec.get('gpus', None) or 0
+
+    def _get_experiment_timeout(self, exp_spec):
+        # Get the timeout of the experiment
+        timeout = exp_spec.get('timeout', None)
+
+        # Use the timeout of all experiments by default
+        if timeout is None:
+            timeout = self._get_timeouts_spec().get('experiments', None)
+
+        return timeout
+
+    def _get_timeouts_spec(self):
+        return self.user_spec.get('timeouts', None) or {}
+
+    def _get_timeout_action_spec(self):
+        return self.user_spec.get('timeout_action', 'retry')
+
+    def _get_output_buffer_spec(self):
+        return self.user_spec.get('output_buffer', None) or {}
+
+    def _get_ssh_spec(self):
+        return self.user_spec.get('ssh', None) or {}
+
+    def _get_temp_files_spec(self):
+        return self.user_spec.get('temp_files', None) or {}
+
+    def _get_gpu_allocation_spec(self):
+        return self.user_spec.get('gpu_allocation', None) or {}
+
+    def _get_retry_policy_spec(self):
+        return self.user_spec.get('retry_policy', None) or {}
+
     def _get_write_status_to_spec(self):
         # Get the paths
         write_status_to = self.user_spec.get('write_status_to', {})
@@ -1237,33 +2536,49 @@ class Runner:
         # Return the path for the current command type
         return write_status_to.get(self.command_type, None)
 
+    def _get_write_journal_to_spec(self):
+        # Get the paths
+        write_journal_to = self.user_spec.get('write_journal_to', {})
+
+        # Return the path for the current command type
+        return write_journal_to.get(self.command_type, None)
+
+    def _get_write_status_interval_spec(self):
+        return self.user_spec.get('write_status_interval', 0)
+
     def _get_round_interval_spec(self):
         return self.user_spec.get('round_interval', 0)
 
+    def _get_scheduler_spec(self):
+        return self.user_spec.get('scheduler', 'rounds')
+
+    def _get_settle_time_spec(self):
+        # Get the settle time
+        settle_time = self.user_spec.get('settle_time', None)
+
+        # Use the round interval by default
+        if settle_time is None:
+            return self._get_round_interval_spec()
+
+        return settle_time
+
     def _get_deployment_interval_spec(self):
         return self.user_spec.get('deployment_interval', 0)
 
     def _get_commands_interval_spec(self):
         return self.user_spec.get('commands_interval', 0)
 
-    def _get_check_any_errors_spec(self):
-        return self.user_spec.get('check_any_errors', True)
+    def _get_batch_requirements_spec(self):
+        return self.user_spec.get('batch_requirements', True)
 
-    def _get_error_handler_specs(self):
-        return self.user_spec.get('error_handlers', [])
+    def _get_probe_workers_spec(self):
+        return max(1, self.user_spec.get('probe_workers', 1))
 
-    ############################################################################
-    # Writing to Files
-    ############################################################################
+    def _get_deployment_workers_spec(self):
+        return max(1, self.user_spec.get('deployment_workers', 1))
 
-    def _write_to_file(self, contents, path):
-        try:
-            with open(path, 'w') as fp:
-                fp.write(contents)
-        except:
-            self.logger.exception(
-                'Could not write contents to file "{}"'.format(path))
-            raise
+    def _get_check_any_errors_spec(self):
+        return self.user_spec.get('check_any_errors', True)
 
     ############################################################################
     # Logging
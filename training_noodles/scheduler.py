@@ -0,0 +1,155 @@
+import heapq
+import threading
+import time
+
+
+class Scheduler:
+    """ Deployment rounds scheduler.
+
+    This class decides how long the runner should wait before the next
+    deployment round.
+
+    Modes:
+    * rounds: Always wait for the round interval.
+    * event: Start the next round as soon as an event is notified (e.g., a
+    deployment has finished, a dependency has been deployed). Otherwise wait
+    until the earliest recheck time (e.g., a cached metric expires) or an
+    event arrives, the round interval is only used as the fallback.
+    """
+
+    # Available modes
+    modes = ['rounds', 'event']
+
+    def __init__(self, mode='rounds'):
+        """ Initialize the instance.
+
+        Arguments:
+            mode (str): Scheduling mode, either "rounds" or "event".
+        """
+        # Check whether the mode is supported
+        if mode not in self.modes:
+            raise ValueError('Unknown scheduler mode "{}"'.format(mode))
+
+        # Save the mode
+        self.mode = mode
+
+        # Create the event to wake up the waiting runner
+        self.wake_event = threading.Event()
+
+        # Create the lock to protect the events and recheck times
+        self.lock = threading.Lock()
+
+        # Initialize the notified events
+        self.events = []
+
+        # Initialize the heap of recheck times
+        self.recheck_times = []
+
+    def notify(self, event):
+        """ Notify an event to wake up the runner.
+
+        This function can be called from any thread.
+
+        Arguments:
+            event (str): Name of the event (e.g., "deployment_finished").
+        """
+        with self.lock:
+            # Save the event
+            self.events.append(event)
+
+        # Wake up the runner
+        self.wake_event.set()
+
+    def add_recheck_time(self, t):
+        """ Add the time to check the servers again.
+
+        Arguments:
+            t (float): Unix time to start the next round at the latest.
+        """
+        with self.lock:
+            heapq.heappush(self.recheck_times, t)
+
+    def compute_wait_time(self, round_interval, now=None):
+        """ Compute the time to wait before the next round.
+
+        Arguments:
+            round_interval (float): The round interval.
+            now (float): Current Unix time. Set to "None" to use current time.
+
+        Returns:
+            float: Time to wait in seconds.
+        """
+        # Always wait for the round interval in "rounds" mode
+        if self.mode == 'rounds':
+            return round_interval
+
+        # Get current time
+        now = time.time() if now is None else now
+
+        with self.lock:
+            # Start the next round immediately when there are any events
+            if len(self.events) > 0:
+                return 0
+
+            # Remove the recheck times which have passed
+            while (len(self.recheck_times) > 0 and
+                   self.recheck_times[0] <= now):
+                heapq.heappop(self.recheck_times)
+
+            # Fall back to the round interval when there are no recheck times
+            if len(self.recheck_times) <= 0:
+                return round_interval
+
+            # Wait until the earliest recheck time
+            return min(self.recheck_times[0] - now, round_interval)
+
+    def wait(self, round_interval):
+        """ Wait for the next round.
+
+        Arguments:
+            round_interval (float): The round interval.
+
+        Returns:
+            (wait_time (float), events (list)) where "wait_time" is the time
+            computed to wait and "events" are the events notified before the
+            end of the wait. The events are always empty in "rounds" mode.
+        """
+        # Compute the time to wait
+        wait_time = self.compute_wait_time(round_interval)
+
+        # Check whether to wait
+        if wait_time > 0:
+            # Wait until timeout or any events are notified
+            if self.mode == 'event':
+                self.wake_event.wait(wait_time)
+            else:
+                time.sleep(wait_time)
+
+        # Reset the events
+        events = self.pop_events()
+
+        # Ignore the events in "rounds" mode
+        if self.mode == 'rounds':
+            events = []
+
+        # Return the wait time and events
+        return wait_time, events
+
+    def pop_events(self):
+        """ Pop all notified events.
+
+        Returns:
+            list: The events notified since the last pop.
+        """
+        with self.lock:
+            # Get the events
+            events = self.events
+
+            # Reset the events
+            self.events = []
+
+            # Reset the wake event
+            self.wake_event.clear()
+
+        # Return the events
+        return events
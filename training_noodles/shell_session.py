@@ -0,0 +1,318 @@
+import os
+import selectors
+import subprocess
+import threading
+import time
+import uuid
+
+from training_noodles.logger import Logger
+from training_noodles.string_utils import split_marked_sections
+
+
+class ShellSession:
+    """ Long-lived shell which runs the inner commands sent over its STDIN.
+
+    The shell (e.g., "ssh user1@server1 'bash -s'") is started once and each
+    request is framed by unique marker lines:
+
+        printf '%s\\n' '<marker>:begin:0'
+        printf '%s\\n' '<marker>:begin:0' >&2
+        IFS= read -r -d '' __noodles_commands <<'<marker>'
+        <inner commands>
+        <marker>
+        ( eval "$__noodles_commands" ) < /dev/null
+        __noodles_return_code=$?
+        printf '\\n%s\\n' "<marker>:end:0:$__noodles_return_code"
+        printf '\\n%s\\n' '<marker>:end:0' >&2
+
+    The inner commands are read as a here-document and run in a subshell, so
+    syntax errors, "cd", "exit" and the commands reading STDIN don't affect
+    the shell. The STDOUT and STDERR between the marker lines and the return
+    code are demultiplexed back into the results.
+
+    The shell is started again by the next request when it has exited, and
+    it's killed with its process group when a request times out or is
+    cancelled.
+    """
+
+    # Interval in seconds to check whether the request should be killed
+    poll_interval = 0.1
+
+    # Number of bytes to read from the pipes at once
+    read_size = 64 * 1024
+
+    def __init__(self, command, cli):
+        """ Initialize the instance.
+
+        Arguments:
+            command (str): Command to start the shell which reads the commands
+                from STDIN.
+            cli (CLI): The CLI to run the shell.
+        """
+        # Save the command and the CLI
+        self.command = command
+        self.cli = cli
+
+        # Initialize the shell process
+        self.p_obj = None
+
+        # Create the lock to run one request at a time
+        self.lock = threading.Lock()
+
+        # Create a logger
+        self.logger = Logger('session')
+
+    def run(self, inner_commands, timeout=None, cancel_event=None):
+        """ Run the inner commands in the shell.
+
+        Arguments:
+            inner_commands (str): The inner commands.
+            timeout (float): Timeout in seconds. Set to "None" to wait
+                forever.
+            cancel_event (threading.Event): The event to cancel the request.
+
+        Returns:
+            dict: The raw results (bytes) with keys "outer_stdout",
+            "outer_stderr", "stdout", "stderr", "return_code" and "killed".
+        """
+        with self.lock:
+            # Start the shell when it's not running
+            if self.p_obj is None or self.p_obj.poll() is not None:
+                self._start()
+
+            # Generate a marker which is unlikely to appear in the outputs
+            marker = '__noodles_{}__'.format(uuid.uuid4().hex)
+
+            # Build the request
+            request = self._build_request(inner_commands, marker)
+
+            # Send the request and wait for the responses
+            outputs, killed, exit_code = self._communicate(
+                request, marker, timeout, cancel_event)
+
+            # Split the responses
+            return self._build_results(outputs, marker, killed, exit_code)
+
+    def close(self):
+        """ Stop the shell.
+        """
+        with self.lock:
+            self._stop()
+
+    def _start(self):
+        # Stop the exited shell
+        if self.p_obj is not None:
+            self.logger.warning('Shell session has exited, restart: {}'.format(
+                self.command))
+
+            self._stop()
+
+        # Start the shell
+        self.p_obj = self.cli.run_command(
+            self.command, stdin=subprocess.PIPE, extra_envs={}, wait=False)
+
+        # Write the requests without blocking
+        os.set_blocking(self.p_obj.stdin.fileno(), False)
+
+    def _stop(self):
+        """ Stop the shell.
+
+        Returns:
+            int: The return code of the shell, None if it's not started.
+        """
+        # Check whether the shell has been started
+        if self.p_obj is None:
+            return None
+
+        # Close STDIN to let the shell exit, and kill the remaining processes
+        try:
+            self.p_obj.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        self.cli.kill_process_group(self.p_obj)
+        return_code = self.p_obj.wait()
+
+        # Close the pipes
+        self.p_obj.stdout.close()
+        self.p_obj.stderr.close()
+
+        # Reset the shell
+        self.p_obj = None
+
+        return return_code
+
+    def _build_request(self, inner_commands, marker):
+        # Build the marker lines
+        begin = '{}:begin:0'.format(marker)
+        end = '{}:end:0'.format(marker)
+
+        # Build the request
+        lines = [
+            "printf '%s\\n' '{0}'; printf '%s\\n' '{0}' >&2".format(begin),
+            "IFS= read -r -d '' __noodles_commands <<'{}'".format(marker),
+            inner_commands,
+            marker,
+            '( eval "$__noodles_commands" ) < /dev/null',
+            '__noodles_return_code=$?',
+            ("printf '\\n%s\\n' \"{0}:$__noodles_return_code\";" +
+             " printf '\\n%s\\n' '{0}' >&2").format(end),
+        ]
+
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def _communicate(self, request, marker, timeout, cancel_event):
+        # Compute the deadline
+        deadline = None if timeout is None else time.time() + timeout
+
+        # Build the end lines to look for
+        end_lines = {
+            'stdout': '\n{}:end:0:'.format(marker).encode('utf-8'),
+            'stderr': '\n{}:end:0\n'.format(marker).encode('utf-8'),
+        }
+
+        # Initialize the outputs and whether they have ended
+        outputs = {'stdout': bytearray(), 'stderr': bytearray()}
+        ended = {'stdout': False, 'stderr': False}
+
+        # Initialize the results
+        killed = None
+        exited = False
+
+        # Register the pipes
+        selector = selectors.DefaultSelector()
+
+        selector.register(self.p_obj.stdout, selectors.EVENT_READ, 'stdout')
+        selector.register(self.p_obj.stderr, selectors.EVENT_READ, 'stderr')
+        selector.register(self.p_obj.stdin, selectors.EVENT_WRITE, 'stdin')
+
+        # Initialize the request to write
+        request_view = memoryview(request)
+
+        try:
+            while not all(ended.values()):
+                # Check whether the request should be killed
+                if cancel_event is not None and cancel_event.is_set():
+                    killed = 'cancel'
+                    break
+
+                wait_time = self.poll_interval
+
+                if deadline is not None:
+                    wait_time = min(wait_time, deadline - time.time())
+
+                    if wait_time <= 0:
+                        killed = 'timeout'
+                        break
+
+                # Process the ready pipes
+                for key, _ in selector.select(wait_time):
+                    stream = key.data
+
+                    if stream == 'stdin':
+                        request_view = self._write_request(
+                            selector, request_view)
+                        continue
+
+                    # Read the available bytes
+                    chunk = os.read(key.fileobj.fileno(), self.read_size)
+
+                    # The shell has exited at the end of file
+                    if len(chunk) <= 0:
+                        exited = True
+                        break
+
+                    # Check whether the output has ended, the end line may be
+                    # split across the chunks
+                    output = outputs[stream]
+                    start = max(0, len(output) - len(end_lines[stream]))
+                    output.extend(chunk)
+                    ended[stream] = self._find_end(
+                        output, end_lines[stream], start)
+
+                if exited:
+                    break
+        except BaseException:
+            # Don't leave the shell in an unknown state
+            self._stop()
+            raise
+        finally:
+            selector.close()
+
+        # Stop the shell when the request is killed or the shell has exited
+        exit_code = None
+
+        if killed is not None or exited:
+            if killed is not None:
+                self.logger.debug('Kill the shell session by {}: {}'.format(
+                    killed, self.command))
+
+            exit_code = self._stop()
+
+        return outputs, killed, exit_code
+
+    def _write_request(self, selector, request_view):
+        try:
+            # Write as many bytes as the pipe accepts
+            num_written = os.write(
+                self.p_obj.stdin.fileno(), request_view[:self.read_size])
+            request_view = request_view[num_written:]
+        except BlockingIOError:
+            return request_view
+        except BrokenPipeError:
+            # The shell has exited, which is found by reading the outputs
+            request_view = request_view[:0]
+
+        # Stop writing after the whole request is written
+        if len(request_view) <= 0:
+            selector.unregister(self.p_obj.stdin)
+
+        return request_view
+
+    def _find_end(self, output, end_line, start):
+        # Find the end line
+        idx = output.find(end_line, start)
+
+        if idx < 0:
+            return False
+
+        # The return code is complete at the newline
+        if end_line.endswith(b'\n'):
+            return True
+        else:
+            return output.find(b'\n', idx + len(end_line)) >= 0
+
+    def _build_results(self, outputs, marker, killed, exit_code):
+        # Split the outputs between the marker lines
+        stdout = outputs['stdout'].decode('utf-8', errors='replace')
+        stderr = outputs['stderr'].decode('utf-8', errors='replace')
+
+        stdout_sections = split_marked_sections(stdout, marker)
+        stderr_sections = split_marked_sections(stderr, marker)
+
+        # Check whether the responses are complete
+        if 0 in stdout_sections and 0 in stderr_sections:
+            stdout, return_code = stdout_sections[0]
+            stderr, _ = stderr_sections[0]
+
+            outer_stderr = ''
+        else:
+            # Use the return code of the stopped shell
+            return_code = exit_code
+
+            # Report the exited shell
+            if killed is None:
+                outer_stderr = 'Shell session exited unexpectedly: {}'.format(
+                    self.command)
+            else:
+                outer_stderr = ''
+
+        # Return the results
+        return {
+            'outer_stdout': b'',
+            'outer_stderr': outer_stderr.encode('utf-8'),
+            'stdout': stdout.encode('utf-8'),
+            'stderr': stderr.encode('utf-8'),
+            'return_code': return_code,
+            'killed': killed,
+        }
@@ -1,11 +1,18 @@
 import collections
 import json
 import logging
+import numbers
 
 import oyaml as yaml
 
-from training_noodles.data_structure_utils import update_dict_with_missing
+from training_noodles.compiled_spec import (
+    CompiledSpec, ErrorHandler, compile_requirement_expression)
+from training_noodles.data_structure_utils import (
+    update_dict_with_missing, wrap_with_list)
+from training_noodles.dependency_graph import DependencyGraph
 from training_noodles.file_helper import FileHelper
+from training_noodles.resource_ledger import check_resources
+from training_noodles.retry_policy import RetryPolicy
 
 
 # Set the path to default spec
@@ -27,17 +34,34 @@ keys_to_copy = [
     'servers',
     # requirements
     'requirements/*',
+    'batch_requirements',
     # Deployment
+    'placement/*',
+    'gpu_allocation/*',
     'write_status_to/*',
+    'write_journal_to/*',
+    'write_status_interval',
+    'scheduler',
     'round_interval',
+    'settle_time',
     'deployment_interval',
     'commands_interval',
+    'output_buffer/*',
+    'probe_workers',
+    'deployment_workers',
     # Error handling
     'check_any_errors',
     'error_handlers',
+    'retry_policy/*',
+    'timeouts/*',
+    'timeout_action',
     # Shell commands
     'shell_string',
     'shell_stdin',
+    'shell_sessions',
+    'direct_local_exec',
+    'temp_files/*',
+    'ssh/*',
 ]
 
 
@@ -63,6 +87,27 @@ def read_user_spec(path):
     # Fill missing values in server specs
     _fill_missing_in_server_specs(user_spec)
 
+    # Check the server capacities and experiment reservations
+    _check_resources(user_spec)
+
+    # Check the timeouts
+    _check_timeouts(user_spec)
+
+    # Check the output buffer
+    _check_output_buffer(user_spec)
+
+    # Check the SSH options
+    _check_ssh(user_spec)
+
+    # Check the temporary files
+    _check_temp_files(user_spec)
+
+    # Check the GPU allocation
+    _check_gpu_allocation(user_spec)
+
+    # Check the experiment dependencies before filtering the experiments
+    _check_experiment_dependencies(user_spec)
+
     # Filter the experiments
     _filter_experiments(user_spec, experiments)
 
@@ -73,6 +118,139 @@ def read_user_spec(path):
     return user_spec
 
 
+def compile_user_spec(user_spec):
+    """ Compile the requirement expressions and error handlers in the spec.
+
+    Arguments:
+        user_spec (dict): User spec filled by "read_user_spec".
+
+    Returns:
+        CompiledSpec: The compiled spec.
+
+    Raises:
+        ValueError: When any requirement expression or error handler is
+            invalid, the location in the spec is logged.
+    """
+    # Create an empty compiled spec
+    compiled_spec = CompiledSpec()
+
+    # Compile the requirement expressions
+    _compile_requirement_expressions(user_spec, compiled_spec)
+
+    # Compile the error handlers
+    _compile_error_handlers(user_spec, compiled_spec)
+
+    # Check the retry policies
+    _check_retry_policies(user_spec)
+
+    # Return the compiled spec
+    return compiled_spec
+
+
+def _compile_requirement_expressions(user_spec, compiled_spec):
+    # Collect the experiment specs with their locations
+    located_exp_specs = [
+        ('experiment_default',
+         user_spec.get('experiment_default', collections.OrderedDict()))]
+
+    for stage in ['before_all_experiments', 'experiments',
+                  'after_all_experiments']:
+        for exp_idx, exp_spec in enumerate(user_spec.get(stage, [])):
+            located_exp_specs.append(
+                ('{}[{}]'.format(stage, exp_idx), exp_spec))
+
+    # Iterate each experiment spec
+    for exp_location, exp_spec in located_exp_specs:
+        # Get the requirements of all command types
+        reqs_spec = exp_spec.get('requirements', None) or {}
+
+        # Iterate each command type
+        for command_type, req_groups in reqs_spec.items():
+            # Set the location of the requirement groups
+            location = '{}.requirements.{}'.format(exp_location, command_type)
+
+            # Check whether the requirement groups are in a list
+            if not isinstance(req_groups, list):
+                _raise_spec_error(
+                    'Requirements should be a list of requirement groups',
+                    location)
+
+            # Iterate each requirement group
+            for group_idx, req_group in enumerate(req_groups):
+                # Check whether the requirement group is a dict
+                if not isinstance(req_group, dict):
+                    _raise_spec_error(
+                        'Requirement group should be a dict',
+                        '{}[{}]'.format(location, group_idx))
+
+                # Iterate each requirement expression
+                for req_id, req_expr in req_group.items():
+                    try:
+                        # Compile the aggregation of the requirement ID
+                        compiled_spec.get_metric_aggregation(req_id)
+                    except ValueError as e:
+                        _raise_spec_error(str(e), '{}[{}].{}'.format(
+                            location, group_idx, req_id))
+
+                    # Skip the compiled expression
+                    if (isinstance(req_expr, str) and
+                            req_expr in compiled_spec.requirement_predicates):
+                        continue
+
+                    try:
+                        # Compile the expression
+                        predicate = compile_requirement_expression(req_expr)
+                    except ValueError as e:
+                        _raise_spec_error(str(e), '{}[{}].{}'.format(
+                            location, group_idx, req_id))
+
+                    # Save the predicate
+                    compiled_spec.requirement_predicates[req_expr] = predicate
+
+
+def _compile_error_handlers(user_spec, compiled_spec):
+    # Iterate each error handler spec
+    for idx, handler_spec in enumerate(user_spec.get('error_handlers', [])):
+        try:
+            # Compile the error handler
+            error_handler = ErrorHandler(handler_spec)
+        except ValueError as e:
+            _raise_spec_error(str(e), 'error_handlers[{}]'.format(idx))
+
+        # Save the error handler
+        compiled_spec.error_handlers.append(error_handler)
+
+
+def _check_retry_policies(user_spec):
+    # Collect the retry policies with their locations
+    located_policies = [('retry_policy', user_spec.get('retry_policy', None))]
+
+    for server_idx, server_spec in enumerate(user_spec.get('servers', [])):
+        located_policies.append(
+            ('servers[{}].retry_policy'.format(server_idx),
+             server_spec.get('retry_policy', None)))
+
+    # Check each retry policy
+    for location, policy_spec in located_policies:
+        # Skip the missing policy
+        if policy_spec is None:
+            continue
+
+        try:
+            RetryPolicy(policy_spec)
+        except ValueError as e:
+            _raise_spec_error(str(e), location)
+
+
+def _raise_spec_error(message, location):
+    # Add the location to the message
+    message = '{} (at "{}")'.format(message, location)
+
+    # Log and raise the error
+    logging.error(message)
+    raise ValueError(message) from None
+
+
 def _read_spec(path):
     try:
         # Read the user spec
@@ -157,6 +335,228 @@ def _fill_missing_in_server_specs(user_spec):
         _fill_missing_with_defaults(default_server_spec, server_spec, keys)
 
 
+def _check_resources(user_spec):
+    # Collect the resources with their locations
+    located_resources = []
+
+    for server_idx, server_spec in enumerate(user_spec.get('servers', [])):
+        located_resources.append(
+            ('servers[{}].capacities'.format(server_idx),
+             server_spec.get('capacities', None)))
+
+    for stage in ['before_all_experiments', 'experiments',
+                  'after_all_experiments']:
+        for exp_idx, exp_spec in enumerate(user_spec.get(stage, [])):
+            located_resources.append(
+                ('{}[{}].reservations'.format(stage, exp_idx),
+                 exp_spec.get('reservations', None)))
+
+    # Check each resources
+    for location, resources in located_resources:
+        # Skip the missing resources
+        if resources is None:
+            continue
+
+        try:
+            check_resources(resources)
+        except ValueError as e:
+            _raise_spec_error(str(e), location)
+
+
+def _check_timeouts(user_spec):
+    # Collect the timeouts with their locations
+    located_timeouts = [
+        ('timeouts.{}'.format(name), timeout)
+        for name, timeout in (user_spec.get('timeouts', None) or {}).items()]
+
+    for stage in ['before_all_experiments', 'experiments',
+                  'after_all_experiments']:
+        for exp_idx, exp_spec in enumerate(user_spec.get(stage, [])):
+            located_timeouts.append(
+                ('{}[{}].timeout'.format(stage, exp_idx),
+                 exp_spec.get('timeout', None)))
+
+    # Check each timeout
+    for location, timeout in located_timeouts:
+        if timeout is not None and (
+                not isinstance(timeout, numbers.Real) or
+                isinstance(timeout, bool) or timeout < 0):
+            _raise_spec_error(
+                'Timeout should be a non-negative number: {}'.format(timeout),
+                location)
+
+    # Check the timeout action
+    timeout_action = user_spec.get('timeout_action', 'retry')
+
+    if timeout_action not in ['abort', 'retry', 'continue']:
+        _raise_spec_error(
+            'Unknown timeout action "{}"'.format(timeout_action),
+            'timeout_action')
+
+
+def _check_output_buffer(user_spec):
+    # Get the output buffer spec
+    output_buffer = user_spec.get('output_buffer', None) or {}
+
+    # Check the sizes
+    for name in ['head_size', 'tail_size']:
+        size = output_buffer.get(name, None)
+
+        if size is not None and (
+                not isinstance(size, int) or isinstance(size, bool) or
+                size < 0):
+            _raise_spec_error(
+                'Size should be a non-negative integer: {}'.format(size),
+                'output_buffer.{}'.format(name))
+
+    # Check whether to stream the outputs
+    stream = output_buffer.get('stream', False)
+
+    if not isinstance(stream, bool):
+        _raise_spec_error(
+            'Stream should be a boolean: {}'.format(stream),
+            'output_buffer.stream')
+
+
+def _check_ssh(user_spec):
+    # Get the SSH spec
+    ssh = user_spec.get('ssh', None) or {}
+
+    # Check the switches
+    for name in ['multiplexing', 'prewarm']:
+        if not isinstance(ssh.get(name, False), bool):
+            _raise_spec_error(
+                'Option should be a boolean: {}'.format(ssh[name]),
+                'ssh.{}'.format(name))
+
+    # Check the times
+    for name in ['connect_timeout', 'check_interval']:
+        value = ssh.get(name, 0)
+
+        if (not isinstance(value, numbers.Real) or isinstance(value, bool) or
+                value < 0):
+            _raise_spec_error(
+                'Option should be a non-negative number: {}'.format(value),
+                'ssh.{}'.format(name))
+
+
+def _check_temp_files(user_spec):
+    # Get the temporary files spec
+    temp_files = user_spec.get('temp_files', None) or {}
+
+    # Check the backend
+    backend = temp_files.get('backend', 'disk')
+
+    if backend not in ['disk', 'shm']:
+        _raise_spec_error(
+            'Unknown backend (should be "disk" or "shm"): {}'.format(backend),
+            'temp_files.backend')
+
+    # Check the directory
+    directory = temp_files.get('directory', None)
+
+    if directory is not None and not isinstance(directory, str):
+        _raise_spec_error(
+            'Option should be a string: {}'.format(directory),
+            'temp_files.directory')
+
+    # Check the limits
+    for name in ['pool_size', 'max_file_size']:
+        value = temp_files.get(name, 0)
+
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            _raise_spec_error(
+                'Option should be a non-negative integer: {}'.format(value),
+                'temp_files.{}'.format(name))
+
+
+def _check_gpu_allocation(user_spec):
+    # Get the GPU allocation spec
+    gpu_allocation = user_spec.get('gpu_allocation', None) or {}
+
+    # Check the requirement ID
+    requirement = gpu_allocation.get('requirement', 'cuda_memory_usage')
+
+    if not isinstance(requirement, str):
+        _raise_spec_error(
+            'Option should be a string: {}'.format(requirement),
+            'gpu_allocation.requirement')
+
+    # Check the maximum usage and hold time
+    for name in ['max_usage', 'hold_time']:
+        value = gpu_allocation.get(name, 0)
+
+        if value is not None and (
+                not isinstance(value, numbers.Real) or
+                isinstance(value, bool) or value < 0):
+            _raise_spec_error(
+                'Option should be a non-negative number: {}'.format(value),
+                'gpu_allocation.{}'.format(name))
+
+    # Check the number of GPUs of each experiment
+    for stage in ['before_all_experiments', 'experiments',
+                  'after_all_experiments']:
+        for exp_idx, exp_spec in enumerate(user_spec.get(stage, [])):
+            gpus = exp_spec.get('gpus', None) or 0
+
+            if not isinstance(gpus, int) or isinstance(gpus, bool) or gpus < 0:
+                _raise_spec_error(
+                    'Number of GPUs should be a non-negative integer: {}'
+                    .format(gpus), '{}[{}].gpus'.format(stage, exp_idx))
+
+
+def _check_experiment_dependencies(user_spec):
+    """ Check the experiment dependencies in all stages and command types.
+
+    Raises:
+        ValueError: When any experiment depends on an unknown experiment or
+            there are cyclic dependencies.
+    """
+    # Set the stages to check
+    stages = [
+        'before_all_experiments',
+        'experiments',
+        'after_all_experiments',
+    ]
+
+    # Iterate each stage
+    for stage in stages:
+        # Get experiment specs
+        exps_spec = user_spec.get(stage, [])
+
+        # Get experiment names
+        names = [exp_spec.get('name', '') for exp_spec in exps_spec]
+
+        # Get names of experiments in other stages
+        other_names = [exp_spec.get('name', '')
+                       for other_stage in stages if other_stage != stage
+                       for exp_spec in user_spec.get(other_stage, [])]
+
+        # Collect all command types in the dependencies
+        command_types = set()
+
+        for exp_spec in exps_spec:
+            command_types.update(exp_spec.get('depends_on', {}).keys())
+
+        # Iterate each command type
+        for command_type in sorted(command_types):
+            # Get the dependencies of each experiment
+            dependencies = [
+                wrap_with_list(exp_spec.get('depends_on', {}).get(
+                    command_type, []))
+                for exp_spec in exps_spec]
+
+            try:
+                # Build the dependency graph to check the dependencies
+                DependencyGraph(
+                    names, dependencies, satisfied_names=other_names)
+            except ValueError:
+                logging.error(
+                    'Invalid "depends_on" in stage "{}" of command type "{}"'
+                    .format(stage, command_type))
+                raise
+
+
 def _fill_missing_with_defaults(default_spec, user_spec, keys):
     """ Fill missing values with default values.
 
@@ -0,0 +1,283 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from training_noodles.logger import Logger
+
+
+class SSHConnectionPool:
+    """ Pool of persistent SSH connections, one per destination.
+
+    Each connection is a master process ("ssh -M -N") owned by Noodles, and
+    the SSH commands to the same destination reuse it through "ControlPath"
+    instead of connecting and authenticating again. The connections are opened
+    lazily (or by "open_connections" in advance), checked by "ssh -O check"
+    every "check_interval" seconds and closed by "close".
+
+    A destination whose connection can't be opened falls back to the plain SSH
+    commands, and the connection is tried again after "check_interval"
+    seconds.
+    """
+
+    # Interval in seconds to check whether the master connection is ready
+    poll_interval = 0.1
+
+    # Time in seconds to wait for the master process to exit when closing
+    close_timeout = 1.0
+
+    def __init__(self, ssh_command='ssh', connect_timeout=10,
+                 check_interval=60):
+        """ Initialize the instance.
+
+        Arguments:
+            ssh_command (str): SSH command (e.g., "ssh -F ~/.ssh/config").
+            connect_timeout (float): Time in seconds to wait for a connection
+                to be ready.
+            check_interval (float): Interval in seconds to check whether a
+                connection is healthy before reusing it.
+        """
+        # Save the options
+        self.ssh_command = ssh_command
+        self.connect_timeout = connect_timeout
+        self.check_interval = check_interval
+
+        # Initialize the directory of the control sockets, which is created
+        # lazily
+        self.control_dir = None
+
+        # Initialize the connections, the key is the destination and the
+        # value is a dict(lock, process, control_path, checked_time,
+        # failed_time)
+        self.connections = {}
+
+        # Create the lock to protect the connections
+        self.lock = threading.Lock()
+
+        # Create a logger
+        self.logger = Logger('ssh')
+
+    def get_control_options(self, destination):
+        """ Get the options to reuse the connection to the destination.
+
+        The connection is opened when it's not opened yet or it's unhealthy.
+
+        Arguments:
+            destination (str): SSH options and authority (e.g.,
+                "-p 22 user1@example.com").
+
+        Returns:
+            str: The SSH options, empty if the connection is not available.
+        """
+        # Get the connection
+        connection = self._get_connection(destination)
+
+        # Make sure the connection is alive, the connections to different
+        # destinations can be opened concurrently
+        with connection['lock']:
+            if not self._ensure_alive(destination, connection):
+                return ''
+
+            return '-o ControlMaster=no -o ControlPath={}'.format(
+                connection['control_path'])
+
+    def open_connections(self, destinations):
+        """ Open the connections to the destinations concurrently.
+        """
+        # Create a thread for each destination
+        threads = [threading.Thread(target=self.get_control_options,
+                                    args=(destination,))
+                   for destination in set(destinations)]
+
+        # Wait for all connections
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    def close(self):
+        """ Close all connections.
+        """
+        # Get all connections
+        with self.lock:
+            connections = list(self.connections.items())
+            self.connections = {}
+
+        # Close each connection
+        for destination, connection in connections:
+            with connection['lock']:
+                self._close_connection(destination, connection)
+
+        # Remove the directory of the control sockets
+        if self.control_dir is not None:
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+            self.control_dir = None
+
+    def _get_connection(self, destination):
+        with self.lock:
+            # Create the directory of the control sockets
+            if self.control_dir is None:
+                self.control_dir = tempfile.mkdtemp(
+                    prefix='training_noodles.ssh.')
+
+            # Create the connection
+            if destination not in self.connections:
+                # Hash the destination to keep the socket path short
+                name = hashlib.sha1(
+                    destination.encode('utf-8')).hexdigest()[:16]
+
+                self.connections[destination] = dict(
+                    lock=threading.Lock(), process=None,
+                    control_path=os.path.join(self.control_dir, name),
+                    checked_time=None, failed_time=None)
+
+            return self.connections[destination]
+
+    def _ensure_alive(self, destination, connection):
+        # Get current time
+        now = time.time()
+
+        # Check whether the master process is running
+        process = connection['process']
+
+        if process is not None and process.poll() is None:
+            # Reuse the connection without checking it too often
+            if now - connection['checked_time'] < self.check_interval:
+                return True
+
+            # Check whether the connection is healthy
+            if self._check_connection(destination, connection):
+                connection['checked_time'] = now
+
+                return True
+
+        # Close the dead connection
+        if process is not None:
+            self.logger.warning(
+                'SSH connection to "{}" is lost, reconnect'.format(
+                    destination))
+
+            self._close_connection(destination, connection)
+
+        # Don't try to open the connection again too soon after a failure
+        failed_time = connection['failed_time']
+
+        if failed_time is not None and now - failed_time < self.check_interval:
+            return False
+
+        # Open the connection
+        if self._open_connection(destination, connection):
+            connection['checked_time'] = time.time()
+            connection['failed_time'] = None
+
+            return True
+        else:
+            connection['failed_time'] = time.time()
+
+            return False
+
+    def _open_connection(self, destination, connection):
+        # Build the command to run the master process, the shell is replaced
+        # by the process, so the process can be stopped directly. The master
+        # process runs in the background, so it fails instead of prompting for
+        # passwords or passphrases, and plain SSH is used to prompt
+        command = ('exec {} -M -N -o ControlMaster=yes -o BatchMode=yes' +
+                   ' -o ControlPath={} {}').format(
+            self.ssh_command, connection['control_path'], destination)
+
+        # Log the command
+        self.logger.debug('Open SSH connection: {}'.format(command))
+
+        # Run the master process, STDERR is written to a file since the
+        # process keeps running
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                command, shell=True, stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=stderr)
+
+            # Save the process
+            connection['process'] = process
+
+            # Compute the deadline
+            deadline = time.time() + self.connect_timeout
+
+            # Wait for the connection to be ready
+            while not self._check_connection(destination, connection):
+                # Check whether the master process has failed
+                if process.poll() is not None:
+                    reason = 'Return code: {}'.format(process.returncode)
+                    break
+
+                # Check whether the connection times out
+                if time.time() >= deadline:
+                    reason = 'Timed out after {}s'.format(
+                        self.connect_timeout)
+                    break
+
+                time.sleep(self.poll_interval)
+            else:
+                # The connection is ready
+                self.logger.debug(
+                    'Opened SSH connection to "{}"'.format(destination))
+
+                return True
+
+            # Read the error messages
+            stderr.seek(0)
+            messages = stderr.read().decode('utf-8', errors='replace')
+
+        # Log the failure
+        self.logger.warning([
+            'Could not open SSH connection to "{}", use plain SSH'.format(
+                destination),
+            reason,
+            'STDERR->\n{}'.format(messages),
+        ])
+
+        # Stop the master process
+        self._close_connection(destination, connection)
+
+        return False
+
+    def _check_connection(self, destination, connection):
+        # Build the command to check the master process
+        command = '{} -O check -o ControlPath={} {}'.format(
+            self.ssh_command, connection['control_path'], destination)
+
+        # Run the command
+        result = subprocess.run(
+            command, shell=True, stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # The connection is healthy when the command succeeds
+        return result.returncode == 0
+
+    def _close_connection(self, destination, connection):
+        # Get the master process
+        process = connection['process']
+
+        if process is None:
+            return
+
+        # Ask the master process to exit
+        if process.poll() is None:
+            command = '{} -O exit -o ControlPath={} {}'.format(
+                self.ssh_command, connection['control_path'], destination)
+
+            subprocess.run(
+                command, shell=True, stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Wait for the master process, terminate it if it doesn't exit
+        try:
+            process.wait(timeout=self.close_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+        # Reset the connection
+        connection['process'] = None
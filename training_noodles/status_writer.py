@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+import oyaml as yaml
+
+from training_noodles.logger import Logger
+
+
+class StatusWriter:
+    """ Deployment status writer.
+
+    This class writes two kinds of files:
+    * Journal: An append-only JSON-lines file, each line is an event (e.g., a
+    deployment has finished) which is flushed immediately.
+    * Snapshot: A YAML file of the current deployment status, the writes are
+    debounced by the minimum interval and the file is replaced atomically, so
+    readers never see a half-written file.
+    """
+
+    def __init__(self, snapshot_path=None, journal_path=None, interval=0):
+        """ Initialize the instance.
+
+        Arguments:
+            snapshot_path (str): Path to write the snapshot. Set to "None" to
+                disable the snapshot.
+            journal_path (str): Path to append the events. Set to "None" to
+                disable the journal.
+            interval (float): Minimum interval in seconds between two snapshot
+                writes.
+        """
+        # Save the paths and interval
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.interval = interval
+
+        # Initialize the time of the last snapshot write
+        self.last_write_time = None
+
+        # Initialize whether there are any unwritten changes
+        self.dirty = False
+
+        # Initialize the journal file
+        self.journal_fp = None
+
+        # Create the lock to protect the files
+        self.lock = threading.Lock()
+
+        # Create a logger
+        self.logger = Logger('status')
+
+    def append_event(self, event, **details):
+        """ Append an event to the journal.
+
+        Arguments:
+            event (str): Name of the event (e.g., "deployment").
+            details: Details of the event, which should be serializable by
+                JSON.
+        """
+        # Check whether to write the journal
+        if self.journal_path is None:
+            return
+
+        # Build the line
+        line = json.dumps({'time': time.time(), 'event': event, **details})
+
+        with self.lock:
+            try:
+                # Open the journal in append mode on the first event
+                if self.journal_fp is None:
+                    self.journal_fp = open(self.journal_path, 'a')
+
+                # Write the line and flush it
+                self.journal_fp.write(line + '\n')
+                self.journal_fp.flush()
+            except:
+                self.logger.exception(
+                    'Could not write the event to the journal "{}"'.format(
+                        self.journal_path))
+                raise
+
+    def should_write_snapshot(self, force=False, now=None):
+        """ Check whether the snapshot should be written now.
+
+        If the snapshot shouldn't be written due to the interval, it's marked
+        as dirty, so it will be written by the next call with "force".
+
+        Arguments:
+            force (bool): Whether to ignore the interval. The snapshot is only
+                written when there are any unwritten changes.
+            now (float): Current Unix time. Set to "None" to use current time.
+
+        Returns:
+            bool: Whether the snapshot should be written.
+        """
+        # Check whether to write the snapshot
+        if self.snapshot_path is None:
+            return False
+
+        # Get current time
+        now = time.time() if now is None else now
+
+        with self.lock:
+            # Check whether the interval has passed since the last write
+            due = (self.last_write_time is None or
+                   now - self.last_write_time >= self.interval)
+
+            # Check whether to write
+            if (force and self.dirty) or due:
+                return True
+            else:
+                # Mark the changes as unwritten
+                self.dirty = True
+
+                return False
+
+    def write_snapshot(self, status):
+        """ Write the snapshot atomically.
+
+        Arguments:
+            status (dict): The deployment status.
+        """
+        # Serialize the status into YAML string
+        contents = yaml.dump(status)
+
+        # Get the directory of the snapshot
+        dir_path = os.path.dirname(os.path.abspath(self.snapshot_path))
+
+        with self.lock:
+            try:
+                # Write the contents to a temporary file in the same directory
+                fd, temp_path = tempfile.mkstemp(
+                    dir=dir_path, prefix='.noodles_status.', suffix='.tmp')
+
+                try:
+                    with os.fdopen(fd, 'w') as fp:
+                        fp.write(contents)
+
+                    # Make the snapshot readable by others as a normal file
+                    os.chmod(temp_path, 0o644)
+
+                    # Replace the snapshot with the temporary file
+                    os.replace(temp_path, self.snapshot_path)
+                except:
+                    # Remove the temporary file
+                    os.remove(temp_path)
+                    raise
+            except:
+                self.logger.exception(
+                    'Could not write the status to file "{}"'.format(
+                        self.snapshot_path))
+                raise
+
+            # Save the time of the write
+            self.last_write_time = time.time()
+            self.dirty = False
+
+    def close(self):
+        """ Close the journal.
+        """
+        with self.lock:
+            if self.journal_fp is not None:
+                self.journal_fp.close()
+                self.journal_fp = None
@@ -1,6 +1,26 @@
 import ast
+import functools
 import re
 
+# Characters which have special meanings in an unquoted Bash word
+_SHELL_SPECIAL_CHARS = frozenset(' \t\n\'"\\`;&|<>()*?[]{}~#!$')
+
+# Characters which make Bash split or match the expanded values as filenames
+_SPLIT_GLOB_CHARS = frozenset(' \t\n*?[')
+
+# Variables set by Bash itself, which may differ from the environment
+_SHELL_VARIABLES = frozenset([
+    '_', 'DIRSTACK', 'EPOCHREALTIME', 'EPOCHSECONDS', 'EUID', 'FUNCNAME',
+    'GROUPS', 'HISTCMD', 'HOSTNAME', 'HOSTTYPE', 'IFS', 'LINENO', 'MACHTYPE',
+    'OLDPWD', 'OPTERR', 'OPTIND', 'OSTYPE', 'PIPESTATUS', 'PPID', 'PS4', 'PWD',
+    'RANDOM', 'SECONDS', 'SHELLOPTS', 'SHLVL', 'SRANDOM', 'UID',
+])
+
+# Pattern of the supported expansions
+_EXPANSION_PATTERN = re.compile(
+    r'\\\$|\$\{(?P<braced>[A-Za-z_][A-Za-z0-9_]*)(:-' +
+    r'(?P<default>[^}]*))?\}|\$(?P<name>[A-Za-z_][A-Za-z0-9_]*)')
+
 
 def has_environment_variable(expr):
     # Set the pattern
@@ -13,6 +33,116 @@ def has_environment_variable(expr):
     return m is not None
 
 
+def expand_environment_variables(expr, envs):
+    """ Expand the environment variables in the expression in Python.
+
+    The result is the same as "echo -n <expression>" in Bash. Only "$VAR",
+    "${VAR}", "${VAR:-default}" and "\\$" are supported, the expression is not
+    expanded if it has any other constructs (e.g., quotes, command
+    substitutions, globs) or if Bash would split or match the expanded values
+    as filenames.
+
+    Arguments:
+        expr (str): The expression (e.g., "$HOME/logs/${NAME:-exp}.log").
+        envs (dict): The environment variables. The value "None" means the
+            value is unknown, and the expression using it is not expanded.
+
+    Returns:
+        str: The expanded expression, None if the expression should be expanded
+        by the shell.
+    """
+    # Parse the expression
+    tokens = _parse_expansions(expr)
+
+    if tokens is None:
+        return None
+
+    # Expand the tokens
+    parts = []
+
+    for literal, name, default in tokens:
+        if name is None:
+            parts.append(literal)
+            continue
+
+        # Let the shell expand its own variables
+        if name in _SHELL_VARIABLES or name.startswith('BASH'):
+            return None
+
+        # Get the value
+        value = envs.get(name, '')
+
+        if value is None:
+            return None
+
+        # Use the default value when the variable is unset or empty
+        if default is not None and len(value) <= 0:
+            value = default
+
+        # Let the shell split and match the value
+        if not _SPLIT_GLOB_CHARS.isdisjoint(value):
+            return None
+
+        parts.append(value)
+
+    # Join the parts
+    result = ''.join(parts)
+
+    # Let the shell handle the results which may be options of "echo"
+    if result.startswith('-'):
+        return None
+
+    return result
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_expansions(expr):
+    """ Parse the expression into a tuple of tokens (literal, name, default),
+    where "name" is None for the literals. Return None if the expression has
+    any constructs which are not supported.
+    """
+    # Initialize the tokens
+    tokens = []
+
+    # Find all expansions
+    start = 0
+
+    for m in _EXPANSION_PATTERN.finditer(expr):
+        # Add the literal before the expansion
+        literal = expr[start:m.start()]
+
+        if not _SHELL_SPECIAL_CHARS.isdisjoint(literal):
+            return None
+
+        tokens.append((literal, None, None))
+
+        # Add the expansion
+        if m.group(0) == '\\$':
+            tokens.append(('$', None, None))
+        elif m.group('name') is not None:
+            tokens.append((None, m.group('name'), None))
+        else:
+            default = m.group('default')
+
+            if (default is not None and
+                    not _SHELL_SPECIAL_CHARS.isdisjoint(default)):
+                return None
+
+            tokens.append((None, m.group('braced'), default))
+
+        start = m.end()
+
+    # Add the remaining literal
+    literal = expr[start:]
+
+    if not _SHELL_SPECIAL_CHARS.isdisjoint(literal):
+        return None
+
+    tokens.append((literal, None, None))
+
+    return tuple(tokens)
+
+
 def parse_requirement_expression(expr):
     # Set the pattern
     pattern = r'^(?P<operator>==|!=|<=|>=|<|>)(?P<value>.+)$'
@@ -43,6 +173,90 @@ def parse_requirement_expression(expr):
         }
 
 
+def split_requirement_id(req_id):
+    """ Split the requirement ID by its scheme.
+
+    Available schemes are "dynamic" (default), "static" and "ttl". The "ttl"
+    scheme is followed by the maximum age in seconds and the requirement ID
+    (e.g., "ttl:30:cpu_usage").
+
+    Arguments:
+        req_id (str): Requirement ID which may contain the scheme.
+
+    Returns:
+        (scheme (str), max_age (float), req_id (str)), "max_age" is None unless
+        the scheme is "ttl".
+
+    Raises:
+        ValueError: When the scheme is unknown or the maximum age is invalid.
+    """
+    # Split the requirement ID by scheme
+    schemes = ['static', 'dynamic', 'ttl']
+    success, scheme, follow = split_by_scheme(req_id, schemes)
+
+    # Check whether there is unknown scheme
+    if not success:
+        raise ValueError('Unknown scheme "{}" in requirement ID "{}"'.format(
+            scheme, req_id))
+
+    # Set default scheme to "dynamic"
+    scheme = scheme or 'dynamic'
+
+    # Check whether to parse the maximum age
+    if scheme != 'ttl':
+        return scheme, None, follow
+
+    # Split the maximum age and requirement ID
+    parts = follow.split(sep=':', maxsplit=1)
+
+    try:
+        # Parse the maximum age
+        max_age = float(parts[0])
+    except ValueError:
+        max_age = None
+
+    # Check whether the maximum age and requirement ID are valid
+    if len(parts) < 2 or max_age is None or max_age < 0:
+        raise ValueError(
+            'Invalid "ttl:<seconds>:<requirement ID>" in "{}"'.format(req_id))
+
+    # Return the scheme, maximum age and requirement ID
+    return scheme, max_age, parts[1]
+
+
+def split_requirement_aggregation(req_id):
+    """ Split the requirement ID by its aggregation suffix.
+
+    The aggregation follows the last "@" (e.g., "cuda_memory_usage@min",
+    "cuda_memory_usage@count_below(0.1)").
+
+    Arguments:
+        req_id (str): Requirement ID without the scheme.
+
+    Returns:
+        (req_id (str), aggregation (str)), "aggregation" is None if there is no
+        suffix.
+
+    Raises:
+        ValueError: When the requirement ID or the aggregation is empty.
+    """
+    # Check whether there is the suffix
+    if '@' not in req_id:
+        return req_id, None
+
+    # Split the requirement ID and the aggregation
+    req_id, aggregation = req_id.rsplit('@', maxsplit=1)
+
+    # Check whether both parts are given
+    if len(req_id) <= 0 or len(aggregation) <= 0:
+        raise ValueError(
+            'Invalid "<requirement ID>@<aggregation>" in "{}@{}"'.format(
+                req_id, aggregation))
+
+    # Return the requirement ID and the aggregation
+    return req_id, aggregation
+
+
 def split_by_scheme(s, schemes):
     """ Split the string by identifiable scheme.
 
@@ -78,3 +292,42 @@ def split_by_scheme(s, schemes):
                 return False, parts[0], parts[1]
     else:
         return True, None, s
+
+
+def split_marked_sections(text, marker):
+    """ Split the text into sections enclosed by marker lines.
+
+    Each section starts with the line "<marker>:begin:<index>" and ends with a
+    newline followed by the line "<marker>:end:<index>" which may be followed
+    by ":<return code>". Texts outside the sections are ignored.
+
+    Arguments:
+        text (str): Text which contains the sections.
+        marker (str): Marker which is unlikely to appear in the contents.
+
+    Returns:
+        dict: The key is the section index (int) and the value is
+        (contents (str), return_code (int)), "return_code" is None if it's not
+        in the end line.
+    """
+    # Set the pattern
+    marker = re.escape(marker)
+    pattern = (marker + r':begin:(?P<idx>\d+)\n(?P<contents>.*?)\n' +
+               marker + r':end:(?P=idx)(:(?P<return_code>-?\d+))?(\n|$)')
+
+    # Initialize the sections
+    sections = {}
+
+    # Find all sections
+    for m in re.finditer(pattern, text, flags=re.DOTALL):
+        # Get the return code
+        return_code = m.group('return_code')
+
+        if return_code is not None:
+            return_code = int(return_code)
+
+        # Save the contents and return code
+        sections[int(m.group('idx'))] = (m.group('contents'), return_code)
+
+    # Return the sections
+    return sections
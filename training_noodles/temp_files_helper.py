@@ -1,27 +1,42 @@
 import os
 import pathlib
+import re
 import tempfile
+import threading
 
 from training_noodles.logger import Logger
 
+# Prefix of the temporary files
+temp_file_prefix = 'training_noodles.'
+
+# Pattern of the temporary file names, which contain the process ID of the
+# creator
+temp_file_pattern = re.compile(
+    r'^training_noodles\.(?P<pid>\d+)\.\w+\.\w+$')
+
 
 class TempFilesHelper:
     """ Temporary files helper.
     """
 
-    def __init__(self, closes):
+    def __init__(self, closes, backend=None):
         """ Initialize the instance.
 
         Arguments:
             closes (dict): Closing file pointers. The key is the stream name
             and the value is a boolean indicating whether to close the file
             pointer after creating the corresponding temporary file.
+            backend (DiskTempFilesBackend): Backend to create and delete the
+            temporary files. Defaults to the disk backend.
         """
         # Save indicators of closing file pointers
         self.closes = closes
 
         # Set the streams
-        self.streams = ['stdin', 'stdout', 'stderr']
+        self.streams = list(closes.keys())
+
+        # Save the backend
+        self.backend = backend or DiskTempFilesBackend()
 
         # Create a logger
         self.logger = Logger('temp')
@@ -60,7 +75,14 @@ class TempFilesHelper:
         # Return the results
         return temp_files
 
-    def delete_temp_files(self, temp_files):
+    def delete_temp_files(self, temp_files, reusable=False):
+        """ Delete temporary files.
+
+        Arguments:
+            temp_files (dict): Temporary files given by "create_temp_files".
+            reusable (bool): Whether the files can be reused by the backend,
+                it should be off if any processes may still write to the files.
+        """
         # Iterate each stream
         for stream, temp_file in temp_files.items():
             # Get the file pointer and path
@@ -69,23 +91,29 @@ class TempFilesHelper:
             # Close the file pointer
             fp.close()
 
-            # Try to delete the temporary file
+            # Try to delete or recycle the temporary file
             try:
-                os.unlink(path)
+                self.backend.release(path, reusable=reusable)
             except:  # pragma: no cover
                 # Only log the exception, don't raise it
                 self.logger.exception(('Failed to delete {} temporary file,' +
                                        ' ignore now: {}').format(stream, path))
 
+    def remove_leftover_files(self):
+        """ Remove the temporary files left by the dead processes (e.g., after
+        a crash).
+        """
+        self.backend.remove_leftover_files()
+
+    def close(self):
+        """ Delete the temporary files kept by the backend.
+        """
+        self.backend.close()
+
     def _create_temp_file(self, output_type, close):
         # Create a temporary file
         try:
-            # Set the suffix
-            suffix = '.{}'.format(output_type)
-
-            # Create a named temporary file
-            fp = tempfile.NamedTemporaryFile(
-                delete=False, prefix='training_noodles.', suffix=suffix)
+            fp, path = self.backend.acquire(output_type)
         except:  # pragma: no cover
             self.logger.exception('Failed to create temporary file')
             raise
@@ -94,12 +122,222 @@ class TempFilesHelper:
         if close:
             fp.close()
 
-        # Convert the paths to POSIX-style paths
-        path = pathlib.Path(fp.name).as_posix()
-
         # Log the temporary files
         self.logger.debug('Created temporary file for {}: {}'.format(
             output_type, path))
 
         # Return the temporary file pointer and path
         return fp, path
+
+
+class DiskTempFilesBackend:
+    """ Backend which creates a new temporary file for each command and
+    deletes it after the command.
+    """
+
+    def __init__(self, directory=None):
+        """ Initialize the instance.
+
+        Arguments:
+            directory (str): Directory of the temporary files. Defaults to the
+                temporary directory of the system.
+        """
+        # Save the directory
+        self.directory = directory
+
+        # Create a logger
+        self.logger = Logger('temp')
+
+    def acquire(self, stream):
+        """ Create a temporary file.
+
+        Arguments:
+            stream (str): Stream name, which is the suffix of the file.
+
+        Returns:
+            (fp, path) where "fp" is the file pointer (binary) and "path" is
+            the POSIX-style path.
+        """
+        # Create a named temporary file, the name contains the process ID to
+        # find the files left by the dead processes
+        fp = tempfile.NamedTemporaryFile(
+            delete=False, dir=self.directory,
+            prefix='{}{}.'.format(temp_file_prefix, os.getpid()),
+            suffix='.{}'.format(stream))
+
+        # Convert the paths to POSIX-style paths
+        return fp, pathlib.Path(fp.name).as_posix()
+
+    def release(self, path, reusable=False):
+        """ Delete the temporary file.
+        """
+        os.unlink(path)
+
+    def remove_leftover_files(self):
+        """ Remove the temporary files created by the dead processes in the
+        directory of the backend and the temporary directory of the system.
+        """
+        # Get the directories
+        directories = {self.directory or tempfile.gettempdir(),
+                       tempfile.gettempdir()}
+
+        # Remove the files in each directory
+        for directory in directories:
+            self._remove_leftover_files_in(directory)
+
+    def _remove_leftover_files_in(self, directory):
+        # Iterate each file
+        for name in os.listdir(directory):
+            # Get the process ID of the creator
+            m = temp_file_pattern.match(name)
+
+            if m is None or _is_process_alive(int(m.group('pid'))):
+                continue
+
+            # Only remove the files of the current user
+            path = os.path.join(directory, name)
+
+            try:
+                if os.stat(path).st_uid != os.getuid():
+                    continue
+
+                os.unlink(path)
+            except OSError:
+                # The file may have been removed by others
+                continue
+
+            self.logger.debug('Removed leftover temporary file: {}'.format(
+                path))
+
+    def close(self):
+        """ Nothing to delete.
+        """
+        pass
+
+
+class SharedMemoryTempFilesBackend(DiskTempFilesBackend):
+    """ Backend which keeps a pool of temporary files in shared memory.
+
+    The files are created in "/dev/shm" (tmpfs) instead of the disk. A released
+    file is truncated and kept for the next command unless any processes may
+    still write to it, it's larger than "max_file_size" or the pool of the
+    stream already has "pool_size" files, in which case it's deleted.
+    """
+
+    def __init__(self, directory='/dev/shm', pool_size=16,
+                 max_file_size=1048576):
+        """ Initialize the instance.
+
+        Arguments:
+            directory (str): Directory of the temporary files in shared
+                memory. Falls back to the temporary directory of the system if
+                it doesn't exist.
+            pool_size (int): Maximum number of files to keep for each stream.
+            max_file_size (int): Maximum size in bytes of a released file to
+                keep.
+        """
+        super().__init__(directory=directory)
+
+        # Fall back to the temporary directory of the system
+        if directory is not None and not os.path.isdir(directory):
+            self.logger.warning(
+                'Directory "{}" not found, use "{}" instead'.format(
+                    directory, tempfile.gettempdir()))
+
+            self.directory = None
+
+        # Save the limits
+        self.pool_size = pool_size
+        self.max_file_size = max_file_size
+
+        # Initialize the idle files, the key is the stream and the value is a
+        # list of paths
+        self.idle_files = {}
+
+        # Create the lock to protect the idle files
+        self.lock = threading.Lock()
+
+    def acquire(self, stream):
+        # Take an idle file of the stream
+        with self.lock:
+            idle = self.idle_files.get(stream, [])
+            path = idle.pop() if len(idle) > 0 else None
+
+        # Reuse the idle file
+        if path is not None:
+            try:
+                return open(path, 'r+b'), path
+            except OSError:
+                # The file has been removed by others
+                pass
+
+        # Create a new file
+        return super().acquire(stream)
+
+    def release(self, path, reusable=False):
+        # Get the stream from the suffix
+        stream = path.rsplit('.', maxsplit=1)[-1]
+
+        # Check whether the file can be kept
+        if reusable and os.path.getsize(path) <= self.max_file_size:
+            with self.lock:
+                idle = self.idle_files.setdefault(stream, [])
+
+                if len(idle) < self.pool_size:
+                    # Truncate the file to release the memory and keep it
+                    os.truncate(path, 0)
+                    idle.append(path)
+
+                    return
+
+        # Delete the file
+        os.unlink(path)
+
+    def close(self):
+        # Get all idle files
+        with self.lock:
+            paths = [path for idle in self.idle_files.values()
+                     for path in idle]
+            self.idle_files = {}
+
+        # Delete the files
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def create_temp_files_backend(backend='disk', **kwargs):
+    """ Create the backend of the temporary files.
+
+    Arguments:
+        backend (str): "disk" or "shm".
+        kwargs: Options of the backend.
+
+    Returns:
+        DiskTempFilesBackend: The backend.
+    """
+    # Get the directory
+    directory = kwargs.pop('directory', None)
+
+    if backend == 'disk':
+        return DiskTempFilesBackend(directory=directory)
+    elif backend == 'shm':
+        return SharedMemoryTempFilesBackend(
+            directory=directory or '/dev/shm', **kwargs)
+    else:
+        raise ValueError('Unknown temporary files backend: {}'.format(backend))
+
+
+def _is_process_alive(pid):
+    try:
+        # Send no signal to check whether the process exists
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to another user
+        return True
+
+    return True